@@ -0,0 +1,211 @@
+"""Batch API submission mode for experiment runs"""
+
+import asyncio
+import json
+import logging
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from rich.console import Console
+
+from ..models import Pergunta
+from .experiment_runner import ExperimentRunner, MAX_TOKENS, TEMPERATURE, resposta_values, usage_values
+from .result_writer import BufferedResultWriter
+
+logger = logging.getLogger(__name__)
+console = Console()
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+
+class BatchSubmitter:
+    """Runs one model/config through the OpenAI-compatible Batch API.
+
+    Pending prompts are written to a JSONL file, uploaded and submitted as a
+    batch; the batch is polled until it finishes and the output file is
+    upserted into `respostas` in a single statement. The endpoint is the
+    runner's client, so `LLM_BASE_URL` can point at a local stand-in server.
+    """
+
+    def __init__(
+        self,
+        runner: ExperimentRunner,
+        poll_interval: float = 30.0,
+        output_dir: str = "batches"
+    ):
+        self.runner = runner
+        self.poll_interval = poll_interval
+        self.output_dir = Path(output_dir)
+
+    @staticmethod
+    def _custom_id(pergunta_id: int, modelo_id: int, config: str) -> str:
+        return f"{pergunta_id}|{modelo_id}|{config}"
+
+    @staticmethod
+    def _parse_custom_id(custom_id: str) -> Tuple[int, int, str]:
+        pergunta_id, modelo_id, config = custom_id.split("|", 2)
+        return int(pergunta_id), int(modelo_id), config
+
+    def write_batch_file(self, questions: List[Pergunta]) -> Path:
+        """Write one chat-completion request per pending question."""
+        runner = self.runner
+        api_model_name = runner.resolve_api_model(runner.model_name)
+
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        safe_model = runner.model_name.replace("/", "_")
+        path = self.output_dir / f"{safe_model}_{runner.config}_{datetime.now():%Y%m%d_%H%M%S}.jsonl"
+
+        with open(path, "w", encoding="utf-8") as f:
+            for pergunta in questions:
+                request = {
+                    "custom_id": self._custom_id(pergunta.id, runner.modelo_obj.id, runner.config),
+                    "method": "POST",
+                    "url": BATCH_ENDPOINT,
+                    "body": {
+                        "model": api_model_name,
+                        "messages": runner._prepare_messages(pergunta.texto),
+                        "max_tokens": MAX_TOKENS,
+                        "temperature": TEMPERATURE
+                    }
+                }
+                f.write(json.dumps(request, ensure_ascii=False) + "\n")
+
+        logger.info(f"Wrote {len(questions)} batch requests to {path}")
+        return path
+
+    async def submit(self, path: Path) -> str:
+        """Upload the JSONL file and create the batch; returns the batch id."""
+        client = self.runner.client
+
+        resilience = self.runner.resilience
+
+        async def upload():
+            with open(path, "rb") as f:
+                return await client.files.create(file=f, purpose="batch")
+
+        input_file = await resilience.call(upload)
+
+        batch = await resilience.call(lambda: client.batches.create(
+            input_file_id=input_file.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window="24h",
+            metadata={
+                "model": self.runner.model_name,
+                "config": self.runner.config
+            }
+        ))
+
+        logger.info(f"Submitted batch {batch.id} (input file {input_file.id})")
+        return batch.id
+
+    async def wait(self, batch_id: str):
+        """Poll the batch until it reaches a terminal status."""
+        client = self.runner.client
+
+        while True:
+            batch = await self.runner.resilience.call(lambda: client.batches.retrieve(batch_id))
+            counts = batch.request_counts
+            progress = f"{counts.completed}/{counts.total}" if counts else "?"
+            console.print(f"[dim]⏳ Batch {batch_id}: {batch.status} ({progress})[/dim]")
+
+            if batch.status in TERMINAL_STATUSES:
+                return batch
+
+            await asyncio.sleep(self.poll_interval)
+
+    async def download_results(self, batch) -> List[Dict[str, Any]]:
+        """Return parsed output lines (and log the error file, if any)."""
+        client = self.runner.client
+        results = []
+
+        if batch.output_file_id:
+            content = await self.runner.resilience.call(lambda: client.files.content(batch.output_file_id))
+            results = [json.loads(line) for line in content.text.splitlines() if line.strip()]
+
+        if batch.error_file_id:
+            errors = await self.runner.resilience.call(lambda: client.files.content(batch.error_file_id))
+            for line in errors.text.splitlines():
+                if line.strip():
+                    logger.error(f"Batch {batch.id} request failed: {line}")
+
+        return results
+
+    def ingest(self, results: List[Dict[str, Any]]) -> Tuple[int, int]:
+        """Upsert successful results into `respostas` in one statement; returns (saved, failed)."""
+        rows = []
+        failed = 0
+
+        for result in results:
+            response = result.get("response") or {}
+            body = response.get("body") or {}
+
+            if result.get("error") or response.get("status_code") != 200 or not body.get("choices"):
+                failed += 1
+                logger.error(f"Batch result {result.get('custom_id')} failed: {result.get('error') or response}")
+                continue
+
+            content = body["choices"][0]["message"].get("content")
+            if content is None:
+                failed += 1
+                logger.error(f"Batch result {result.get('custom_id')} has no content")
+                continue
+
+            pergunta_id, modelo_id, config = self._parse_custom_id(result["custom_id"])
+            usage = body.get("usage") or {}
+
+            rows.append(resposta_values(pergunta_id, modelo_id, config, {
+                'response': content,
+                # Batch requests have no per-call latency
+                'first_response_time': None,
+                'total_time': None,
+                'finish_reason': body["choices"][0].get("finish_reason"),
+                **usage_values(usage),
+            }))
+
+        if not rows:
+            return 0, failed
+
+        writer = BufferedResultWriter(
+            self.runner.db,
+            overwrite=self.runner.overwrite,
+            flush_size=len(rows) + 1,
+            flush_interval=float("inf")
+        )
+        for values in rows:
+            writer.add(values)
+
+        try:
+            writer.flush()
+        except Exception:
+            logger.error("Failed to ingest batch results")
+            raise
+
+        logger.info(f"Ingested {len(rows)} batch results ({writer.skipped} already in database, {failed} failed)")
+        return writer.written, failed
+
+    async def run_async(self, questions: List[Pergunta], batch_id: Optional[str] = None) -> Tuple[int, int]:
+        """Submit (or resume) a batch, wait for it and ingest the results."""
+        if batch_id is None:
+            path = self.write_batch_file(questions)
+            console.print(f"[green]📝 Arquivo de lote: {path} ({len(questions)} requisições)[/green]")
+
+            if self.runner.dry_run:
+                console.print("[yellow]🔍 Simulação: lote não enviado[/yellow]")
+                return 0, 0
+
+            batch_id = await self.submit(path)
+            console.print(f"[blue]📤 Lote enviado: {batch_id}[/blue]")
+
+        started = time.monotonic()
+        batch = await self.wait(batch_id)
+        console.print(f"[blue]📥 Lote {batch_id} finalizado como '{batch.status}' em {time.monotonic() - started:.0f}s[/blue]")
+
+        results = await self.download_results(batch)
+        return self.ingest(results)
+
+    def run(self, questions: List[Pergunta], batch_id: Optional[str] = None) -> Tuple[int, int]:
+        """Synchronous entry point for the CLI."""
+        return asyncio.run(self.run_async(questions, batch_id))
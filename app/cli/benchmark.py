@@ -0,0 +1,274 @@
+"""End-to-end pipeline benchmark against the mock LLM server"""
+
+import logging
+import os
+import shutil
+import tempfile
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence
+
+import httpx
+from rich.console import Console
+from rich.table import Table
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, joinedload, sessionmaker
+
+from ..database import Base
+from ..evaluation.contextual_evaluator import ContextualEvaluator
+from ..llm.mock_server import MockServerThread, MockSettings
+from ..llm.registry import ModelRegistry, ModelRoute, ProviderConfig
+from ..llm.timing import PERCENTILES, LatencyPercentiles, latency_percentiles, nearest_rank
+from ..models import ModeloLLM, Pergunta, Resposta, TempoExecucao
+from .experiment_runner import ExperimentRunner
+from .sweep import SweepScheduler, get_missing_cells
+
+logger = logging.getLogger(__name__)
+console = Console()
+
+# Scratch model/provider the benchmark writes under; its rows are reset on every run
+BENCHMARK_MODEL = "mock-llm"
+BENCHMARK_PROVIDER = "mock"
+BENCHMARK_KEY_ENV = "MOCK_LLM_API_KEY"
+
+
+@dataclass
+class StageResult:
+    """Throughput, latency and database time of one pipeline stage."""
+    calls: int = 0
+    success: int = 0
+    elapsed: float = 0.0
+    db_time: float = 0.0
+    percentis: Dict[int, Optional[float]] = field(default_factory=dict)  # pct -> ms
+
+    @property
+    def throughput(self) -> float:
+        return self.success / self.elapsed if self.elapsed else 0.0
+
+
+@dataclass
+class BenchmarkReport:
+    experiments: StageResult
+    evaluation: Optional[StageResult]
+    phases: Optional[LatencyPercentiles]
+    server_responses: Dict[str, int]
+    resilience: str
+    writer: str
+
+
+def seed_benchmark_db(db: Session, questions: int) -> ModeloLLM:
+    """Ensure `questions` perguntas and the benchmark model exist, and clear its old rows.
+
+    Existing perguntas (e.g. a copy of the real database) are reused; only the
+    missing numbers are filled with synthetic questions.
+    """
+    existing = {numero for (numero,) in db.query(Pergunta.numero).all()}
+    for numero in range(1, questions + 1):
+        if numero in existing:
+            continue
+        db.add(Pergunta(
+            numero=numero,
+            texto=f"Qual a distância máxima a percorrer até uma saída de emergência no cenário {numero}?",
+            resposta_esperada="30 m para edificações sem chuveiros automáticos",
+            norma_tecnica="NT-11",
+            item="5.5.2",
+            norma_artigo="NT-11 - 5.5.2"
+        ))
+
+    modelo = db.query(ModeloLLM).filter(ModeloLLM.nome == BENCHMARK_MODEL).first()
+    if modelo is None:
+        modelo = ModeloLLM(nome=BENCHMARK_MODEL, descricao="Modelo simulado do benchmark (servidor mock)")
+        db.add(modelo)
+        db.flush()
+
+    db.query(TempoExecucao).filter(TempoExecucao.modelo_id == modelo.id).delete()
+    db.query(Resposta).filter(Resposta.modelo_id == modelo.id).delete()
+    db.commit()
+    return modelo
+
+
+class PipelineBenchmark:
+    """Drives ExperimentRunner and ContextualEvaluator against the stub server.
+
+    The mock runs in-process on a free port unless `url` points at one
+    started with `mock-server`. Results go to `db_url` (a temporary SQLite
+    file by default), so no real API or the experiment database is touched.
+    """
+
+    def __init__(
+        self,
+        settings: Optional[MockSettings] = None,
+        url: Optional[str] = None,
+        db_url: Optional[str] = None,
+        questions: int = 100,
+        configs: Sequence[str] = ("no-rag",),
+        workers: int = 8,
+        stream: bool = True,
+        flush_size: int = 20,
+        flush_interval: float = 2.0,
+        max_retries: int = 3,
+        evaluate: int = 10
+    ):
+        self.settings = settings or MockSettings.from_env()
+        self.url = url.rstrip("/") if url else None
+        self.db_url = db_url
+        self.questions = questions
+        self.configs = list(configs)
+        self.workers = max(1, workers)
+        self.stream = stream
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.evaluate = evaluate
+
+    def run(self) -> BenchmarkReport:
+        workdir = tempfile.mkdtemp(prefix="tcc-benchmark-")
+        server = None if self.url else MockServerThread(self.settings)
+        engine = create_engine(self.db_url or f"sqlite:///{os.path.join(workdir, 'benchmark.db')}")
+        db = sessionmaker(bind=engine, autoflush=False)()
+        try:
+            base_url = self.url or server.start()
+            Base.metadata.create_all(engine)
+            modelo = seed_benchmark_db(db, self.questions)
+
+            os.environ.setdefault(BENCHMARK_KEY_ENV, "mock")
+            provider = ProviderConfig(BENCHMARK_PROVIDER, f"{base_url}/v1", BENCHMARK_KEY_ENV)
+            registry = ModelRegistry(
+                providers={BENCHMARK_PROVIDER: provider},
+                routes={BENCHMARK_MODEL: ModelRoute(BENCHMARK_MODEL, provider, BENCHMARK_MODEL)}
+            )
+            runner = ExperimentRunner(
+                model_name="",
+                config="",
+                delay=0,
+                stream=self.stream,
+                use_cache=False,
+                journal_path=os.path.join(workdir, "journal.jsonl"),
+                flush_size=self.flush_size,
+                flush_interval=self.flush_interval,
+                max_retries=self.max_retries,
+                registry=registry,
+                db=db
+            )
+
+            experiments = self._run_experiments(runner)
+            phases = next(iter(latency_percentiles(db, model_filter=BENCHMARK_MODEL)), None)
+            evaluation = self._run_evaluation(db, modelo, base_url) if self.evaluate else None
+
+            return BenchmarkReport(
+                experiments=experiments,
+                evaluation=evaluation,
+                phases=phases,
+                server_responses=self._server_responses(server, base_url),
+                resilience=runner.describe_resilience(),
+                writer=runner.writer.describe()
+            )
+        finally:
+            db.close()
+            engine.dispose()
+            if server:
+                server.stop()
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    def _run_experiments(self, runner: ExperimentRunner) -> StageResult:
+        cells = get_missing_cells(
+            runner.db,
+            model_names=[BENCHMARK_MODEL],
+            configs=self.configs,
+            max_questions=self.questions
+        )
+        console.print(f"[green]📋 {len(cells)} células contra o servidor simulado[/green]")
+
+        started = time.perf_counter()
+        stats = SweepScheduler(runner, workers=self.workers, per_provider=self.workers, verbose=False).run(cells)
+        elapsed = time.perf_counter() - started
+
+        latencies = [seconds * 1000 for item in stats.values() for seconds in item.latencies]
+        return StageResult(
+            calls=len(cells),
+            success=sum(item.success for item in stats.values()),
+            elapsed=elapsed,
+            db_time=runner.writer.db_time,
+            percentis={pct: nearest_rank(latencies, pct) for pct in PERCENTILES}
+        )
+
+    def _run_evaluation(self, db: Session, modelo: ModeloLLM, base_url: str) -> StageResult:
+        respostas = db.query(Resposta).options(
+            joinedload(Resposta.pergunta), joinedload(Resposta.modelo)
+        ).filter(
+            Resposta.modelo_id == modelo.id
+        ).order_by(Resposta.id).limit(self.evaluate).all()
+        console.print(f"[green]🧠 Avaliando {len(respostas)} respostas com o juiz simulado[/green]")
+
+        evaluator = ContextualEvaluator(
+            overwrite=True,
+            max_retries=self.max_retries,
+            api_key="mock",
+            base_url=base_url,
+            use_cache=False,
+            # The mock has no quota: the 20 RPM Groq bucket would dominate the stage
+            sem_limite=True
+        )
+        started = time.perf_counter()
+        resultados = evaluator.avaliar_respostas_lote(respostas, db, concorrencia=self.workers)
+        elapsed = time.perf_counter() - started
+
+        latencies = [seconds * 1000 for seconds in evaluator.tempos_chamada]
+        return StageResult(
+            calls=len(respostas),
+            success=len(resultados),
+            elapsed=elapsed,
+            db_time=evaluator.tempo_banco,
+            percentis={pct: nearest_rank(latencies, pct) for pct in PERCENTILES}
+        )
+
+    @staticmethod
+    def _server_responses(server: Optional[MockServerThread], base_url: str) -> Dict[str, int]:
+        """Responses per HTTP status as counted by the mock (including injected errors)."""
+        if server:
+            return {str(status): count for status, count in sorted(server.mock.responses.items())}
+        try:
+            return httpx.get(f"{base_url}/mock/stats", timeout=5).json().get("responses", {})
+        except (httpx.HTTPError, ValueError) as e:
+            logger.warning(f"Could not read mock server stats: {e}")
+            return {}
+
+
+def print_benchmark_report(report: BenchmarkReport):
+    """Render the benchmark summary."""
+    table = Table(title="📊 Benchmark do Pipeline")
+    table.add_column("Etapa", style="cyan")
+    table.add_column("Chamadas", style="blue")
+    table.add_column("Sucessos", style="green")
+    table.add_column("Vazão (/s)", style="yellow")
+    for pct in PERCENTILES:
+        table.add_column(f"p{pct} (ms)", style="magenta")
+    table.add_column("Tempo no banco", style="red")
+
+    stages: List[tuple] = [("Experimentos", report.experiments)]
+    if report.evaluation:
+        stages.append(("Avaliação", report.evaluation))
+    for name, stage in stages:
+        table.add_row(
+            name,
+            str(stage.calls),
+            str(stage.success),
+            f"{stage.throughput:.2f}",
+            *[f"{stage.percentis[pct]:.0f}" if stage.percentis.get(pct) is not None else "-" for pct in PERCENTILES],
+            f"{stage.db_time:.2f}s ({stage.db_time / stage.elapsed:.0%})" if stage.elapsed else "-"
+        )
+    console.print(table)
+
+    if report.phases:
+        p95 = {phase: values.get(95) for phase, values in report.phases.percentis.items()}
+        console.print(
+            "[cyan]⏱️ p95 por fase:[/cyan] "
+            + ", ".join(f"{phase} {value:.0f}" for phase, value in p95.items() if value is not None)
+        )
+    if report.server_responses:
+        console.print(
+            "[cyan]🖥️ Respostas do servidor:[/cyan] "
+            + ", ".join(f"{status}: {count}" for status, count in report.server_responses.items())
+        )
+    console.print(f"[cyan]💾 Banco: {report.writer}[/cyan]")
+    console.print(f"[cyan]🔁 Resiliência: {report.resilience}[/cyan]")
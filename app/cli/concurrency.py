@@ -0,0 +1,145 @@
+"""Adaptive (AIMD) concurrency control for experiment API calls"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Deque, Optional, Tuple
+
+from ..llm.timing import nearest_rank
+
+logger = logging.getLogger(__name__)
+
+
+class AdaptiveConcurrencyController:
+    """Additive-increase / multiplicative-decrease limit on in-flight requests.
+
+    The window grows by roughly one slot per window of successful calls and is
+    cut by `decrease_factor` on HTTP 429 or when the recent p95 latency rises
+    above `latency_threshold` times the baseline p95. The baseline follows the
+    best p95 seen, drifts up by `baseline_decay` towards slower recent p95s and
+    is re-learned after a latency cut, so a stale fast baseline cannot pin the
+    window at the minimum. Callers report only real API calls (not cache hits).
+    Usable as an async context manager in place of an `asyncio.Semaphore`.
+    """
+
+    def __init__(
+        self,
+        initial: int = 2,
+        minimum: int = 1,
+        maximum: int = 16,
+        increase: float = 1.0,
+        decrease_factor: float = 0.5,
+        latency_threshold: float = 1.5,
+        latency_samples: int = 20,
+        cooldown: float = 2.0,
+        baseline_decay: float = 0.05
+    ):
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.window = float(min(max(initial, self.minimum), self.maximum))
+        self.increase = increase
+        self.decrease_factor = decrease_factor
+        self.latency_threshold = latency_threshold
+        self.latency_samples = latency_samples
+        self.cooldown = cooldown
+        self.baseline_decay = baseline_decay
+
+        self.in_flight = 0
+        self.last_reason = "inicial"
+        self.changes: Deque[Tuple[float, float, str]] = deque(maxlen=50)
+
+        self._latencies: Deque[float] = deque(maxlen=latency_samples)
+        self._baseline_p95: Optional[float] = None
+        self._paused_until = 0.0
+        self._last_decrease = 0.0
+        self._condition = asyncio.Condition()
+
+    @property
+    def limit(self) -> int:
+        """Current number of requests allowed in flight."""
+        return max(self.minimum, int(self.window))
+
+    async def acquire(self):
+        """Wait for a free slot (and for any Retry-After pause to expire)."""
+        while True:
+            pause = self._paused_until - time.monotonic()
+            if pause > 0:
+                await asyncio.sleep(pause)
+                continue
+
+            async with self._condition:
+                if self.in_flight < self.limit:
+                    self.in_flight += 1
+                    return
+                await self._condition.wait()
+
+    async def release(self):
+        """Free a slot and wake up waiters."""
+        async with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.release()
+
+    def on_success(self, latency: float):
+        """Record a successful call and grow the window additively."""
+        self._latencies.append(latency)
+
+        if len(self._latencies) >= self.latency_samples:
+            p95 = nearest_rank(self._latencies, 95)
+            if self._baseline_p95 is None or p95 < self._baseline_p95:
+                self._baseline_p95 = p95
+            elif p95 > self._baseline_p95 * self.latency_threshold:
+                self._decrease(f"p95 {p95:.1f}s > {self._baseline_p95:.1f}s")
+                # Re-learn from here: a lasting step in latency is penalised once
+                self._baseline_p95 = p95 / self.latency_threshold
+                self._latencies.clear()
+                return
+            else:
+                self._baseline_p95 += (p95 - self._baseline_p95) * self.baseline_decay
+
+        if self.window < self.maximum:
+            self._change(
+                min(self.maximum, self.window + self.increase / self.window),
+                "sucesso",
+                log=False
+            )
+
+    def on_rate_limited(self, retry_after: Optional[float] = None):
+        """Record an HTTP 429 and cut the window multiplicatively."""
+        if retry_after:
+            self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+            self._decrease(f"429 Retry-After {retry_after:.0f}s")
+        else:
+            self._decrease("429")
+
+    def describe(self) -> str:
+        """Short summary for the progress bar."""
+        return f"janela {self.limit} ({self.window:.1f}) · {self.last_reason}"
+
+    def _decrease(self, reason: str):
+        now = time.monotonic()
+        # Several in-flight failures usually report the same overload; react once
+        if now - self._last_decrease < self.cooldown:
+            self.last_reason = reason
+            return
+        self._last_decrease = now
+        self._change(max(float(self.minimum), self.window * self.decrease_factor), reason)
+
+    def _change(self, window: float, reason: str, log: bool = True):
+        previous = self.window
+        self.window = window
+        self.last_reason = reason
+
+        if int(previous) != int(window):
+            self.changes.append((time.time(), window, reason))
+            if log:
+                logger.info(f"Concurrency window {previous:.1f} -> {window:.1f} ({reason})")
+            else:
+                logger.debug(f"Concurrency window {previous:.1f} -> {window:.1f} ({reason})")
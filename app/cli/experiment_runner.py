@@ -2,13 +2,14 @@
 
 import os
 import time
-from typing import List, Optional, Dict, Any
+import asyncio
+from typing import List, Optional, Dict, Any, Tuple
 from decimal import Decimal
 import logging
 from datetime import datetime
 from dotenv import load_dotenv
 
-from openai import OpenAI
+from openai import AsyncOpenAI, RateLimitError
 
 # Load environment variables from .env file
 load_dotenv()
@@ -17,10 +18,21 @@ from rich.progress import Progress, TaskID, SpinnerColumn, TextColumn, BarColumn
 from rich.panel import Panel
 from rich.text import Text
 from sqlalchemy.orm import Session
-from sqlalchemy.exc import IntegrityError
 
 from ..database import get_db, engine
 from ..models import Pergunta, ModeloLLM, Resposta
+from ..llm.cache import ResponseCache, DEFAULT_CACHE_DIR
+from ..llm.cassette import Cassette, EXPERIMENT
+from ..llm.registry import ModelRegistry, ModelRoute, DEFAULT_REGISTRY_PATH
+from ..llm.transport import connection_stats
+from ..llm.timing import CallTimings, current_attempt, current_call, nearest_rank
+from ..llm.usage import usage_values
+from ..llm.resilience import (
+    ResilientCaller, RetryPolicy, get_circuit_breaker, retry_after, status_code
+)
+from .concurrency import AdaptiveConcurrencyController
+from .journal import ResultJournal, DEFAULT_JOURNAL_PATH
+from .result_writer import BufferedResultWriter
 
 # Configure logging
 logging.basicConfig(
@@ -35,6 +47,65 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 console = Console()
 
+# Sampling parameters shared by every experiment call
+MAX_TOKENS = 1000
+TEMPERATURE = 0.1
+
+# Experimental configurations known to the runner
+CONFIGURATIONS = [
+    "no-rag", "simple-rag", "agentic-rag", 
+    "few-shot", "chain-of-thought"
+]
+
+
+def _to_decimal(value: Optional[float]) -> Optional[Decimal]:
+    """Convert an optional float metric to a 2-place Decimal for DECIMAL columns."""
+    if value is None:
+        return None
+    return Decimal(str(round(value, 2)))
+
+
+def resposta_values(
+    pergunta_id: int,
+    modelo_id: int,
+    config: str,
+    api_result: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Column values of a fresh Resposta row for an API result.
+    
+    Evaluation fields are listed explicitly so an upsert with --overwrite
+    resets them, as the old delete + insert did.
+    """
+    values = {
+        'pergunta_id': pergunta_id,
+        'modelo_id': modelo_id,
+        'configuracao': config,
+        'resposta_dada': api_result['response'],
+        'tempo_primeira_resposta': _to_decimal(api_result['first_response_time']),
+        'tempo_total': _to_decimal(api_result['total_time']),
+        'latencia_entre_tokens_media': _to_decimal(api_result.get('itl_mean_ms')),
+        'latencia_entre_tokens_p95': _to_decimal(api_result.get('itl_p95_ms')),
+        'tokens_saida': api_result.get('output_tokens'),
+        'tokens_por_segundo': _to_decimal(api_result.get('tokens_per_second')),
+        'tokens_entrada': api_result.get('input_tokens'),
+        'tokens_raciocinio': api_result.get('reasoning_tokens'),
+        'tokens_cache': api_result.get('cached_tokens'),
+        'motivo_parada': api_result.get('finish_reason'),
+        'resposta_correta': False,  # To be evaluated manually later
+        'fonte_citada': False,  # To be evaluated manually later
+        'clareza': None,
+        'fundamentacao_tecnica': None,
+        'concisao': None,
+        'observacoes': None,
+        'human_annotation': None,
+        'human_annotation_notes': None,
+        'human_annotation_timestamp': None,
+    }
+    
+    # Calculate initial score (will be updated manually later)
+    values['somatorio'] = Resposta(**values).calcular_somatorio()
+    return values
+
 
 class ExperimentRunner:
     """Main class for running automated experiments with LLM models."""
@@ -46,32 +117,75 @@ class ExperimentRunner:
         delay: float = 1.0,
         dry_run: bool = False,
         overwrite: bool = False,
-        init_openai: bool = True
+        init_openai: bool = True,
+        concurrency: int = 1,
+        adaptive: bool = False,
+        max_concurrency: int = 16,
+        stream: bool = True,
+        use_cache: bool = True,
+        cache_dir: str = DEFAULT_CACHE_DIR,
+        cache_max_mb: int = 512,
+        journal_path: str = DEFAULT_JOURNAL_PATH,
+        flush_size: int = 20,
+        flush_interval: float = 2.0,
+        max_retries: int = 3,
+        registry_path: str = DEFAULT_REGISTRY_PATH,
+        registry: Optional[ModelRegistry] = None,
+        db: Optional[Session] = None,
+        cassette: Optional[Cassette] = None
     ):
         self.model_name = model_name
         self.config = config
         self.delay = delay
         self.dry_run = dry_run
         self.overwrite = overwrite
+        self.concurrency = max(1, concurrency)
+        self.adaptive = adaptive
+        self.stream = stream
+        self.max_concurrency = max(self.concurrency, max_concurrency)
+        self.controller: Optional[AdaptiveConcurrencyController] = None
+        
+        # Provider/endpoint/API model for every internal model name
+        self.registry = registry or ModelRegistry.load(registry_path)
+        self.retry_policy = RetryPolicy(max_attempts=max_retries + 1)
+        self._resilience: Dict[str, ResilientCaller] = {}
+        
+        route = self.registry.resolve(model_name) if model_name else None
+        if route and route.max_concurrency and self.concurrency > route.max_concurrency:
+            logger.info(f"Concurrency capped at {route.max_concurrency} by the registry limit for {model_name}")
+            self.concurrency = route.max_concurrency
+        if route and route.max_concurrency:
+            self.max_concurrency = min(self.max_concurrency, route.max_concurrency)
         
-        # Initialize OpenAI-compatible client (supports GitHub Models)
-        self.client = None
+        # Record/replay of API traffic; a cassette run bypasses the response cache
+        self.cassette = cassette
+        
+        # Response cache (only meaningful for real API calls)
+        self.cache: Optional[ResponseCache] = None
+        if use_cache and not dry_run and init_openai and cassette is None:
+            self.cache = ResponseCache(cache_dir, max_bytes=cache_max_mb * 1024 * 1024)
+        
+        # Write-ahead journal so paid results survive a crash before the DB write
+        self.journal: Optional[ResultJournal] = None
         if not dry_run and init_openai:
-            # Check for GitHub Models first, then fallback to OpenAI
-            api_key = os.getenv("LLM_API_KEY") or os.getenv("OPENAI_API_KEY")
-            base_url = os.getenv("LLM_BASE_URL")
-            
-            if not api_key:
-                raise ValueError("LLM_API_KEY or OPENAI_API_KEY environment variable not set")
-            
-            # Initialize client with base_url if provided (for GitHub Models)
-            if base_url:
-                self.client = OpenAI(api_key=api_key, base_url=base_url)
-            else:
-                self.client = OpenAI(api_key=api_key)
+            self.journal = ResultJournal(journal_path)
+        
+        # OpenAI-compatible client of this run's model (a sweep resolves one per model)
+        self.client: Optional[AsyncOpenAI] = None
+        if not self.offline and init_openai and route:
+            self.client = self.registry.client(route.provider)
         
-        # Database session
-        self.db = next(get_db())
+        # Database session (injected by `benchmark`, which runs on a scratch database)
+        self.db = db or next(get_db())
+        
+        # Buffered bulk-upsert writer for results
+        self.writer = BufferedResultWriter(
+            self.db,
+            overwrite=overwrite,
+            flush_size=flush_size,
+            flush_interval=flush_interval,
+            journal=self.journal
+        )
         
         # Get model from database (only if model_name is provided)
         self.modelo_obj = None
@@ -83,6 +197,11 @@ class ExperimentRunner:
             if not self.modelo_obj:
                 raise ValueError(f"Model '{model_name}' not found in database")
     
+    @property
+    def offline(self) -> bool:
+        """No API calls are made: dry run or cassette replay."""
+        return self.dry_run or bool(self.cassette and self.cassette.replaying)
+    
     def get_available_models(self) -> List[ModeloLLM]:
         """Get all available models from database."""
         return self.db.query(ModeloLLM).order_by(ModeloLLM.nome).all()
@@ -97,18 +216,13 @@ class ExperimentRunner:
         models = self.db.query(ModeloLLM).order_by(ModeloLLM.nome).all()
         total_questions = self.db.query(Pergunta).count()
         
-        configurations = [
-            "no-rag", "simple-rag", "agentic-rag", 
-            "few-shot", "chain-of-thought"
-        ]
-        
         status = []
         
         for model in models:
             if model_filter and model.nome != model_filter:
                 continue
                 
-            for config in configurations:
+            for config in CONFIGURATIONS:
                 if config_filter and config != config_filter:
                     continue
                     
@@ -154,15 +268,26 @@ class ExperimentRunner:
         
         return query.all()
     
-    def call_openai_api(self, question_text: str) -> Dict[str, Any]:
-        """Make API call to OpenAI with proper error handling and timing."""
+    async def call_openai_api(
+        self,
+        question_text: str,
+        model_name: Optional[str] = None,
+        config: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Make API call to OpenAI with proper error handling and timing.
+        
+        `model_name` and `config` default to the runner's own; the sweep
+        scheduler passes them explicitly to share one runner across cells.
+        """
+        model_name = model_name or self.model_name
+        config = config or self.config
         
         if self.dry_run:
             # Simulate API call
-            time.sleep(0.1)  # Simulate network delay
+            await asyncio.sleep(0.1)  # Simulate network delay
             
             # Generate more realistic markdown response
-            mock_response = f"""# Resposta - {self.config.replace('-', ' ').title()}
+            mock_response = f"""# Resposta - {config.replace('-', ' ').title()}
 
 ## Análise da Norma Técnica
 
@@ -173,8 +298,8 @@ Com base na pergunta apresentada sobre as **normas técnicas do CBMGO**, posso f
 2. *Procedimentos obrigatórios* para cumprimento da norma
 3. Critérios de `avaliação` e `verificação`
 
-### Configuração utilizada: `{self.config}`
-Esta resposta foi gerada utilizando a configuração **{self.config}**, que {self._get_config_description()}.
+### Configuração utilizada: `{config}`
+Esta resposta foi gerada utilizando a configuração **{config}**, que {self._get_config_description(config)}.
 
 > **Importante**: Esta é uma resposta simulada gerada pelo sistema de testes do CLI.
 
@@ -183,7 +308,7 @@ Esta resposta foi gerada utilizando a configuração **{self.config}**, que {sel
 - [x] Segue as diretrizes estabelecidas
 - [ ] Requer verificação adicional
 
-**Modelo**: {self.model_name}  
+**Modelo**: {model_name}  
 **Status**: ✅ Simulação concluída
 
 ---
@@ -196,9 +321,9 @@ Esta resposta foi gerada utilizando a configuração **{self.config}**, que {sel
             }
         
         # Real API call
-        return self._call_real_api(question_text)
+        return await self._call_real_api(question_text, model_name, config)
     
-    def _get_config_description(self):
+    def _get_config_description(self, config: Optional[str] = None):
         """Get description for configuration used in mock responses."""
         descriptions = {
             "no-rag": "utiliza apenas o conhecimento pré-treinado do modelo",
@@ -207,93 +332,288 @@ Esta resposta foi gerada utilizando a configuração **{self.config}**, que {sel
             "few-shot": "aprende através de exemplos fornecidos",
             "chain-of-thought": "estrutura o raciocínio passo a passo"
         }
-        return descriptions.get(self.config, "utiliza configuração personalizada")
+        return descriptions.get(config or self.config, "utiliza configuração personalizada")
     
-    def _call_real_api(self, question_text: str) -> Dict[str, Any]:
-        """Make real API call for non-dry-run mode."""
-        start_time = time.time()
-        first_response_time = None
+    def resolve_api_model(self, model_name: str) -> str:
+        """Map an internal model name to the API model name of its provider."""
+        return self.registry.resolve(model_name).api_model
+    
+    def route(self, model_name: str) -> ModelRoute:
+        """Registry route (provider, endpoint, API model, limits) of a model."""
+        return self.registry.resolve(model_name)
+    
+    def client_for(self, model_name: str) -> AsyncOpenAI:
+        """The shared client of the model's provider."""
+        return self.registry.client(self.route(model_name).provider)
+    
+    def resilience_for(self, model_name: str) -> ResilientCaller:
+        """Retry policy plus the endpoint's circuit breaker, one per provider."""
+        provider = self.route(model_name).provider
+        if provider.name not in self._resilience:
+            self._resilience[provider.name] = ResilientCaller(
+                get_circuit_breaker(provider.host),
+                self.retry_policy
+            )
+        return self._resilience[provider.name]
+    
+    @property
+    def resilience(self) -> ResilientCaller:
+        """Resilience of this run's model."""
+        return self.resilience_for(self.model_name)
+    
+    def describe_resilience(self) -> str:
+        return "; ".join(caller.describe() for caller in self._resilience.values()) or "nenhuma chamada"
+    
+    def provider_key(self, model_name: str) -> str:
+        """Rate-limit domain for a model: backend host plus resolved API model.
         
+        Providers enforce quotas per API model, so a slow model (e.g.
+        deepseek-reasoner) gets its own queue in a sweep.
+        """
+        return self.route(model_name).key
+    
+    async def _call_real_api(
+        self,
+        question_text: str,
+        model_name: Optional[str] = None,
+        config: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Make real API call for non-dry-run mode."""
         try:
             # Prepare messages based on configuration
-            messages = self._prepare_messages(question_text)
+            messages = self._prepare_messages(question_text, config)
             
-            # Map internal model names to API names based on base_url
-            base_url = os.getenv("LLM_BASE_URL", "")
+            model_name = model_name or self.model_name
+            api_model_name = self.resolve_api_model(model_name)
+            client = None if self.offline else self.client_for(model_name)
+            resilience = self.resilience_for(model_name)
             
-            if "deepseek" in base_url:
-                # DeepSeek API mapping
-                api_model_map = {
-                    "deepseek-r1": "deepseek-reasoner",
-                    "deepseek-v3": "deepseek-chat",
-                    "claude-opus-4": "deepseek-chat",  # Fallback para testes
-                    "gemini-2.5-pro": "deepseek-chat",  # Fallback para testes
-                    "gemini-2.5-flash": "deepseek-chat",  # Fallback para testes
-                    "openai/gpt-4.0": "deepseek-chat",  # Fallback para testes
-                    "openai/gpt-4.1": "deepseek-chat",  # Fallback para testes
-                    "openai/o3": "deepseek-reasoner",  # Fallback para testes
-                }
-            elif "github" in base_url:
-                # GitHub Models mapping (publisher/model format)
-                api_model_map = {
-                    "openai/gpt-4.0": "OpenAI/gpt-4o",
-                    "openai/gpt-4.1": "OpenAI/gpt-4o",
-                    "openai/o3": "OpenAI/o1-preview",
-                    "gemini-2.5-pro": "OpenAI/gpt-4o",  # Fallback para testes
-                    "gemini-2.5-flash": "OpenAI/gpt-4o-mini",  # Fallback para testes
-                }
-            else:
-                # OpenAI direct mapping
-                api_model_map = {
-                    "openai/gpt-4.0": "gpt-4o",
-                    "openai/gpt-4.1": "gpt-4o",
-                    "openai/o3": "o1-preview",
-                    "gemini-2.5-pro": "gpt-4o",  # Fallback para testes
-                    "gemini-2.5-flash": "gpt-4o-mini",  # Fallback para testes
-                }
+            def request():
+                return resilience.call(
+                    lambda: self._timed_attempt(client, api_model_name, messages),
+                    on_retry=self._on_retry
+                )
             
-            # Use mapped model name or original if not in map
-            api_model_name = api_model_map.get(self.model_name, self.model_name)
+            if not self.cache:
+                return await request()
             
-            response = self.client.chat.completions.create(
+            # Internal names that map to the same API model share cache entries
+            key = ResponseCache.make_key(
                 model=api_model_name,
                 messages=messages,
-                max_tokens=1000,
-                temperature=0.1,
-                stream=False
+                temperature=TEMPERATURE,
+                max_tokens=MAX_TOKENS
             )
+            api_result, from_cache = await self.cache.get_or_call(key, request)
+            if from_cache:
+                api_result = {**api_result, 'cached': True}
+            return api_result
             
-            if first_response_time is None:
-                first_response_time = time.time() - start_time
-            
-            total_time = time.time() - start_time
+        except Exception as e:
+            logger.error(f"API call failed: {e}")
+            raise
+    
+    def _on_retry(self, error: BaseException, attempt: int, wait: float):
+        """Feed throttling seen between retries to the adaptive window."""
+        if status_code(error) == 429 and self.controller:
+            self.controller.on_rate_limited(retry_after(error))
+        console.print(f"[dim]🔁 Retentativa {attempt} em {wait:.1f}s: {error}[/dim]")
+    
+    async def _timed_attempt(
+        self,
+        client: AsyncOpenAI,
+        api_model_name: str,
+        messages: List[Dict[str, str]]
+    ) -> Dict[str, Any]:
+        """One API attempt, recorded in the current call's phase timings."""
+        timings = current_call.get()
+        if timings is None:
+            return await self._request_completion(client, api_model_name, messages)
+        
+        attempt = timings.start_attempt()
+        token = current_attempt.set(attempt)
+        try:
+            result = await self._request_completion(client, api_model_name, messages)
+        except Exception as e:
+            timings.finish_attempt(attempt, error=e)
+            raise
+        finally:
+            current_attempt.reset(token)
+        timings.finish_attempt(attempt, result)
+        return result
+    
+    async def call_timed(
+        self,
+        question_text: str,
+        model_name: Optional[str] = None,
+        config: Optional[str] = None,
+        timings: Optional[CallTimings] = None
+    ) -> Dict[str, Any]:
+        """`call_openai_api`, recording every attempt (retries included) in `timings`."""
+        token = current_call.set(timings)
+        try:
+            return await self.call_openai_api(question_text, model_name=model_name, config=config)
+        finally:
+            current_call.reset(token)
+    
+    async def _request_completion(
+        self,
+        client: AsyncOpenAI,
+        api_model_name: str,
+        messages: List[Dict[str, str]]
+    ) -> Dict[str, Any]:
+        """Send one chat completion request (streamed or not) and time it."""
+        if self.cassette:
+            key = Cassette.make_key(
+                EXPERIMENT,
+                model=api_model_name,
+                messages=messages,
+                temperature=TEMPERATURE,
+                max_tokens=MAX_TOKENS
+            )
+            if self.cassette.replaying:
+                return await self.cassette.replay_async(EXPERIMENT, key)
+        
+        start_time = time.perf_counter()
+        result = await self._send_completion(client, api_model_name, messages, start_time)
+        
+        if self.cassette:
+            self.cassette.record(
+                EXPERIMENT,
+                key,
+                {"model": api_model_name, "messages": messages},
+                result,
+                time.perf_counter() - start_time
+            )
+        return result
+    
+    async def _send_completion(
+        self,
+        client: AsyncOpenAI,
+        api_model_name: str,
+        messages: List[Dict[str, str]],
+        start_time: float
+    ) -> Dict[str, Any]:
+        if self.stream:
+            return await self._call_streaming_api(client, api_model_name, messages, start_time)
+        
+        response = await client.chat.completions.create(
+            model=api_model_name,
+            messages=messages,
+            max_tokens=MAX_TOKENS,
+            temperature=TEMPERATURE,
+            stream=False
+        )
+        
+        total_time = time.perf_counter() - start_time
+        
+        logger.debug(f"API Response: {response}")
+        
+        # Check if response has choices
+        if not response.choices or len(response.choices) == 0:
+            raise ValueError("API response has no choices")
+        
+        # Check if message content exists
+        message_content = response.choices[0].message.content
+        if message_content is None:
+            raise ValueError("API response message content is None")
             
-            # Debug logging
-            logger.info(f"API Response: {response}")
+        response_text = message_content
+        
+        # Time to first token is not observable without streaming
+        return {
+            'response': response_text,
+            'first_response_time': None,
+            'total_time': total_time,
+            'finish_reason': response.choices[0].finish_reason,
+            **usage_values(response.usage)
+        }
+    
+    async def _call_streaming_api(
+        self,
+        client: AsyncOpenAI,
+        api_model_name: str,
+        messages: List[Dict[str, str]],
+        start_time: float
+    ) -> Dict[str, Any]:
+        """Stream the completion, timing the first token and the gaps between tokens."""
+        first_response_time = None
+        token_times: List[float] = []
+        parts: List[str] = []
+        usage = None
+        finish_reason = None
+        
+        stream = await client.chat.completions.create(
+            model=api_model_name,
+            messages=messages,
+            max_tokens=MAX_TOKENS,
+            temperature=TEMPERATURE,
+            stream=True,
+            stream_options={"include_usage": True}
+        )
+        
+        async for chunk in stream:
+            now = time.perf_counter()
             
-            # Check if response has choices
-            if not response.choices or len(response.choices) == 0:
-                raise ValueError("API response has no choices")
+            # With include_usage the last chunk carries usage and no choices
+            if getattr(chunk, "usage", None):
+                usage = chunk.usage
+            if not chunk.choices:
+                continue
+            if chunk.choices[0].finish_reason:
+                finish_reason = chunk.choices[0].finish_reason
             
-            # Check if message content exists
-            message_content = response.choices[0].message.content
-            if message_content is None:
-                raise ValueError("API response message content is None")
-                
-            response_text = message_content
+            delta = chunk.choices[0].delta
+            # deepseek-reasoner streams reasoning_content before the answer
+            reasoning = getattr(delta, "reasoning_content", None)
+            if not delta.content and not reasoning:
+                continue
             
-            return {
-                'response': response_text,
-                'first_response_time': first_response_time,
-                'total_time': total_time
-            }
+            if first_response_time is None:
+                first_response_time = now - start_time
+            token_times.append(now)
             
-        except Exception as e:
-            logger.error(f"API call failed: {e}")
-            raise
+            if delta.content:
+                parts.append(delta.content)
+        
+        total_time = time.perf_counter() - start_time
+        
+        if not parts:
+            raise ValueError("API stream returned no content")
+        
+        # Inter-token latency between consecutive content chunks
+        gaps_ms = [(later - earlier) * 1000 for earlier, later in zip(token_times, token_times[1:])]
+        token_usage = usage_values(usage)
+        output_tokens = token_usage.get('output_tokens') or len(token_times)
+        
+        # Decode rate: tokens after the first over the time after the first
+        generation_time = total_time - first_response_time
+        tokens_per_second = (output_tokens - 1) / generation_time if generation_time > 0 and output_tokens > 1 else None
+        
+        logger.info(
+            f"Streamed {output_tokens} tokens from {api_model_name}: "
+            f"TTFT {first_response_time:.2f}s, total {total_time:.2f}s"
+        )
+        
+        return {
+            'response': "".join(parts),
+            'first_response_time': first_response_time,
+            'total_time': total_time,
+            'itl_mean_ms': sum(gaps_ms) / len(gaps_ms) if gaps_ms else None,
+            'itl_p95_ms': nearest_rank(gaps_ms, 95),
+            **token_usage,
+            'output_tokens': output_tokens,
+            'tokens_per_second': tokens_per_second,
+            'finish_reason': finish_reason
+        }
     
-    def _prepare_messages(self, question_text: str) -> List[Dict[str, str]]:
+    def _prepare_messages(
+        self,
+        question_text: str,
+        config: Optional[str] = None
+    ) -> List[Dict[str, str]]:
         """Prepare messages based on configuration."""
+        config = config or self.config
         
         system_prompts = {
             "no-rag": "Você é um especialista em normas técnicas do CBMGO. Responda com base apenas no seu conhecimento.",
@@ -303,7 +623,7 @@ Esta resposta foi gerada utilizando a configuração **{self.config}**, que {sel
             "chain-of-thought": "Você é um especialista em normas técnicas do CBMGO. Pense passo a passo antes de responder."
         }
         
-        system_prompt = system_prompts.get(self.config, "Você é um especialista em normas técnicas do CBMGO.")
+        system_prompt = system_prompts.get(config, "Você é um especialista em normas técnicas do CBMGO.")
         
         messages = [
             {"role": "system", "content": system_prompt},
@@ -311,9 +631,9 @@ Esta resposta foi gerada utilizando a configuração **{self.config}**, que {sel
         ]
         
         # Add configuration-specific modifications
-        if self.config == "chain-of-thought":
+        if config == "chain-of-thought":
             messages[1]["content"] += "\n\nPense passo a passo antes de responder."
-        elif self.config == "few-shot":
+        elif config == "few-shot":
             # In a real implementation, you would add examples here
             messages[1]["content"] = f"Com base nos exemplos de normas técnicas, responda: {question_text}"
         
@@ -322,56 +642,85 @@ Esta resposta foi gerada utilizando a configuração **{self.config}**, que {sel
     def save_response(
         self, 
         pergunta: Pergunta, 
-        api_result: Dict[str, Any]
-    ) -> Optional[Resposta]:
-        """Save experiment response to database."""
+        api_result: Dict[str, Any],
+        modelo: Optional[ModeloLLM] = None,
+        config: Optional[str] = None,
+        timings: Optional[CallTimings] = None,
+        job_id: Optional[int] = None
+    ) -> bool:
+        """Journal an experiment response and queue it for the buffered writer.
+        
+        Returns True when the row was queued; it reaches the database on the
+        next flush (see `flush_results`), together with its attempt timings
+        and, for a work-queue cell, the cell's completion.
+        """
+        modelo = modelo or self.modelo_obj
+        config = config or self.config
         
         if self.dry_run:
             console.print(f"[dim]  💾 [Simulado] Salvaria resposta para pergunta #{pergunta.numero}[/dim]")
-            return None
+            return False
         
-        try:
-            resposta = Resposta(
-                pergunta_id=pergunta.id,
-                modelo_id=self.modelo_obj.id,
-                configuracao=self.config,
-                resposta_dada=api_result['response'],
-                tempo_primeira_resposta=Decimal(str(api_result['first_response_time'])),
-                tempo_total=Decimal(str(api_result['total_time'])),
-                resposta_correta=False,  # To be evaluated manually later
-                fonte_citada=False,  # To be evaluated manually later
-            )
-            
-            # Calculate initial score (will be updated manually later)
-            resposta.calcular_somatorio()
-            
-            if self.overwrite:
-                # Check if exists and delete
-                existing = self.db.query(Resposta).filter(
-                    Resposta.pergunta_id == pergunta.id,
-                    Resposta.modelo_id == self.modelo_obj.id,
-                    Resposta.configuracao == self.config
-                ).first()
-                
-                if existing:
-                    self.db.delete(existing)
-                    self.db.commit()
-            
-            self.db.add(resposta)
-            self.db.commit()
-            self.db.refresh(resposta)
-            
-            logger.info(f"Saved response for question {pergunta.numero} with model {self.model_name} config {self.config}")
-            return resposta
-            
-        except IntegrityError as e:
-            self.db.rollback()
-            logger.warning(f"Response already exists for question {pergunta.numero}: {e}")
-            return None
-        except Exception as e:
-            self.db.rollback()
-            logger.error(f"Failed to save response: {e}")
-            raise
+        journal_key = None
+        if self.journal:
+            journal_key = self.journal.record_result(pergunta.id, modelo.id, config, api_result)
+        
+        self.writer.add(
+            resposta_values(pergunta.id, modelo.id, config, api_result),
+            journal_key,
+            timings=self._timing_rows(pergunta, modelo, config, timings),
+            job_id=job_id
+        )
+        
+        logger.info(f"Queued response for question {pergunta.numero} with model {modelo.nome} config {config}")
+        return True
+    
+    def save_failed_timings(
+        self,
+        pergunta: Pergunta,
+        timings: Optional[CallTimings],
+        modelo: Optional[ModeloLLM] = None,
+        config: Optional[str] = None
+    ):
+        """Queue the attempt timings of a call that produced no response."""
+        if self.dry_run:
+            return
+        rows = self._timing_rows(pergunta, modelo or self.modelo_obj, config or self.config, timings)
+        if rows:
+            self.writer.add_timings(rows)
+    
+    def _timing_rows(
+        self,
+        pergunta: Pergunta,
+        modelo: ModeloLLM,
+        config: str,
+        timings: Optional[CallTimings]
+    ) -> List[Dict[str, Any]]:
+        """`tempos_execucao` rows for the attempts of one call (none when served from cache)."""
+        if timings is None:
+            return []
+        return [
+            {'pergunta_id': pergunta.id, 'modelo_id': modelo.id, 'configuracao': config, **row}
+            for row in timings.rows()
+        ]
+    
+    def flush_results(self, compact_journal: bool = False):
+        """Write any buffered results to the database.
+
+        With `compact_journal` (end of a run), a clean flush also drops the
+        committed entries from the journal so it does not grow forever.
+        """
+        if self.writer and len(self.writer):
+            try:
+                self.writer.flush()
+            except Exception as e:
+                console.print(f"[red]❌ Falha ao gravar resultados: {e} (use 'resume')[/red]")
+                return
+        if compact_journal and self.journal:
+            try:
+                self.journal.compact()
+            except OSError as e:
+                logger.warning(f"Failed to compact journal {self.journal.path}: {e}")
     
     def run(
         self, 
@@ -388,10 +737,66 @@ Esta resposta foi gerada utilizando a configuração **{self.config}**, que {sel
         
         console.print(f"[green]📋 Encontradas {len(questions)} perguntas para processar[/green]")
         
-        if not self.dry_run:
+        if not self.offline:
             console.print("[yellow]⚠️  ATENÇÃO: Esta execução fará chamadas reais para a API do OpenAI![/yellow]")
             console.print(f"[blue]💰 Custo estimado: Variável conforme modelo {self.model_name}[/blue]")
         
+        try:
+            success_count, error_count = asyncio.run(self._run_async(questions))
+        finally:
+            self.flush_results(compact_journal=True)
+        
+        # Summary
+        total_processed = success_count + error_count
+        console.print("\n" + "="*50)
+        console.print(f"[bold]📊 Resumo da Execução[/bold]")
+        console.print(f"[green]✅ Sucessos: {success_count}[/green]")
+        console.print(f"[red]❌ Erros: {error_count}[/red]")
+        console.print(f"[blue]📈 Total processado: {total_processed}/{len(questions)}[/blue]")
+        console.print(f"[cyan]⚙️ Configuração: {self.config}[/cyan]")
+        console.print(f"[cyan]🤖 Modelo: {self.model_name}[/cyan]")
+        if self.controller:
+            console.print(
+                f"[cyan]🔀 Concorrência adaptativa: janela final {self.controller.limit} "
+                f"({len(self.controller.changes)} ajustes, último: {self.controller.last_reason})[/cyan]"
+            )
+        else:
+            console.print(f"[cyan]🔀 Concorrência: {self.concurrency}[/cyan]")
+        if self.cache:
+            console.print(f"[cyan]🗄️ Cache: {self.cache.describe()}[/cyan]")
+        if self.cassette:
+            console.print(f"[cyan]📼 Cassete: {self.cassette.describe()}[/cyan]")
+        if not self.dry_run:
+            console.print(f"[cyan]💾 Banco: {self.writer.describe()}[/cyan]")
+        if not self.dry_run:
+            console.print(f"[cyan]🔁 Resiliência: {self.describe_resilience()}[/cyan]")
+            logger.info(f"Resilience: {self.describe_resilience()}")
+        for provider, stats in connection_stats().items():
+            console.print(f"[cyan]🔌 Conexões ({provider}): {stats.describe()}[/cyan]")
+            logger.info(f"HTTP connections ({provider}): {stats.describe()}")
+        
+        if self.journal:
+            pending = len(self.journal.pending())
+            if pending:
+                console.print(f"[yellow]📒 {pending} resultados no journal ainda não salvos; use o comando 'resume'[/yellow]")
+        
+        if not self.dry_run:
+            console.print(f"\n[dim]📝 Log detalhado salvo em: experiment_runs.log[/dim]")
+    
+    async def _run_async(self, questions: List[Pergunta]) -> Tuple[int, int]:
+        """Process questions keeping up to `self.concurrency` API calls in flight."""
+        
+        if self.adaptive:
+            # AIMD window starts at --concurrency and replaces the fixed delay
+            self.controller = AdaptiveConcurrencyController(
+                initial=self.concurrency,
+                maximum=self.max_concurrency
+            )
+            limiter = self.controller
+        else:
+            limiter = asyncio.Semaphore(self.concurrency)
+        counts = {'success': 0, 'error': 0}
+        
         # Progress tracking
         with Progress(
             SpinnerColumn(),
@@ -399,68 +804,88 @@ Esta resposta foi gerada utilizando a configuração **{self.config}**, que {sel
             BarColumn(),
             TextColumn("[progress.percentage]{task.percentage:>3.0f}%"),
             TimeElapsedColumn(),
+            TextColumn("[dim]{task.fields[controle]}[/dim]"),
             console=console,
             transient=False
         ) as progress:
             
             task = progress.add_task(
                 f"🔄 Processando perguntas [{self.config}]",
-                total=len(questions)
+                total=len(questions),
+                controle=self.controller.describe() if self.controller else ""
             )
             
-            success_count = 0
-            error_count = 0
+            workers = [
+                asyncio.create_task(
+                    self._process_question(pergunta, limiter, progress, task, counts)
+                )
+                for pergunta in questions
+            ]
             
-            for i, pergunta in enumerate(questions, 1):
+            try:
+                await asyncio.gather(*workers)
+            except asyncio.CancelledError:
+                # Ctrl-C: asyncio.run cancels the main task; stop pending questions
+                for worker in workers:
+                    worker.cancel()
+                await asyncio.gather(*workers, return_exceptions=True)
+                console.print(f"\n[yellow]⚠️ Interrompido pelo usuário[/yellow]")
+        
+        return counts['success'], counts['error']
+    
+    async def _process_question(
+        self,
+        pergunta: Pergunta,
+        limiter,
+        progress: Progress,
+        task: TaskID,
+        counts: Dict[str, int]
+    ):
+        """Call the API for one question and persist the result."""
+        timings = CallTimings()
+        
+        async with limiter:
+            try:
+                progress.update(
+                    task, 
+                    description=f"🔄 Pergunta #{pergunta.numero} [{self.config}]"
+                )
                 
-                try:
-                    progress.update(
-                        task, 
-                        description=f"🔄 Pergunta #{pergunta.numero} [{self.config}]"
-                    )
-                    
-                    # Make API call
-                    api_result = self.call_openai_api(pergunta.texto)
-                    
-                    # Save response
-                    resposta = self.save_response(pergunta, api_result)
-                    
-                    if resposta or self.dry_run:
-                        success_count += 1
-                        console.print(
-                            f"[green]✅ #{pergunta.numero}[/green] "
-                            f"[dim]({api_result['total_time']:.2f}s)[/dim]"
-                        )
-                    else:
-                        console.print(f"[yellow]⚠️ #{pergunta.numero} (já existe)[/yellow]")
-                    
-                    # Delay between requests
-                    if i < len(questions):  # Don't delay after last question
-                        time.sleep(self.delay)
-                    
-                except KeyboardInterrupt:
-                    console.print(f"\n[yellow]⚠️ Interrompido pelo usuário na pergunta #{pergunta.numero}[/yellow]")
-                    break
-                except Exception as e:
-                    error_count += 1
-                    console.print(f"[red]❌ #{pergunta.numero}: {e}[/red]")
-                    logger.error(f"Error processing question {pergunta.numero}: {e}")
-                    
-                    # Continue with next question after error
-                    if i < len(questions):
-                        time.sleep(self.delay)
+                # Make API call
+                call_start = time.monotonic()
+                api_result = await self.call_timed(pergunta.texto, timings=timings)
+                # Cache hits and coalesced calls say nothing about provider latency
+                if self.controller and not api_result.get('cached'):
+                    self.controller.on_success(time.monotonic() - call_start)
+                
+                # Queue response (session is only touched from the event loop thread)
+                self.save_response(pergunta, api_result, timings=timings)
                 
+                counts['success'] += 1
+                cached_str = " cache" if api_result.get('cached') else ""
+                console.print(
+                    f"[green]✅ #{pergunta.numero}[/green] "
+                    f"[dim]({api_result['total_time']:.2f}s{cached_str})[/dim]"
+                )
+                
+            except RateLimitError as e:
+                counts['error'] += 1
+                self.save_failed_timings(pergunta, timings)
+                if self.controller:
+                    self.controller.on_rate_limited(retry_after(e))
+                console.print(f"[red]❌ #{pergunta.numero}: 429 rate limit[/red]")
+                logger.error(f"Rate limited on question {pergunta.numero}: {e}")
+            except Exception as e:
+                counts['error'] += 1
+                self.save_failed_timings(pergunta, timings)
+                console.print(f"[red]❌ #{pergunta.numero}: {e}[/red]")
+                logger.error(f"Error processing question {pergunta.numero}: {e}")
+            
+            finally:
+                if self.controller:
+                    progress.update(task, controle=self.controller.describe())
                 progress.advance(task)
-        
-        # Summary
-        total_processed = success_count + error_count
-        console.print("\n" + "="*50)
-        console.print(f"[bold]📊 Resumo da Execução[/bold]")
-        console.print(f"[green]✅ Sucessos: {success_count}[/green]")
-        console.print(f"[red]❌ Erros: {error_count}[/red]")
-        console.print(f"[blue]📈 Total processado: {total_processed}/{len(questions)}[/blue]")
-        console.print(f"[cyan]⚙️ Configuração: {self.config}[/cyan]")
-        console.print(f"[cyan]🤖 Modelo: {self.model_name}[/cyan]")
-        
-        if not self.dry_run:
-            console.print(f"\n[dim]📝 Log detalhado salvo em: experiment_runs.log[/dim]")
\ No newline at end of file
+            
+            # Delay between requests on this slot (the adaptive window paces itself)
+            if not self.controller:
+                await asyncio.sleep(self.delay)
@@ -0,0 +1,176 @@
+"""Crash-safe write-ahead journal for experiment results"""
+
+import json
+import logging
+import os
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Tuple
+
+from sqlalchemy.orm import Session
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, so don't share a journal between processes
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_JOURNAL_PATH = os.getenv("EXPERIMENT_JOURNAL", "experiment_journal.jsonl")
+
+
+def result_key(pergunta_id: int, modelo_id: int, config: str) -> str:
+    """Journal key of a (pergunta, modelo, configuracao) cell."""
+    return f"{pergunta_id}|{modelo_id}|{config}"
+
+
+class ResultJournal:
+    """Append-only JSONL log of API results, fsync'd before the DB write.
+
+    Every completed call is appended as a `result` line; once the row is in
+    `respostas` a `commit` line marks it persisted. Results without a commit
+    marker are exactly the paid calls a crash, network blip or Ctrl-C would
+    otherwise lose, and `replay_pending` writes them to the database.
+
+    Several processes (run-experiments, run-sweep, resume) may share one
+    journal: appends and `compact` hold an exclusive lock on a sidecar
+    `.lock` file, so a compaction never drops lines another process is
+    appending.
+    """
+
+    def __init__(self, path: str = DEFAULT_JOURNAL_PATH):
+        self.path = Path(path)
+        self.lock_path = self.path.with_name(self.path.name + ".lock")
+
+    @contextmanager
+    def _locked(self):
+        """Exclusive lock shared by every process using this journal."""
+        if fcntl is None:
+            yield
+            return
+        # The journal itself is replaced on compaction, so lock a file that stays put
+        with open(self.lock_path, "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _append(self, entry: Dict[str, Any]):
+        line = json.dumps(entry, ensure_ascii=False, default=str) + "\n"
+        with self._locked(), open(self.path, "a", encoding="utf-8") as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def record_result(
+        self,
+        pergunta_id: int,
+        modelo_id: int,
+        config: str,
+        api_result: Dict[str, Any]
+    ) -> str:
+        """Durably append an API result; returns its journal key."""
+        key = result_key(pergunta_id, modelo_id, config)
+        self._append({
+            "type": "result",
+            "key": key,
+            "pergunta_id": pergunta_id,
+            "modelo_id": modelo_id,
+            "configuracao": config,
+            "result": api_result,
+            "timestamp": datetime.now().isoformat()
+        })
+        return key
+
+    def record_committed(self, keys: Iterable[str]):
+        """Mark results as persisted in `respostas`."""
+        keys = list(keys)
+        if keys:
+            self._append({"type": "commit", "keys": keys})
+
+    def pending(self) -> List[Dict[str, Any]]:
+        """Results without a later commit marker (latest result per key)."""
+        if not self.path.exists():
+            return []
+
+        pending: Dict[str, Dict[str, Any]] = {}
+        with open(self.path, encoding="utf-8") as f:
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # A crash mid-append can leave a truncated last line
+                    logger.warning(f"Skipping unreadable journal line {line_number} in {self.path}")
+                    continue
+
+                if entry.get("type") == "result":
+                    pending[entry["key"]] = entry
+                elif entry.get("type") == "commit":
+                    for key in entry.get("keys", []):
+                        pending.pop(key, None)
+
+        return list(pending.values())
+
+    def compact(self):
+        """Rewrite the journal keeping only pending results."""
+        if not self.path.exists():
+            return
+        with self._locked():
+            pending = self.pending()
+            fd, tmp_path = tempfile.mkstemp(dir=self.path.parent or ".", suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                for entry in pending:
+                    f.write(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+
+
+def replay_pending(
+    db: Session,
+    journal: ResultJournal,
+    overwrite: bool = False
+) -> Tuple[int, int]:
+    """Upsert un-persisted journal results into `respostas` in one statement.
+
+    Cells that already have a row are skipped (the crash may have happened
+    after the DB commit but before the marker) unless `overwrite`. Returns
+    (inserted, skipped).
+    """
+    # Imported here: experiment_runner imports this module
+    from .experiment_runner import resposta_values
+    from .result_writer import BufferedResultWriter
+
+    entries = journal.pending()
+    if not entries:
+        return 0, 0
+
+    # Never auto-flush: the whole replay is one statement and errors must surface
+    writer = BufferedResultWriter(
+        db,
+        overwrite=overwrite,
+        flush_size=len(entries) + 1,
+        flush_interval=float("inf"),
+        journal=journal
+    )
+    for entry in entries:
+        writer.add(
+            resposta_values(entry["pergunta_id"], entry["modelo_id"], entry["configuracao"], entry["result"]),
+            entry["key"]
+        )
+
+    try:
+        writer.flush()
+    except Exception:
+        logger.error(f"Failed to replay journal {journal.path}")
+        raise
+
+    journal.compact()
+
+    logger.info(f"Replayed {writer.written} journal results ({writer.skipped} already in database)")
+    return writer.written, writer.skipped
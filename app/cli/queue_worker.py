@@ -0,0 +1,225 @@
+"""Worker process that runs experiment cells claimed from the database queue"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, Optional, Sequence, Set
+
+from rich.console import Console
+from rich.markup import escape
+from rich.progress import Progress, SpinnerColumn, TextColumn, TimeElapsedColumn
+
+from ..llm.timing import CallTimings
+from ..models import Pergunta, ModeloLLM
+from .experiment_runner import ExperimentRunner
+from .sweep import SweepCell
+from .work_queue import FAILED, WorkQueue
+
+logger = logging.getLogger(__name__)
+console = Console()
+
+
+@dataclass
+class QueuedCell(SweepCell):
+    """A sweep cell leased from `tarefas_experimento`."""
+    job_id: int = 0
+    claimed_at: float = 0.0
+
+
+@dataclass
+class WorkerStats:
+    """Counters for one worker process."""
+    claimed: int = 0
+    success: int = 0
+    retried: int = 0
+    failed: int = 0
+    released: int = 0
+    elapsed: float = 0.0
+
+
+class QueueWorker:
+    """Claims cells from the shared queue and runs them through the runner.
+
+    Cells are claimed in batches of `batch_size` and served by `concurrency`
+    slots, with at most `per_provider` (or the registry's `max_concurrency`)
+    calls in flight per provider. Leases of held cells are renewed every
+    third of the lease period until the writer commits their results; cells
+    still held at shutdown are released. Buffered results are flushed on the
+    writer's interval, before each claim and before idling, so finished
+    cells never wait on a quiet queue. Without `follow` the worker exits
+    once nothing is claimable.
+    """
+
+    def __init__(
+        self,
+        runner: ExperimentRunner,
+        queue: WorkQueue,
+        concurrency: int = 8,
+        per_provider: int = 4,
+        batch_size: Optional[int] = None,
+        model_ids: Optional[Sequence[int]] = None,
+        configs: Optional[Sequence[str]] = None,
+        follow: bool = False,
+        poll_interval: float = 10.0
+    ):
+        self.runner = runner
+        self.queue = queue
+        self.concurrency = max(1, concurrency)
+        self.per_provider = max(1, per_provider)
+        self.batch_size = batch_size or self.concurrency
+        self.model_ids = model_ids
+        self.configs = configs
+        self.follow = follow
+        self.poll_interval = poll_interval
+
+        self.stats = WorkerStats()
+        self._pending: Deque[QueuedCell] = deque()
+        # Leased by this worker and not yet committed by the writer or failed
+        self._held: Set[int] = set()
+        self.runner.writer.on_jobs_committed = self._held.difference_update
+        self._limits: Dict[str, asyncio.Semaphore] = {}
+        self._claim_lock: Optional[asyncio.Lock] = None
+
+    def run(self) -> WorkerStats:
+        started = time.monotonic()
+        try:
+            asyncio.run(self._run_async())
+        finally:
+            self.runner.flush_results(compact_journal=True)
+            # Unstarted, interrupted and dry-run cells go back to the queue
+            self.stats.released += self.queue.release(sorted(self._held))
+            self.stats.elapsed = time.monotonic() - started
+        return self.stats
+
+    async def _run_async(self):
+        self._claim_lock = asyncio.Lock()
+        renewer = asyncio.create_task(self._renew_leases())
+        flusher = asyncio.create_task(self._flush_results())
+
+        with Progress(
+            SpinnerColumn(),
+            TextColumn("[progress.description]{task.description}"),
+            TextColumn("{task.completed} células"),
+            TimeElapsedColumn(),
+            console=console,
+            transient=False
+        ) as progress:
+            task = progress.add_task(f"🔄 Worker {self.queue.worker_id}", total=None)
+            slots = [
+                asyncio.create_task(self._slot(progress, task))
+                for _ in range(self.concurrency)
+            ]
+            try:
+                await asyncio.gather(*slots)
+            except asyncio.CancelledError:
+                for slot in slots:
+                    slot.cancel()
+                await asyncio.gather(*slots, return_exceptions=True)
+                console.print(f"\n[yellow]⚠️ Worker interrompido; células em andamento voltam para a fila[/yellow]")
+            finally:
+                renewer.cancel()
+                flusher.cancel()
+
+    async def _next(self) -> Optional[QueuedCell]:
+        """Next leased cell, claiming a new batch when the local buffer is empty."""
+        async with self._claim_lock:
+            if not self._pending:
+                # Commit finished cells before taking more work
+                self.runner.flush_results()
+                rows = self.queue.claim(self.batch_size, self.model_ids, self.configs)
+                for job_id, pergunta_id, modelo_id, config in rows:
+                    self._pending.append(QueuedCell(
+                        pergunta=self.runner.db.get(Pergunta, pergunta_id),
+                        modelo=self.runner.db.get(ModeloLLM, modelo_id),
+                        config=config,
+                        job_id=job_id,
+                        claimed_at=time.perf_counter()
+                    ))
+                    self._held.add(job_id)
+                self.stats.claimed += len(rows)
+            return self._pending.popleft() if self._pending else None
+
+    async def _slot(self, progress: Progress, task):
+        while True:
+            cell = await self._next()
+            if cell is None:
+                if not self.follow:
+                    return
+                self.runner.flush_results()
+                await asyncio.sleep(self.poll_interval)
+                continue
+
+            try:
+                async with self._limit(cell.modelo.nome):
+                    await self._process_cell(cell)
+            finally:
+                progress.advance(task)
+
+    def _limit(self, model_name: str) -> asyncio.Semaphore:
+        route = self.runner.route(model_name)
+        if route.key not in self._limits:
+            if not self.runner.offline:
+                # A missing API key fails on the first cell of the provider
+                self.runner.client_for(model_name)
+            self._limits[route.key] = asyncio.Semaphore(
+                min(self.per_provider, route.max_concurrency or self.per_provider)
+            )
+        return self._limits[route.key]
+
+    async def _flush_results(self):
+        """Flush buffered results on the writer's interval, also while no cell finishes."""
+        while True:
+            await asyncio.sleep(max(0.1, self.runner.writer.flush_interval))
+            self.runner.flush_results()
+
+    async def _renew_leases(self):
+        interval = max(1.0, self.queue.lease_seconds / 3)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                self.queue.renew(sorted(self._held))
+            except Exception as e:
+                logger.error(f"Failed to renew leases: {e}")
+
+    async def _process_cell(self, cell: QueuedCell):
+        label = escape(f"#{cell.pergunta.numero} {cell.modelo.nome} [{cell.config}]")
+        # Queue wait runs from the claim, so it includes the provider limit
+        timings = CallTimings(queued_at=cell.claimed_at)
+        try:
+            api_result = await self.runner.call_timed(
+                cell.pergunta.texto,
+                model_name=cell.modelo.nome,
+                config=cell.config,
+                timings=timings
+            )
+
+            # Marked done by the writer in the same commit as the response;
+            # the lease stays held (and renewed) until that commit
+            self.runner.save_response(
+                cell.pergunta,
+                api_result,
+                modelo=cell.modelo,
+                config=cell.config,
+                timings=timings,
+                job_id=cell.job_id
+            )
+
+            self.stats.success += 1
+            cached_str = " cache" if api_result.get('cached') else ""
+            console.print(f"[green]✅ {label}[/green] [dim]({api_result['total_time']:.2f}s{cached_str})[/dim]")
+
+        except Exception as e:
+            self.runner.save_failed_timings(cell.pergunta, timings, modelo=cell.modelo, config=cell.config)
+            status = self.queue.fail(cell.job_id, str(e))
+            self._held.discard(cell.job_id)
+            if status is None:
+                console.print(f"[yellow]⚠️ {label}: {e} (célula já reassumida por outro worker)[/yellow]")
+            elif status == FAILED:
+                self.stats.failed += 1
+                console.print(f"[red]❌ {label}: {e} (desistindo)[/red]")
+            else:
+                self.stats.retried += 1
+                console.print(f"[yellow]⚠️ {label}: {e} (volta para a fila)[/yellow]")
+            logger.error(f"Error processing queued cell {label}: {e}")
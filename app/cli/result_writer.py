@@ -0,0 +1,171 @@
+"""Buffered bulk-upsert writer for experiment results"""
+
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from ..models import Resposta, TempoExecucao
+from .work_queue import complete_jobs
+
+logger = logging.getLogger(__name__)
+
+CONFLICT_COLUMNS = ["pergunta_id", "modelo_id", "configuracao"]
+
+
+class BufferedResultWriter:
+    """Collects result rows and writes each batch with a single upsert.
+
+    A flush is one `INSERT ... ON CONFLICT (pergunta_id, modelo_id,
+    configuracao)` against `unique_resposta_config` plus one commit: with
+    `overwrite` the existing row is replaced (`DO UPDATE`), otherwise it is
+    kept (`DO NOTHING`), matching the old delete/insert and IntegrityError
+    behaviour of `save_response`. Journal keys are marked committed after
+    each successful flush.
+
+    Per-attempt timing rows (`tempos_execucao`) ride along in the same
+    transaction; rows of saved results get the upsert's duration as their
+    DB-write phase. So do work-queue completions: a queued cell is marked
+    done in the commit that stores its response, and `on_jobs_committed`
+    receives the ids of the cells completed by each successful flush.
+    """
+
+    def __init__(
+        self,
+        db: Session,
+        overwrite: bool = False,
+        flush_size: int = 20,
+        flush_interval: float = 2.0,
+        journal=None
+    ):
+        self.db = db
+        self.overwrite = overwrite
+        self.flush_size = max(1, flush_size)
+        self.flush_interval = flush_interval
+        self.journal = journal
+        # Called with the work-queue job ids each successful flush completed
+        self.on_jobs_committed: Optional[Callable[[List[int]], None]] = None
+
+        self.written = 0
+        self.skipped = 0
+        self.flushes = 0
+        self.db_time = 0.0
+
+        self._buffer: List[Tuple[Dict[str, Any], Optional[str], Optional[int]]] = []
+        self._timings: List[Tuple[Dict[str, Any], bool]] = []
+        self._last_flush = time.monotonic()
+
+    def add(
+        self,
+        values: Dict[str, Any],
+        journal_key: Optional[str] = None,
+        timings: Optional[List[Dict[str, Any]]] = None,
+        job_id: Optional[int] = None
+    ):
+        """Queue one row; flushes when the batch is full or the interval elapsed."""
+        self._buffer.append((values, journal_key, job_id))
+        # The successful attempt gets the upsert duration at flush time
+        self._timings.extend((timing, timing["sucesso"]) for timing in timings or [])
+
+        if (
+            len(self._buffer) >= self.flush_size
+            or time.monotonic() - self._last_flush >= self.flush_interval
+        ):
+            try:
+                self.flush()
+            except Exception:
+                # Already logged; the failed rows remain pending in the journal
+                pass
+
+    def add_timings(self, timings: List[Dict[str, Any]]):
+        """Queue timing rows of a call that produced no result (written on the next flush)."""
+        self._timings.extend((timing, False) for timing in timings)
+
+    def __len__(self) -> int:
+        return len(self._buffer) + len(self._timings)
+
+    def _insert(self):
+        if self.db.bind.dialect.name == "sqlite":
+            return sqlite.insert(Resposta)
+        return postgresql.insert(Resposta)
+
+    def flush(self) -> int:
+        """Write buffered rows in one statement; returns rows inserted/updated."""
+        self._last_flush = time.monotonic()
+        if not self._buffer and not self._timings:
+            return 0
+
+        batch = self._buffer
+        timings = self._timings
+        self._buffer = []
+        self._timings = []
+        rows = [values for values, _, _ in batch]
+        job_ids = [job_id for _, _, job_id in batch if job_id is not None]
+
+        started = time.perf_counter()
+        try:
+            affected = self._upsert(rows) if rows else 0
+            if timings:
+                write_ms = round((time.perf_counter() - started) * 1000, 3)
+                self.db.execute(TempoExecucao.__table__.insert(), [
+                    {**timing, "gravacao_banco_ms": write_ms if saved else None}
+                    for timing, saved in timings
+                ])
+            if job_ids:
+                self.db.execute(complete_jobs(job_ids))
+            self.db.commit()
+        except Exception as e:
+            self.db.rollback()
+            # Rows stay in the journal for `resume`
+            logger.error(f"Failed to flush {len(rows)} results: {e}")
+            raise
+        finally:
+            self.db_time += time.perf_counter() - started
+
+        self.written += affected
+        self.skipped += len(rows) - affected
+        self.flushes += 1
+
+        if self.journal:
+            self.journal.record_committed([key for _, key, _ in batch if key])
+        if job_ids and self.on_jobs_committed:
+            self.on_jobs_committed(job_ids)
+
+        logger.info(
+            f"Flushed {len(rows)} results ({affected} written) and {len(timings)} timings "
+            f"in {time.perf_counter() - started:.3f}s"
+        )
+        return affected
+
+    def _upsert(self, rows: List[Dict[str, Any]]) -> int:
+        """Run the batch upsert (no commit); returns rows inserted/updated."""
+        stmt = self._insert().values(rows)
+        conflict_target = (
+            {"constraint": "unique_resposta_config"}
+            if self.db.bind.dialect.name == "postgresql"
+            else {"index_elements": CONFLICT_COLUMNS}
+        )
+
+        if self.overwrite:
+            updated_columns = {
+                key: stmt.excluded[key]
+                for key in rows[0]
+                if key not in CONFLICT_COLUMNS
+            }
+            updated_columns["updated_at"] = func.now()
+            stmt = stmt.on_conflict_do_update(set_=updated_columns, **conflict_target)
+        else:
+            stmt = stmt.on_conflict_do_nothing(**conflict_target)
+
+        result = self.db.execute(stmt)
+        return result.rowcount if result.rowcount is not None and result.rowcount >= 0 else len(rows)
+
+    def describe(self) -> str:
+        """Short summary for run reports."""
+        return (
+            f"{self.written} gravadas, {self.skipped} já existentes, "
+            f"{self.flushes} flushes, {self.db_time:.2f}s no banco"
+        )
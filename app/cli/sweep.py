@@ -0,0 +1,289 @@
+"""Matrix sweep scheduler: many models x configs in one process"""
+
+import asyncio
+import logging
+import time
+from collections import defaultdict, deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, List, Optional, Sequence
+
+from rich.console import Console
+from rich.markup import escape
+from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, TimeElapsedColumn
+from rich.table import Table
+from sqlalchemy import String, and_, literal, select, true, union_all
+from sqlalchemy.orm import Session
+
+from ..llm.timing import CallTimings
+from ..models import Pergunta, ModeloLLM, Resposta
+from .experiment_runner import ExperimentRunner
+
+logger = logging.getLogger(__name__)
+console = Console()
+
+
+@dataclass
+class SweepCell:
+    """One missing (pergunta, modelo, configuracao) cell of the experiment matrix."""
+    pergunta: Pergunta
+    modelo: ModeloLLM
+    config: str
+
+
+@dataclass
+class ProviderStats:
+    """Per-provider counters for the sweep summary."""
+    total: int = 0
+    success: int = 0
+    error: int = 0
+    stolen: int = 0
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    latencies: List[float] = field(default_factory=list)
+
+
+def get_missing_cells(
+    db: Session,
+    model_names: Optional[Sequence[str]],
+    configs: Sequence[str],
+    max_questions: Optional[int] = None,
+    start_from: int = 1,
+    overwrite: bool = False
+) -> List[SweepCell]:
+    """Build the sweep work set with a single query.
+
+    Crosses perguntas x modelos_llm x configs and, unless `overwrite`, keeps
+    only cells without a row in `respostas`.
+    """
+    # Configs are not a table: cross join a UNION ALL of literals
+    config_values = union_all(*[
+        select(literal(config, String).label("configuracao"))
+        for config in configs
+    ]).subquery("sweep_configs")
+
+    query = db.query(Pergunta, ModeloLLM, config_values.c.configuracao).select_from(
+        Pergunta
+    ).join(
+        ModeloLLM, true()
+    ).join(
+        config_values, true()
+    ).outerjoin(
+        Resposta,
+        and_(
+            Resposta.pergunta_id == Pergunta.id,
+            Resposta.modelo_id == ModeloLLM.id,
+            Resposta.configuracao == config_values.c.configuracao
+        )
+    ).filter(Pergunta.numero >= start_from)
+
+    if model_names:
+        query = query.filter(ModeloLLM.nome.in_(model_names))
+
+    if max_questions:
+        query = query.filter(Pergunta.numero < start_from + max_questions)
+
+    if not overwrite:
+        query = query.filter(Resposta.id.is_(None))
+
+    query = query.order_by(Pergunta.numero, ModeloLLM.nome, config_values.c.configuracao)
+
+    return [SweepCell(pergunta, modelo, config) for pergunta, modelo, config in query.all()]
+
+
+class SweepScheduler:
+    """Schedules sweep cells over per-provider queues with work stealing.
+
+    Each worker owns a home queue; when it is empty (or its provider is at
+    `per_provider` in-flight calls, or the model's registry `max_concurrency`)
+    the worker steals from the longest queue whose provider still has a free
+    slot. A slow provider therefore only ever holds its own slots and never
+    idles workers that could serve others. Each model is called through its
+    own provider's client, so a mixed sweep talks to several backends at once.
+    """
+
+    def __init__(
+        self,
+        runner: ExperimentRunner,
+        workers: int = 8,
+        per_provider: int = 4,
+        verbose: bool = True
+    ):
+        self.runner = runner
+        self.workers = max(1, workers)
+        self.per_provider = max(1, per_provider)
+        # Print a line per successful cell (failures are always printed)
+        self.verbose = verbose
+
+        self.queues: Dict[str, Deque[SweepCell]] = {}
+        self.in_flight: Dict[str, int] = defaultdict(int)
+        self.limits: Dict[str, int] = {}
+        self.stats: Dict[str, ProviderStats] = {}
+        self._condition: Optional[asyncio.Condition] = None
+        self._started = 0.0
+
+    def run(self, cells: List[SweepCell]) -> Dict[str, ProviderStats]:
+        """Run all cells and return per-provider stats."""
+        if not cells:
+            return {}
+
+        self.queues = {}
+        self.limits = {}
+        for cell in cells:
+            route = self.runner.route(cell.modelo.nome)
+            if route.key not in self.queues:
+                self.limits[route.key] = min(self.per_provider, route.max_concurrency or self.per_provider)
+                if not self.runner.offline:
+                    # Build every provider's client up front: a missing API key fails here
+                    self.runner.client_for(cell.modelo.nome)
+            self.queues.setdefault(route.key, deque()).append(cell)
+
+        self.stats = {key: ProviderStats(total=len(queue)) for key, queue in self.queues.items()}
+
+        try:
+            asyncio.run(self._run_async())
+        finally:
+            self.runner.flush_results(compact_journal=True)
+        return self.stats
+
+    async def _run_async(self):
+        self._condition = asyncio.Condition()
+        self._started = time.perf_counter()
+        keys = list(self.queues)
+
+        with Progress(
+            SpinnerColumn(),
+            TextColumn("[progress.description]{task.description}"),
+            BarColumn(),
+            TextColumn("{task.completed}/{task.total}"),
+            TimeElapsedColumn(),
+            console=console,
+            transient=False
+        ) as progress:
+
+            tasks = {
+                key: progress.add_task(f"🔄 {key}", total=len(queue))
+                for key, queue in self.queues.items()
+            }
+
+            workers = [
+                asyncio.create_task(self._worker(keys[i % len(keys)], progress, tasks))
+                for i in range(self.workers)
+            ]
+
+            try:
+                await asyncio.gather(*workers)
+            except asyncio.CancelledError:
+                for worker in workers:
+                    worker.cancel()
+                await asyncio.gather(*workers, return_exceptions=True)
+                console.print(f"\n[yellow]⚠️ Sweep interrompido pelo usuário[/yellow]")
+
+    def _pick(self, home: str) -> Optional[str]:
+        """Choose the queue to serve next: home first, otherwise steal."""
+        if self.queues[home] and self.in_flight[home] < self.limits[home]:
+            return home
+
+        candidates = [
+            key for key, queue in self.queues.items()
+            if queue and self.in_flight[key] < self.limits[key]
+        ]
+        if not candidates:
+            return None
+        return max(candidates, key=lambda key: len(self.queues[key]))
+
+    async def _worker(self, home: str, progress: Progress, tasks: Dict[str, int]):
+        while True:
+            async with self._condition:
+                while True:
+                    key = self._pick(home)
+                    if key is not None:
+                        break
+                    if not any(self.queues.values()):
+                        return
+                    # Every provider with pending work is at its limit
+                    await self._condition.wait()
+
+                cell = self.queues[key].popleft()
+                self.in_flight[key] += 1
+
+            stats = self.stats[key]
+            if key != home:
+                stats.stolen += 1
+            if stats.started_at is None:
+                stats.started_at = time.monotonic()
+
+            try:
+                await self._process_cell(cell, stats)
+            finally:
+                stats.finished_at = time.monotonic()
+                progress.advance(tasks[key])
+                async with self._condition:
+                    self.in_flight[key] -= 1
+                    self._condition.notify_all()
+
+    async def _process_cell(self, cell: SweepCell, stats: ProviderStats):
+        label = escape(f"#{cell.pergunta.numero} {cell.modelo.nome} [{cell.config}]")
+        # Every cell is queued when the sweep starts
+        timings = CallTimings(queued_at=self._started)
+        try:
+            call_start = time.monotonic()
+            api_result = await self.runner.call_timed(
+                cell.pergunta.texto,
+                model_name=cell.modelo.nome,
+                config=cell.config,
+                timings=timings
+            )
+            stats.latencies.append(time.monotonic() - call_start)
+
+            self.runner.save_response(
+                cell.pergunta,
+                api_result,
+                modelo=cell.modelo,
+                config=cell.config,
+                timings=timings
+            )
+
+            stats.success += 1
+            if not self.verbose:
+                return
+            cached_str = " cache" if api_result.get('cached') else ""
+            console.print(f"[green]✅ {label}[/green] [dim]({api_result['total_time']:.2f}s{cached_str})[/dim]")
+
+        except Exception as e:
+            stats.error += 1
+            self.runner.save_failed_timings(cell.pergunta, timings, modelo=cell.modelo, config=cell.config)
+            console.print(f"[red]❌ {label}: {e}[/red]")
+            logger.error(f"Error processing sweep cell {label}: {e}")
+
+
+def print_sweep_summary(stats: Dict[str, ProviderStats], elapsed: float):
+    """Render the per-provider sweep summary table."""
+    table = Table(title="Resumo do Sweep por Provedor")
+    table.add_column("Provedor", style="cyan")
+    table.add_column("Células", style="blue")
+    table.add_column("Sucessos", style="green")
+    table.add_column("Erros", style="red")
+    table.add_column("Roubadas", style="yellow")
+    table.add_column("Duração", style="magenta")
+
+    for key, item in sorted(stats.items()):
+        duration = (
+            item.finished_at - item.started_at
+            if item.started_at is not None and item.finished_at is not None else 0.0
+        )
+        table.add_row(
+            key,
+            str(item.total),
+            str(item.success),
+            str(item.error),
+            str(item.stolen),
+            f"{duration:.1f}s"
+        )
+
+    console.print(table)
+    slowest = max(
+        (item.finished_at - item.started_at for item in stats.values()
+         if item.started_at is not None and item.finished_at is not None),
+        default=0.0
+    )
+    console.print(f"[blue]⏱️ Tempo total: {elapsed:.1f}s (provedor mais lento: {slowest:.1f}s)[/blue]")
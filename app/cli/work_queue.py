@@ -0,0 +1,254 @@
+"""Lease-based job queue in the database, shared by runner processes/hosts"""
+
+import logging
+import os
+import socket
+from datetime import timedelta
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, case, func, or_, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from ..models import ModeloLLM, TarefaExperimento
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pendente"
+RUNNING = "em_execucao"
+DONE = "concluida"
+FAILED = "falhou"
+
+ENQUEUE_CHUNK = 500
+
+
+def default_worker_id() -> str:
+    """`host:pid`, unique per worker process."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def complete_jobs(job_ids: Sequence[int]):
+    """UPDATE marking jobs done; executed by the result writer in its flush transaction."""
+    return update(TarefaExperimento).where(
+        TarefaExperimento.id.in_(job_ids)
+    ).values(
+        status=DONE,
+        lease_ate=None,
+        erro=None,
+        updated_at=func.now()
+    )
+
+
+class WorkQueue:
+    """Experiment cells in `tarefas_experimento`, claimed under a lease.
+
+    `claim` picks claimable rows with `SELECT ... FOR UPDATE SKIP LOCKED` and
+    marks them `em_execucao` with a lease in the same statement, so concurrent
+    workers never receive the same cell. A worker that crashes stops renewing
+    its leases; once `lease_ate` passes, its cells are claimable again. Cells
+    are completed by the result writer in the transaction that stores the
+    response, so a cell is done exactly when its result is in `respostas`.
+
+    All timestamps come from the database clock, so hosts with skewed clocks
+    agree on lease expiry. SQLite has no row locks but serialises writers,
+    which keeps claims exclusive for local testing.
+    """
+
+    def __init__(
+        self,
+        db: Session,
+        worker_id: Optional[str] = None,
+        lease_seconds: float = 300.0,
+        max_attempts: int = 3,
+        retry_delay: float = 30.0
+    ):
+        self.db = db
+        self.worker_id = worker_id or default_worker_id()
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max(1, max_attempts)
+        self.retry_delay = retry_delay
+
+    @property
+    def _sqlite(self) -> bool:
+        return self.db.bind.dialect.name == "sqlite"
+
+    def _now(self):
+        return func.datetime("now") if self._sqlite else func.now()
+
+    def _after(self, seconds: float):
+        """Database time `seconds` from now."""
+        if self._sqlite:
+            return func.datetime("now", f"+{int(seconds)} seconds")
+        return func.now() + timedelta(seconds=seconds)
+
+    def enqueue(self, cells: Sequence[Tuple[int, int, str]], requeue: bool = False) -> int:
+        """Add (pergunta_id, modelo_id, configuracao) cells; returns rows inserted or reset.
+
+        Cells already queued are left alone unless `requeue`, which resets
+        them to pending (e.g. to redo cells with `--overwrite`).
+        """
+        table = TarefaExperimento.__table__
+        insert = sqlite.insert(table) if self._sqlite else postgresql.insert(table)
+        conflict_target = (
+            {"index_elements": ["pergunta_id", "modelo_id", "configuracao"]}
+            if self._sqlite else {"constraint": "unique_tarefa_config"}
+        )
+
+        affected = 0
+        for start in range(0, len(cells), ENQUEUE_CHUNK):
+            rows = [
+                {
+                    "pergunta_id": pergunta_id,
+                    "modelo_id": modelo_id,
+                    "configuracao": config,
+                    "status": PENDING,
+                    "tentativas": 0,
+                }
+                for pergunta_id, modelo_id, config in cells[start:start + ENQUEUE_CHUNK]
+            ]
+            stmt = insert.values(rows)
+            if requeue:
+                stmt = stmt.on_conflict_do_update(
+                    set_={
+                        "status": PENDING,
+                        "tentativas": 0,
+                        "worker": None,
+                        "lease_ate": None,
+                        "erro": None,
+                        "updated_at": func.now(),
+                    },
+                    **conflict_target
+                )
+            else:
+                stmt = stmt.on_conflict_do_nothing(**conflict_target)
+            result = self.db.execute(stmt)
+            affected += result.rowcount if result.rowcount is not None and result.rowcount >= 0 else len(rows)
+        self.db.commit()
+
+        logger.info(f"Enqueued {affected} of {len(cells)} cells")
+        return affected
+
+    def claim(
+        self,
+        limit: int,
+        model_ids: Optional[Sequence[int]] = None,
+        configs: Optional[Sequence[str]] = None
+    ) -> List[Tuple[int, int, int, str]]:
+        """Lease up to `limit` cells: [(job_id, pergunta_id, modelo_id, configuracao)]."""
+        job = TarefaExperimento
+        candidates = select(job.id).where(
+            job.status.in_([PENDING, RUNNING]),
+            or_(job.lease_ate.is_(None), job.lease_ate < self._now())
+        )
+        if model_ids:
+            candidates = candidates.where(job.modelo_id.in_(model_ids))
+        if configs:
+            candidates = candidates.where(job.configuracao.in_(configs))
+        candidates = candidates.order_by(job.id).limit(limit).with_for_update(skip_locked=True).cte("candidatas")
+
+        stmt = update(job).where(job.id == candidates.c.id).values(
+            status=RUNNING,
+            worker=self.worker_id,
+            lease_ate=self._after(self.lease_seconds),
+            updated_at=func.now()
+        ).returning(job.id, job.pergunta_id, job.modelo_id, job.configuracao)
+
+        try:
+            rows = [tuple(row) for row in self.db.execute(stmt).all()]
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+
+        if rows:
+            logger.info(f"Worker {self.worker_id} claimed {len(rows)} cells")
+        return sorted(rows)
+
+    def renew(self, job_ids: Sequence[int]) -> int:
+        """Extend the lease of cells this worker still holds."""
+        if not job_ids:
+            return 0
+        job = TarefaExperimento
+        result = self.db.execute(
+            update(job).where(
+                job.id.in_(job_ids),
+                job.status == RUNNING,
+                job.worker == self.worker_id
+            ).values(lease_ate=self._after(self.lease_seconds))
+        )
+        self.db.commit()
+        return result.rowcount
+
+    def fail(self, job_id: int, error: str) -> Optional[str]:
+        """Record a failed run; the cell is retried after a delay or marked failed.
+
+        Returns the new status, or None when this worker no longer holds the
+        cell (its lease expired and another worker claimed it).
+        """
+        job = TarefaExperimento
+        exhausted = job.tentativas + 1 >= self.max_attempts
+        stmt = update(job).where(
+            job.id == job_id,
+            job.status == RUNNING,
+            job.worker == self.worker_id
+        ).values(
+            tentativas=job.tentativas + 1,
+            status=case((exhausted, FAILED), else_=PENDING),
+            erro=error[:2000],
+            # A retried cell is not claimable again before the delay
+            lease_ate=case((exhausted, None), else_=self._after(self.retry_delay)),
+            updated_at=func.now()
+        ).returning(job.status)
+        try:
+            status = self.db.execute(stmt).scalar_one_or_none()
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        return status
+
+    def release(self, job_ids: Sequence[int]) -> int:
+        """Hand unprocessed cells back to the queue (shutdown, dry-run)."""
+        if not job_ids:
+            return 0
+        job = TarefaExperimento
+        result = self.db.execute(
+            update(job).where(
+                job.id.in_(job_ids),
+                job.status == RUNNING,
+                job.worker == self.worker_id
+            ).values(status=PENDING, lease_ate=None, updated_at=func.now())
+        )
+        self.db.commit()
+        return result.rowcount
+
+    def counts(
+        self,
+        model_names: Optional[Sequence[str]] = None,
+        configs: Optional[Sequence[str]] = None
+    ) -> Dict[Tuple[str, str], Dict[str, int]]:
+        """Cells per status for each (modelo, configuracao); expired leases count as `expirada`."""
+        job = TarefaExperimento
+        expired = and_(job.status == RUNNING, job.lease_ate < self._now())
+
+        query = self.db.query(
+            ModeloLLM.nome,
+            job.configuracao,
+            job.status,
+            func.count(job.id),
+            func.sum(case((expired, 1), else_=0))
+        ).join(ModeloLLM, ModeloLLM.id == job.modelo_id)
+        if model_names:
+            query = query.filter(ModeloLLM.nome.in_(model_names))
+        if configs:
+            query = query.filter(job.configuracao.in_(configs))
+
+        result: Dict[Tuple[str, str], Dict[str, int]] = {}
+        for nome, config, item_status, total, expired_count in query.group_by(
+            ModeloLLM.nome, job.configuracao, job.status
+        ).all():
+            row = result.setdefault((nome, config), {})
+            row[item_status] = total
+            if expired_count:
+                row["expirada"] = row.get("expirada", 0) + int(expired_count)
+        return result
@@ -0,0 +1,193 @@
+"""Detector determinístico de citações de norma técnica e item nas respostas"""
+
+import logging
+import re
+import time
+import unicodedata
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from ..models import ModeloLLM, Pergunta, Resposta
+
+logger = logging.getLogger(__name__)
+
+# "NT-09", "NT 09/2014", "NT9", "N.T. nº 09", "Norma Técnica 09", "NT-09-CBMGO"
+_NORMA = re.compile(
+    r"\b(?:n\.?\s?t\.?|norma\s+tecnica)\s*(?:n\.?\s*[o°º]\.?\s*)?[-:]?\s*0*(\d{1,3})(?:\s*/\s*\d{2,4})?(?!\d)",
+    re.IGNORECASE
+)
+
+# "item 6.7.3", "subitem 6.7.3.1", "itens 4.9 e 4.10", "art. 12", "seção 5.2", "§ 3"
+_ITEM = re.compile(
+    r"\b(?:sub)?(?:itens?|artigos?|art\.|secao|capitulo|paragrafo)\s*(?:n\.?\s*[o°º]\.?\s*)?(\d+(?:\.\d+)*)"
+    r"|§+\s*(\d+(?:\.\d+)*)",
+    re.IGNORECASE
+)
+
+# Item logo após a norma: "NT-09 - 6.7.3", "NT 09, 4.9"
+_NORMA_ITEM = re.compile(_NORMA.pattern + r"\s*(?:[-,:]|\bitem\b)?\s*(\d+(?:\.\d+)+)(?!\d)", re.IGNORECASE)
+
+# Número solto com três ou mais níveis ("6.7.3"); com menos, pode ser só um valor decimal
+_ITEM_SOLTO = re.compile(r"(?<![\d.])(\d+(?:\.\d+){2,})(?![\d.]*\d)")
+
+_NUMERO = re.compile(r"\d+(?:\.\d+)*")
+
+# Traços tipográficos ("NT–09") viram hífen; NFKD já converte barras e espaços largos
+_TRACOS = str.maketrans("–—‐‑", "----")
+
+
+def normalizar(texto: str) -> str:
+    """Minúsculas, sem acentos, com traços tipográficos trocados por hífen."""
+    texto = unicodedata.normalize("NFKD", texto)
+    texto = "".join(c for c in texto if not unicodedata.combining(c))
+    return texto.translate(_TRACOS).lower()
+
+
+def numero_norma(norma_tecnica: str) -> Optional[int]:
+    """Número de "NT-09", "NT09" ou "NT 09/2014" (None se não for uma NT numerada)."""
+    encontrada = _NORMA.search(normalizar(norma_tecnica))
+    return int(encontrada.group(1)) if encontrada else None
+
+
+def numero_item(item: str) -> Optional[str]:
+    """Número do item ("6.7.3" em "6.7.3 c)"); None para itens sem número, como "Anexo A"."""
+    encontrado = _NUMERO.search(item or "")
+    return encontrado.group(0) if encontrado else None
+
+
+@dataclass(frozen=True)
+class DeteccaoCitacao:
+    """Normas e itens citados numa resposta, comparados com os da pergunta."""
+    normas: FrozenSet[int]
+    itens: FrozenSet[str]
+    norma_mencionada: bool
+    item_mencionado: bool
+
+    @property
+    def fonte_citada(self) -> bool:
+        """Cita a norma E o item corretos (mesma regra da rubrica do juiz)."""
+        return self.norma_mencionada and self.item_mencionado
+
+    def descrever(self) -> str:
+        """Resumo para o prompt do juiz."""
+        def sim_nao(valor: bool) -> str:
+            return "sim" if valor else "não"
+        return (
+            f"norma_mencionada={sim_nao(self.norma_mencionada)}, "
+            f"item_mencionado={sim_nao(self.item_mencionado)}, "
+            f"fonte_citada={sim_nao(self.fonte_citada)}"
+        )
+
+
+def extrair_citacoes(texto: str) -> Tuple[FrozenSet[int], FrozenSet[str]]:
+    """Números das NTs e dos itens citados em `texto`."""
+    texto = normalizar(texto or "")
+    normas = {int(numero) for numero in _NORMA.findall(texto)}
+    itens = {a or b for a, b in _ITEM.findall(texto)}
+    itens.update(encontrado.group(2) for encontrado in _NORMA_ITEM.finditer(texto))
+    itens.update(_ITEM_SOLTO.findall(texto))
+    return frozenset(normas), frozenset(itens)
+
+
+def detectar_citacoes(texto: Optional[str], norma_tecnica: str, item: str) -> DeteccaoCitacao:
+    """Compara as citações de `texto` com a norma e o item esperados.
+
+    Um subitem do item esperado ("6.7.3.1" para "6.7.3") também conta como
+    citação do item. Normas e itens sem número caem numa busca textual.
+    """
+    normas, itens = extrair_citacoes(texto)
+    normalizado = normalizar(texto or "")
+
+    esperada = numero_norma(norma_tecnica)
+    if esperada is not None:
+        norma_mencionada = esperada in normas
+    else:
+        norma_mencionada = bool(norma_tecnica) and normalizar(norma_tecnica) in normalizado
+
+    esperado = numero_item(item)
+    if esperado is not None:
+        item_mencionado = any(citado == esperado or citado.startswith(esperado + ".") for citado in itens)
+    else:
+        item_mencionado = bool(item) and normalizar(item).strip() in normalizado
+
+    return DeteccaoCitacao(normas, itens, norma_mencionada, item_mencionado)
+
+
+def preencher_citacoes(
+    db: Session,
+    modelo_nome: Optional[str] = None,
+    configuracao: Optional[str] = None,
+    tamanho_lote: int = 500,
+    dry_run: bool = False
+) -> Dict[str, Any]:
+    """Recalcula norma_mencionada, item_mencionado e fonte_citada de todas as respostas.
+
+    Lê só as colunas necessárias e grava com um UPDATE em massa por lote. O
+    somatório das respostas já avaliadas é recalculado, já que inclui
+    fonte_citada. Devolve contagens para o relatório.
+    """
+    query = db.query(
+        Resposta.id,
+        Resposta.resposta_dada,
+        Resposta.fonte_citada,
+        Resposta.resposta_correta,
+        Resposta.clareza,
+        Resposta.fundamentacao_tecnica,
+        Resposta.concisao,
+        Resposta.somatorio,
+        Pergunta.norma_tecnica,
+        Pergunta.item
+    ).join(Pergunta, Resposta.pergunta_id == Pergunta.id)
+    if modelo_nome:
+        query = query.join(ModeloLLM, Resposta.modelo_id == ModeloLLM.id).filter(ModeloLLM.nome == modelo_nome)
+    if configuracao:
+        query = query.filter(Resposta.configuracao == configuracao)
+
+    stats = {"respostas": 0, "com_norma": 0, "com_item": 0, "com_fonte": 0, "fonte_alterada": 0, "tempo_deteccao": 0.0}
+    linhas: List[Dict[str, Any]] = []
+
+    def gravar():
+        if linhas and not dry_run:
+            db.execute(update(Resposta), linhas)
+            db.commit()
+        linhas.clear()
+
+    for linha in query.order_by(Resposta.id).all():
+        inicio = time.perf_counter()
+        deteccao = detectar_citacoes(linha.resposta_dada, linha.norma_tecnica, linha.item)
+        stats["tempo_deteccao"] += time.perf_counter() - inicio
+
+        valores = {
+            "id": linha.id,
+            "norma_mencionada": deteccao.norma_mencionada,
+            "item_mencionado": deteccao.item_mencionado,
+            "fonte_citada": deteccao.fonte_citada
+        }
+        if linha.somatorio is not None:
+            valores["somatorio"] = Resposta(
+                resposta_correta=linha.resposta_correta,
+                fonte_citada=deteccao.fonte_citada,
+                clareza=linha.clareza,
+                fundamentacao_tecnica=linha.fundamentacao_tecnica,
+                concisao=linha.concisao
+            ).calcular_somatorio()
+        linhas.append(valores)
+
+        stats["respostas"] += 1
+        stats["com_norma"] += deteccao.norma_mencionada
+        stats["com_item"] += deteccao.item_mencionado
+        stats["com_fonte"] += deteccao.fonte_citada
+        stats["fonte_alterada"] += bool(linha.fonte_citada) != deteccao.fonte_citada
+
+        if len(linhas) >= tamanho_lote:
+            gravar()
+    gravar()
+
+    logger.info(
+        f"Citações: {stats['respostas']} respostas, {stats['com_fonte']} com fonte, "
+        f"{stats['fonte_alterada']} fonte_citada alteradas{' (simulação)' if dry_run else ''}"
+    )
+    return stats
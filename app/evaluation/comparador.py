@@ -0,0 +1,305 @@
+"""Comparador local de valores numéricos com unidade (triagem de correção antes do juiz)"""
+
+import logging
+import math
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session, contains_eager, load_only
+
+from .citacoes import normalizar
+from ..models import ModeloLLM, Pergunta, Resposta
+
+logger = logging.getLogger(__name__)
+
+# Vereditos
+CONFERE = "confere"
+DIVERGE = "diverge"
+INDETERMINADO = "indeterminado"
+
+# Confiança mínima para a triagem decidir sozinha; abaixo disso a resposta vai para o juiz
+LIMIAR_CONFIANCA = 0.8
+
+# Fundamentação máxima de uma resposta incorreta (regra de validar_consistencia_logica)
+FUNDAMENTACAO_MAXIMA_INCORRETA = 2
+
+# Unidade (já normalizada: minúsculas, sem acentos, "²" -> "2") -> (grandeza, fator para a unidade base)
+UNIDADES: Dict[str, Tuple[str, float]] = {
+    # comprimento (m)
+    "m": ("m", 1.0), "metro": ("m", 1.0), "metros": ("m", 1.0),
+    "cm": ("m", 0.01), "centimetros": ("m", 0.01), "mm": ("m", 0.001), "milimetros": ("m", 0.001),
+    "km": ("m", 1000.0), "quilometros": ("m", 1000.0),
+    # área (m²)
+    "m2": ("m2", 1.0), "m^2": ("m2", 1.0), "metros quadrados": ("m2", 1.0), "metro quadrado": ("m2", 1.0),
+    "ha": ("m2", 10000.0), "hectares": ("m2", 10000.0),
+    # volume (L)
+    "l": ("l", 1.0), "litro": ("l", 1.0), "litros": ("l", 1.0), "ml": ("l", 0.001),
+    "m3": ("l", 1000.0), "m^3": ("l", 1000.0), "metros cubicos": ("l", 1000.0), "metro cubico": ("l", 1000.0),
+    # vazão (L/min)
+    "l/min": ("l/min", 1.0), "lpm": ("l/min", 1.0), "litros por minuto": ("l/min", 1.0),
+    "m3/h": ("l/min", 1000.0 / 60), "l/s": ("l/min", 60.0),
+    # tempo (min)
+    "min": ("min", 1.0), "minuto": ("min", 1.0), "minutos": ("min", 1.0),
+    "h": ("min", 60.0), "hora": ("min", 60.0), "horas": ("min", 60.0),
+    "s": ("min", 1 / 60), "seg": ("min", 1 / 60), "segundo": ("min", 1 / 60), "segundos": ("min", 1 / 60),
+    # pressão (kPa)
+    "kpa": ("kpa", 1.0), "mpa": ("kpa", 1000.0), "bar": ("kpa", 100.0), "psi": ("kpa", 6.894757),
+    "mca": ("kpa", 9.80665), "m.c.a.": ("kpa", 9.80665), "kgf/cm2": ("kpa", 98.0665),
+    # carga de incêndio (MJ/m²)
+    "mj/m2": ("mj/m2", 1.0),
+    # outros
+    "%": ("%", 1.0), "por cento": ("%", 1.0),
+    "lux": ("lux", 1.0), "lx": ("lux", 1.0),
+    "pessoa": ("pessoas", 1.0), "pessoas": ("pessoas", 1.0),
+    "pavimento": ("pavimentos", 1.0), "pavimentos": ("pavimentos", 1.0),
+    "kg": ("kg", 1.0), "quilos": ("kg", 1.0),
+}
+
+_POR_EXTENSO = {
+    "um": 1, "uma": 1, "dois": 2, "duas": 2, "tres": 3, "quatro": 4, "cinco": 5, "seis": 6, "sete": 7,
+    "oito": 8, "nove": 9, "dez": 10, "onze": 11, "doze": 12, "quinze": 15, "vinte": 20, "trinta": 30,
+    "quarenta": 40, "cinquenta": 50, "sessenta": 60, "cem": 100,
+}
+
+# Número: "1.000,5" (milhar com ponto), "1,5", "1.5", "7"; nunca parte de "6.7.3" ou "NT-09/2014"
+_NUM = r"(?<![\w.,/])(?:\d{1,3}(?:\.\d{3})+(?:,\d+)?|\d+(?:[.,]\d+)?)(?![.,]?\d)"
+_EXTENSO = r"\b(?:" + "|".join(sorted(_POR_EXTENSO, key=len, reverse=True)) + r")\b"
+_UNIDADE = "|".join(re.escape(unidade) for unidade in sorted(UNIDADES, key=len, reverse=True))
+
+# "7 m", "1,5 metros", "entre 5 e 10 m", "30 a 45 min", "2-3 pessoas", "sete metros"
+_VALOR = re.compile(
+    rf"(?P<entre>entre\s+)?(?P<de>{_NUM}|{_EXTENSO})"
+    rf"(?:\s*(?P<unidade_de>{_UNIDADE})(?![a-z0-9]))?"
+    rf"(?:\s*(?P<ligacao>a|e|-|ate)\s*(?P<ate>{_NUM}))?"
+    rf"\s*(?P<unidade>{_UNIDADE})(?![a-z0-9])"
+)
+
+
+@dataclass(frozen=True)
+class Valor:
+    """Valor (ou faixa) já convertido para a unidade base da grandeza."""
+    minimo: float
+    maximo: float
+    grandeza: str
+    texto: str
+
+    def equivale(self, outro: "Valor") -> bool:
+        return (
+            self.grandeza == outro.grandeza
+            and math.isclose(self.minimo, outro.minimo, rel_tol=0.01, abs_tol=1e-9)
+            and math.isclose(self.maximo, outro.maximo, rel_tol=0.01, abs_tol=1e-9)
+        )
+
+
+@dataclass
+class ResultadoComparacao:
+    veredito: str
+    confianca: float
+    motivo: str
+    esperados: List[Valor] = field(default_factory=list)
+    encontrados: List[Valor] = field(default_factory=list)
+
+    @property
+    def decidido(self) -> bool:
+        """A triagem basta (sem chamar o juiz)."""
+        return self.veredito != INDETERMINADO and self.confianca >= LIMIAR_CONFIANCA
+
+    @property
+    def correta(self) -> Optional[bool]:
+        return {CONFERE: True, DIVERGE: False}.get(self.veredito)
+
+    def descrever(self) -> str:
+        esperados = ", ".join(valor.texto for valor in self.esperados) or "-"
+        return f"{self.veredito} ({self.confianca:.2f}): esperado {esperados}; {self.motivo}"
+
+
+def fundamentacao_corrigida(fundamentacao: Optional[int], correta: Optional[bool]) -> Optional[int]:
+    """Fundamentação técnica coerente com o veredito: no máximo 2 se a resposta está incorreta."""
+    if correta or fundamentacao is None:
+        return fundamentacao
+    return min(fundamentacao, FUNDAMENTACAO_MAXIMA_INCORRETA)
+
+
+def _numero(texto: str) -> float:
+    if texto in _POR_EXTENSO:
+        return float(_POR_EXTENSO[texto])
+    if re.fullmatch(r"\d{1,3}(?:\.\d{3})+(?:,\d+)?", texto):
+        texto = texto.replace(".", "")
+    return float(texto.replace(",", "."))
+
+
+def extrair_valores(texto: Optional[str]) -> List[Valor]:
+    """Valores com unidade em `texto`, na ordem em que aparecem."""
+    texto = normalizar(texto or "")
+    valores = []
+    posicao = 0
+    while True:
+        encontrado = _VALOR.search(texto, posicao)
+        if not encontrado:
+            return valores
+        grandeza, fator = UNIDADES[encontrado.group("unidade")]
+        unidade_de = encontrado.group("unidade_de")
+        faixa = encontrado.group("ate") is not None and (
+            encontrado.group("ligacao") != "e" or encontrado.group("entre") is not None
+        )
+
+        if not faixa:
+            # "5 m e 10 m" ou "5 e 10 m" sem "entre": lista, não faixa; o segundo valor é lido na próxima volta
+            if encontrado.group("ate") is None or unidade_de:
+                unidade = unidade_de or encontrado.group("unidade")
+                valor = _numero(encontrado.group("de")) * UNIDADES[unidade][1]
+                fim = encontrado.end("unidade_de") if unidade_de else encontrado.end()
+                valores.append(Valor(valor, valor, UNIDADES[unidade][0], texto[encontrado.start("de"):fim]))
+                posicao = fim
+            else:
+                posicao = encontrado.end("de")
+            continue
+
+        fator_de = UNIDADES[unidade_de][1] if unidade_de and UNIDADES[unidade_de][0] == grandeza else fator
+        minimo = _numero(encontrado.group("de")) * fator_de
+        maximo = _numero(encontrado.group("ate")) * fator
+        valores.append(Valor(min(minimo, maximo), max(minimo, maximo), grandeza, encontrado.group(0).strip()))
+        posicao = encontrado.end()
+
+
+def comparar_respostas(
+    resposta_dada: Optional[str],
+    resposta_esperada: str,
+    enunciado: Optional[str] = None
+) -> ResultadoComparacao:
+    """Compara os valores com unidade da resposta com os da resposta esperada.
+
+    Valores do `enunciado` que reaparecem na resposta (dados do problema
+    repetidos) são ignorados, a não ser que sejam o próprio valor esperado.
+    CONFERE/DIVERGE com confiança alta só quando a resposta não traz outros
+    valores da mesma grandeza que deixem a conclusão ambígua.
+    """
+    esperados = extrair_valores(resposta_esperada)
+    if not esperados:
+        return ResultadoComparacao(INDETERMINADO, 0.0, "resposta esperada sem valor numérico com unidade")
+
+    dados = extrair_valores(enunciado) if enunciado else []
+    grandezas = {valor.grandeza for valor in esperados}
+    encontrados = [
+        valor for valor in extrair_valores(resposta_dada)
+        if valor.grandeza in grandezas
+        and (not any(valor.equivale(dado) for dado in dados) or any(valor.equivale(e) for e in esperados))
+    ]
+    if not encontrados:
+        return ResultadoComparacao(INDETERMINADO, 0.0, "resposta sem valores comparáveis", esperados)
+
+    atendidos = [e for e in esperados if any(valor.equivale(e) for valor in encontrados)]
+    distintos = {(valor.grandeza, round(valor.minimo, 6), round(valor.maximo, 6)) for valor in encontrados}
+    extras = [valor for valor in encontrados if not any(valor.equivale(e) for e in esperados)]
+
+    if len(atendidos) == len(esperados):
+        if not extras:
+            return ResultadoComparacao(CONFERE, 0.95, "todos os valores conferem", esperados, encontrados)
+        return ResultadoComparacao(
+            CONFERE, 0.6, f"confere, mas também cita {', '.join(v.texto for v in extras)}", esperados, encontrados
+        )
+    if not atendidos:
+        confianca = 0.9 if len(distintos) == 1 else 0.6
+        return ResultadoComparacao(
+            DIVERGE, confianca, f"encontrado {', '.join(v.texto for v in encontrados)}", esperados, encontrados
+        )
+    return ResultadoComparacao(
+        INDETERMINADO, 0.5, f"confere {len(atendidos)} de {len(esperados)} valores", esperados, encontrados
+    )
+
+
+def triar_resposta(resposta: Resposta) -> ResultadoComparacao:
+    """Triagem de uma resposta com a pergunta carregada.
+
+    Perguntas com resposta esperada duvidosa nunca são decididas localmente.
+    """
+    pergunta = resposta.pergunta
+    if pergunta.flag_resposta_duvidosa:
+        return ResultadoComparacao(INDETERMINADO, 0.0, "resposta esperada marcada como duvidosa")
+    return comparar_respostas(resposta.resposta_dada, pergunta.resposta_esperada, pergunta.texto)
+
+
+def reavaliar_correcao(
+    db: Session,
+    modelo_nome: Optional[str] = None,
+    configuracao: Optional[str] = None,
+    limiar: float = LIMIAR_CONFIANCA,
+    tamanho_lote: int = 500,
+    dry_run: bool = False
+) -> Dict[str, Any]:
+    """Regrava resposta_correta (e o somatório) de todas as respostas que a triagem decide.
+
+    A decisão é a de `triar_resposta` (perguntas duvidosas ficam de fora) com
+    confiança ≥ `limiar`. Uma resposta incorreta tem a fundamentação técnica
+    limitada a 2, como na avaliação com a triagem. As linhas são lidas em
+    blocos de `tamanho_lote` e as alterações vão num UPDATE em massa por
+    bloco, com um único commit no fim. Devolve contagens para o relatório,
+    incluindo a concordância com o valor atual.
+    """
+    query = db.query(Resposta).join(Pergunta, Resposta.pergunta_id == Pergunta.id).options(
+        load_only(
+            Resposta.id, Resposta.resposta_dada, Resposta.resposta_correta, Resposta.fonte_citada,
+            Resposta.clareza, Resposta.fundamentacao_tecnica, Resposta.concisao, Resposta.somatorio
+        ),
+        contains_eager(Resposta.pergunta).load_only(
+            Pergunta.texto, Pergunta.resposta_esperada, Pergunta.flag_resposta_duvidosa
+        )
+    )
+    if modelo_nome:
+        query = query.join(ModeloLLM, Resposta.modelo_id == ModeloLLM.id).filter(ModeloLLM.nome == modelo_nome)
+    if configuracao:
+        query = query.filter(Resposta.configuracao == configuracao)
+
+    stats = {
+        "respostas": 0, CONFERE: 0, DIVERGE: 0, INDETERMINADO: 0,
+        "concordam": 0, "alteradas": 0, "tempo_comparacao": 0.0
+    }
+    linhas: List[Dict[str, Any]] = []
+
+    def gravar():
+        if linhas and not dry_run:
+            db.execute(update(Resposta), linhas)
+        linhas.clear()
+
+    for resposta in query.order_by(Resposta.id).yield_per(tamanho_lote):
+        inicio = time.perf_counter()
+        resultado = triar_resposta(resposta)
+        stats["tempo_comparacao"] += time.perf_counter() - inicio
+        stats["respostas"] += 1
+
+        if resultado.veredito == INDETERMINADO or resultado.confianca < limiar:
+            stats[INDETERMINADO] += 1
+            continue
+
+        stats[resultado.veredito] += 1
+        concorda = bool(resposta.resposta_correta) == resultado.correta
+        stats["concordam"] += concorda
+        fundamentacao = fundamentacao_corrigida(resposta.fundamentacao_tecnica, resultado.correta)
+        if concorda and fundamentacao == resposta.fundamentacao_tecnica:
+            continue
+
+        stats["alteradas"] += 1
+        valores = {"id": resposta.id, "resposta_correta": resultado.correta, "fundamentacao_tecnica": fundamentacao}
+        if resposta.somatorio is not None:
+            valores["somatorio"] = Resposta(
+                resposta_correta=resultado.correta,
+                fonte_citada=resposta.fonte_citada,
+                clareza=resposta.clareza,
+                fundamentacao_tecnica=fundamentacao,
+                concisao=resposta.concisao
+            ).calcular_somatorio()
+        linhas.append(valores)
+        if len(linhas) >= tamanho_lote:
+            gravar()
+    gravar()
+    if not dry_run:
+        db.commit()
+
+    logger.info(
+        f"Triagem numérica: {stats['respostas']} respostas, {stats[CONFERE]} conferem, {stats[DIVERGE]} divergem, "
+        f"{stats[INDETERMINADO]} indeterminadas, {stats['alteradas']} alteradas{' (simulação)' if dry_run else ''}"
+    )
+    return stats
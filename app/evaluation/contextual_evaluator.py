@@ -1,17 +1,36 @@
 """Avaliador contextual de respostas usando Instructor"""
 
+import json
 import os
+import random
+import re
+import threading
 import instructor
 from groq import Groq
 from dotenv import load_dotenv
-from datetime import datetime
-from typing import Optional, List
+from collections import Counter, defaultdict
+from typing import Dict, Optional, List, Tuple
 import logging
 import time
+from datetime import datetime
+from pydantic import ValidationError
+from urllib.parse import urlparse
 
-from .models import AvaliacaoContextual, ResultadoAvaliacao
-from ..models import Pergunta, Resposta, ModeloLLM
-from sqlalchemy.orm import Session
+from .models import (
+    AvaliacaoCompacta, AvaliacaoContextual, AvaliacaoLote, AvaliacaoLoteCompacta, AvaliacaoTriagem,
+    AvaliacaoTriagemCompacta, JustificativaCompleta, ResultadoAvaliacao
+)
+from .engine import AoConcluir, MotorAvaliacao
+from .citacoes import detectar_citacoes
+from .comparador import ResultadoComparacao, fundamentacao_corrigida
+from ..models import ORIGEM_JUIZ, ORIGEM_TRIAGEM, Pergunta, Resposta, ModeloLLM
+from ..llm.transport import connection_stats, get_http_client
+from ..llm.resilience import ResilientCaller, RetryPolicy, get_circuit_breaker, status_code
+from ..llm.cassette import Cassette, JUDGE
+from ..llm.rate_limit import RateLimiter, get_rate_limiter
+from ..llm.cache import ResponseCache, DEFAULT_CACHE_DIR
+from ..llm.usage import usage_values
+from sqlalchemy.orm import Session, contains_eager
 
 # Carregar variáveis de ambiente
 load_dotenv()
@@ -19,60 +38,245 @@ load_dotenv()
 # Configurar logging
 logger = logging.getLogger(__name__)
 
+# Chave das configurações de transporte: variáveis HTTP_GROQ_*
+HTTP_PROVIDER_GROQ = "groq"
+
+# Cota do juiz no Groq (GROQ_RPM/GROQ_TPM); sem TPM, só as requisições são limitadas.
+# O Groq conta a cota por modelo: GROQ_RPM_<MODELO>/GROQ_TPM_<MODELO> sobrescrevem para um modelo
+GROQ_RPM = float(os.getenv("GROQ_RPM", "20"))
+GROQ_TPM = float(os.getenv("GROQ_TPM", "0")) or None
+
+
+def cota_modelo(modelo: str) -> Tuple[float, Optional[float]]:
+    """(RPM, TPM) do `modelo` no Groq, ex.: GROQ_RPM_LLAMA3_8B_8192 para llama3-8b-8192"""
+    sufixo = re.sub(r"[^A-Z0-9]+", "_", modelo.upper())
+    rpm = float(os.getenv(f"GROQ_RPM_{sufixo}", "0")) or GROQ_RPM
+    tpm = float(os.getenv(f"GROQ_TPM_{sufixo}", "0")) or GROQ_TPM
+    return rpm, tpm
+
+# Tokens de saída reservados por avaliação antes de conhecer o uso real
+TOKENS_SAIDA_ESTIMADOS = 600
+
+# Limite de tokens de saída por avaliação (no modo compacto só vêm as notas e uma frase)
+MAX_TOKENS_JUIZ = 2000
+MAX_TOKENS_COMPACTO = 300
+TOKENS_SAIDA_ESTIMADOS_COMPACTO = 120
+
+# Janela de contexto (entrada + max_tokens) dos juízes; modelos fora da tabela usam JUDGE_CONTEXT_TOKENS
+CONTEXTO_MODELOS = {
+    "llama3-70b-8192": 8192,
+    "llama3-8b-8192": 8192,
+}
+CONTEXTO_PADRAO = int(os.getenv("JUDGE_CONTEXT_TOKENS", "8192"))
+
+# Folga da estimativa de tokens de entrada (≈ 4 caracteres por token) e da formatação das mensagens
+MARGEM_CONTEXTO = 512
+
+# Modelo Groq usado como juiz
+MODELO_JUIZ = "llama3-70b-8192"
+
+# Juiz rápido da cascata: decide sozinho quando está confiante, senão escalona ao MODELO_JUIZ
+MODELO_JUIZ_RAPIDO = os.getenv("JUDGE_FAST_MODEL", "llama3-8b-8192")
+
+# Confiança mínima do juiz rápido para a avaliação dele valer sem escalonar
+LIMIAR_CASCATA = float(os.getenv("JUDGE_CASCADE_MIN_CONFIDENCE", "0.8"))
+
+# Versão da rubrica: incremente ao mudar critérios que não aparecem no prompt nem no schema
+# (o texto do prompt e o schema de AvaliacaoContextual já fazem parte da chave do cache)
+VERSAO_RUBRICA = 1
+
+# Cache de resultados do juiz, separado do cache de respostas dos experimentos
+DEFAULT_JUDGE_CACHE_DIR = os.getenv("JUDGE_CACHE_DIR", os.path.join(DEFAULT_CACHE_DIR, "juiz"))
+
+# Motivos de escalonamento da cascata, na ordem dos relatórios
+MOTIVOS_ESCALONAMENTO = {
+    "confianca": "confiança baixa",
+    "inconsistencia": "inconsistência",
+    "duvidosa": "resposta duvidosa",
+    "falha": "falha do juiz rápido"
+}
+
+
+class EstatisticasCascata:
+    """Contadores da cascata de juízes, compartilhados pelas threads do motor.
+
+    A concordância compara o resposta_correta e o score dos dois juízes quando
+    ambos avaliaram a mesma resposta: nas escalonadas por confiança ou
+    inconsistência e nas aceitas sorteadas para auditoria.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.respostas = 0
+        self.aceitas = 0
+        self.motivos: Counter = Counter()
+        self.comparadas: Counter = Counter()
+        self.concordam: Counter = Counter()
+        self.diferenca_score: Dict[str, float] = defaultdict(float)
+
+    @property
+    def escalonadas(self) -> int:
+        return sum(self.motivos.values())
+
+    def iniciar(self):
+        with self._lock:
+            self.respostas += 1
+
+    def aceitar(self):
+        with self._lock:
+            self.aceitas += 1
+
+    def escalonar(self, motivo: str):
+        with self._lock:
+            self.motivos[motivo] += 1
+
+    def comparar(self, grupo: str, rapida: AvaliacaoContextual, grande: AvaliacaoContextual):
+        """Registra a concordância entre os juízes ("escalonadas" ou "auditadas")"""
+        with self._lock:
+            self.comparadas[grupo] += 1
+            self.concordam[grupo] += rapida.resposta_correta == grande.resposta_correta
+            self.diferenca_score[grupo] += abs(rapida.calcular_score_total() - grande.calcular_score_total())
+
+    def describe_concordancia(self, grupo: str) -> str:
+        comparadas = self.comparadas[grupo]
+        if not comparadas:
+            return f"{grupo}: sem comparações"
+        return (
+            f"{grupo}: {self.concordam[grupo]}/{comparadas} ({self.concordam[grupo] / comparadas:.0%}) "
+            f"com o mesmo resposta_correta, score a {self.diferenca_score[grupo] / comparadas:.2f} em média"
+        )
+
 
 class ContextualEvaluator:
     """Avaliador que considera contexto completo da pergunta (norma, item, flags)"""
     
-    def __init__(self, dry_run: bool = False, overwrite: bool = False):
+    def __init__(
+        self,
+        dry_run: bool = False,
+        overwrite: bool = False,
+        max_retries: int = 3,
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+        cassette: Optional[Cassette] = None,
+        rpm: Optional[float] = None,
+        tpm: Optional[float] = None,
+        rpm_rapido: Optional[float] = None,
+        tpm_rapido: Optional[float] = None,
+        use_cache: bool = True,
+        cache_dir: str = DEFAULT_JUDGE_CACHE_DIR,
+        cascata: bool = False,
+        modelo_rapido: str = MODELO_JUIZ_RAPIDO,
+        limiar_cascata: float = LIMIAR_CASCATA,
+        auditoria_cascata: float = 0.0,
+        compacto: bool = False,
+        sem_limite: bool = False
+    ):
         self.dry_run = dry_run
         self.overwrite = overwrite
         self.client = None
+
+        # Modo compacto: o juiz devolve só as notas e uma frase (AvaliacaoCompacta);
+        # a análise detalhada fica para `justificar_avaliacao`, sob demanda
+        self.compacto = compacto
+
+        # Cascata: `modelo_rapido` avalia primeiro e só os casos difíceis vão ao MODELO_JUIZ;
+        # `auditoria_cascata` é a fração das aceitas reavaliadas pelo juiz grande para medir concordância
+        self.cascata = cascata
+        self.modelo_rapido = modelo_rapido
+        self.limiar_cascata = limiar_cascata
+        self.auditoria_cascata = auditoria_cascata
+        self.estatisticas_cascata = EstatisticasCascata()
+
+        # Gravação/reprodução das chamadas ao juiz (ver app.llm.cassette)
+        self.cassette = cassette
+        self.reproduzindo = cassette is not None and cassette.replaying
+        
+        # Resultados já pagos, reaplicados sem chamar o juiz (sem sentido em simulação ou com cassete)
+        self.cache: Optional[ResponseCache] = None
+        if use_cache and not dry_run and cassette is None:
+            self.cache = ResponseCache(cache_dir)
+        
+        # Endpoint alternativo (GROQ_BASE_URL), ex.: o servidor simulado do `benchmark`
+        base_url = base_url or os.getenv("GROQ_BASE_URL") or None
+        
+        # Retentativas com backoff e circuit breaker do endpoint Groq
+        endpoint = urlparse(base_url).netloc if base_url else "api.groq.com"
+        self.resilience = ResilientCaller(
+            get_circuit_breaker(endpoint),
+            RetryPolicy(max_attempts=max_retries + 1)
+        )
+        
+        # Token bucket RPM/TPM por (endpoint, modelo), compartilhado por todas as threads:
+        # o Groq conta a cota de cada modelo à parte, então o juiz rápido não consome a do
+        # MODELO_JUIZ. `sem_limite` dispensa a cota (ex.: o servidor simulado do `benchmark`)
+        self.endpoint = endpoint
+        self.sem_limite = sem_limite
+        self._cotas = {modelo_rapido: (rpm_rapido, tpm_rapido), MODELO_JUIZ: (rpm, tpm)}
+        self.limiters: Dict[str, RateLimiter] = {}
+        self._limiters_lock = threading.Lock()
+        self.limiter = self.limiter_modelo(MODELO_JUIZ)
         
-        if not dry_run:
+        # Tempos acumulados (segundos) das chamadas ao juiz e das gravações no banco
+        self.tempos_chamada: List[float] = []
+        self.tempos_por_modelo: Dict[str, List[float]] = defaultdict(list)
+        self.tempo_banco = 0.0
+        
+        # Tokens informados pela API: saída por resposta avaliada e entrada servida
+        # do cache de prompt do provedor (prefixo fixo de `_criar_prompt_sistema`)
+        self.tokens_saida = 0
+        self.respostas_com_uso = 0
+        self.tokens_entrada = 0
+        self.tokens_cache = 0
+        self.chamadas_com_uso = 0
+        self.chamadas_com_cache = 0
+        
+        # Modo em lote (avaliar_pergunta_lote): chamadas, respostas cobertas e reavaliações individuais
+        self.chamadas_lote = 0
+        self.respostas_lote = 0
+        self.respostas_fallback = 0
+        
+        if not dry_run and not self.reproduzindo:
             # Inicializar cliente Groq
-            api_key = os.getenv("GROQ_API_KEY")
+            api_key = api_key or os.getenv("GROQ_API_KEY")
             
             if not api_key:
                 raise ValueError("GROQ_API_KEY não configurada")
             
-            # Inicializar Groq client
-            groq_client = Groq(api_key=api_key)
+            # Inicializar Groq client sobre o transporte compartilhado (pool, keep-alive, timeouts)
+            # max_retries=0: as retentativas ficam com self.resilience
+            groq_client = Groq(
+                api_key=api_key,
+                base_url=base_url,
+                http_client=get_http_client(HTTP_PROVIDER_GROQ),
+                max_retries=0
+            )
             
             # Patch com Instructor
             self.client = instructor.from_groq(groq_client)
             
             logger.info(f"ContextualEvaluator inicializado com Groq API")
     
-    def _criar_prompt_contextual(self, pergunta: Pergunta, resposta_dada: str) -> str:
-        """Cria prompt especializado considerando contexto da pergunta"""
+    def _criar_prompt_sistema(self, compacto: bool = False) -> str:
+        """Prefixo fixo das chamadas ao juiz: papel e rubrica, sem nada da pergunta ou da resposta.
         
-        # Aviso especial para respostas duvidosas
-        aviso_duvidosa = ""
-        if pergunta.flag_resposta_duvidosa:
-            aviso_duvidosa = """
-⚠️ ATENÇÃO: Esta pergunta está marcada como 'resposta_duvidosa', 
-indicando que a resposta esperada oficial pode conter erros ou imprecisões.
-Avalie com critério crítico e considere se a resposta do LLM pode estar mais correta.
-"""
+        Vai como mensagem de sistema, idêntica em todas as chamadas do mesmo modo
+        (completo ou compacto), para o provedor reaproveitá-la do cache de prompt.
+        Os dados variáveis vão depois, em `_criar_prompt_contextual`.
+        """
         
-        prompt = f"""Você é um especialista técnico em normas do CBMGO (Corpo de Bombeiros Militar de Goiás).
-
-CONTEXTO DA PERGUNTA:
-- Norma Técnica: {pergunta.norma_tecnica}
-- Item/Artigo: {pergunta.item}
-- Referência Completa: {pergunta.norma_artigo}
-- Pergunta: {pergunta.texto}
-
-RESPOSTA ESPERADA (oficial): 
-{pergunta.resposta_esperada}
-
-RESPOSTA DO LLM PARA AVALIAR:
-{resposta_dada}
+        if compacto:
+            instrucao_justificativa = "Seja breve: devolva só as notas e UMA frase curta de justificativa, sem análise detalhada"
+        else:
+            instrucao_justificativa = "Forneça justificativas detalhadas para suas avaliações"
+        
+        return f"""Você é um especialista técnico em normas do CBMGO (Corpo de Bombeiros Militar de Goiás).
 
-{aviso_duvidosa}
+Você avalia respostas de LLMs a perguntas sobre normas técnicas. Cada mensagem traz o contexto
+da pergunta (norma, item, referência e enunciado), a RESPOSTA ESPERADA oficial, a resposta a
+avaliar e as citações já detectadas nela.
 
 ⚠️ INSTRUÇÃO CRÍTICA PARA AVALIAÇÃO:
-COMPARE DIRETAMENTE a resposta final do LLM com a RESPOSTA ESPERADA oficial: "{pergunta.resposta_esperada}"
+COMPARE DIRETAMENTE a resposta final do LLM com a RESPOSTA ESPERADA oficial
 - Se as respostas finais são DIFERENTES (valores numéricos, unidades, conceitos), marque resposta_correta = False
 - Se as respostas finais são IGUAIS ou EQUIVALENTES, marque resposta_correta = True
 - NÃO se deixe influenciar por boa fundamentação técnica se a resposta final está ERRADA
@@ -80,14 +284,12 @@ COMPARE DIRETAMENTE a resposta final do LLM com a RESPOSTA ESPERADA oficial: "{p
 CRITÉRIOS DE AVALIAÇÃO:
 
 1. **Correção Técnica**: 
-   - ⚠️ PRIMEIRO: Compare a resposta FINAL do LLM com "{pergunta.resposta_esperada}"
-   - A resposta está correta conforme {pergunta.norma_tecnica} - {pergunta.item}?
+   - ⚠️ PRIMEIRO: Compare a resposta FINAL do LLM com a RESPOSTA ESPERADA oficial
+   - A resposta está correta conforme a norma técnica e o item indicados?
    - Se valores numéricos: são exatamente iguais ou equivalentes?
 
 2. **Conformidade Normativa**: 
-   - Menciona explicitamente a norma correta ({pergunta.norma_tecnica})?
-   - Cita o item/artigo específico ({pergunta.item})?
-   - **FONTE CITADA**: Cita ESPECIFICAMENTE {pergunta.norma_tecnica} E {pergunta.item}? (citações genéricas, incorretas ou outras normas = NÃO)
+   - norma_mencionada, item_mencionado e fonte_citada já foram detectados (ver CITAÇÕES); use-os como estão
 
 3. **Qualidade da Resposta**:
    - **Clareza**: Explicação compreensível e bem estruturada? (independente da correção)
@@ -96,7 +298,7 @@ CRITÉRIOS DE AVALIAÇÃO:
      * Se resposta_correta = True → avaliar qualidade da fundamentação (1-5)
    - **Concisão**: Resposta direta sem ser superficial?
 
-4. **Conformidade com Norma**: Alinhamento com os requisitos específicos da {pergunta.norma_tecnica}
+4. **Conformidade com Norma**: Alinhamento com os requisitos específicos da norma técnica indicada
 
 5. **Completude Técnica**: Aborda todos os aspectos relevantes da questão?
 
@@ -111,44 +313,304 @@ INSTRUÇÕES ESPECÍFICAS PARA FUNDAMENTAÇÃO TÉCNICA:
   * 4 = Boa fundamentação com conceitos técnicos bem aplicados
   * 5 = Excelente fundamentação com domínio técnico completo
 
-INSTRUÇÕES ESPECÍFICAS PARA FONTE CITADA:
-- ✅ fonte_citada = True APENAS se mencionar EXPLICITAMENTE "{pergunta.norma_tecnica}" E "{pergunta.item}"
-- ❌ fonte_citada = False se citar:
-  * Outras normas (NT-01, NT-17, etc. que não seja {pergunta.norma_tecnica})
-  * Outros itens (que não seja {pergunta.item})
-  * Citações genéricas ("conforme norma", "segundo CBMGO", etc.)
-  * Leis, decretos ou outras fontes que não sejam especificamente {pergunta.norma_tecnica} - {pergunta.item}
-  * Nenhuma fonte
-
 INSTRUÇÕES GERAIS:
 - **LÓGICA ESTRUTURADA**: resposta_correta determina o limite máximo da fundamentacao_tecnica
 - Compare cuidadosamente com a resposta esperada oficial
 - Considere o contexto técnico específico da norma
 - Se a resposta for parcialmente correta, identifique os pontos específicos
 - Seja rigoroso mas justo na avaliação
-- Para fonte_citada, seja MUITO RIGOROSO: apenas fontes corretas e específicas
 - **CONSISTÊNCIA**: Uma resposta incorreta NÃO pode ter fundamentação técnica alta (máximo 2)
-- Forneça justificativas detalhadas para suas avaliações"""
+- {instrucao_justificativa}"""
+    
+    def _criar_prompt_contextual(
+        self,
+        pergunta: Pergunta,
+        resposta_dada: str,
+        cabecalho: str = "RESPOSTA DO LLM PARA AVALIAR",
+        citacoes: Optional[str] = None,
+        correcao: Optional[ResultadoComparacao] = None
+    ) -> str:
+        """Sufixo variável da chamada: contexto da pergunta, resposta esperada e resposta a avaliar.
+        
+        Os dados da pergunta vêm antes da resposta, então chamadas sobre a mesma
+        pergunta (outros modelos, outras configurações) também compartilham esse
+        trecho. As citações (norma_mencionada, item_mencionado, fonte_citada)
+        vêm do detector determinístico e só são informadas ao juiz; sem
+        `citacoes`, são detectadas em `resposta_dada`. Com `correcao` (triagem
+        numérica), resposta_correta também já vem decidida e o juiz só
+        atribui as notas.
+        """
+        
+        if citacoes is None:
+            citacoes = detectar_citacoes(resposta_dada, pergunta.norma_tecnica, pergunta.item).descrever()
+        
+        # Aviso especial para respostas duvidosas
+        aviso_duvidosa = ""
+        if pergunta.flag_resposta_duvidosa:
+            aviso_duvidosa = """
+⚠️ ATENÇÃO: Esta pergunta está marcada como 'resposta_duvidosa', 
+indicando que a resposta esperada oficial pode conter erros ou imprecisões.
+Avalie com critério crítico e considere se a resposta do LLM pode estar mais correta.
+"""
+        
+        prompt = f"""CONTEXTO DA PERGUNTA:
+- Norma Técnica: {pergunta.norma_tecnica}
+- Item/Artigo: {pergunta.item}
+- Referência Completa: {pergunta.norma_artigo}
+- Pergunta: {pergunta.texto}
+
+RESPOSTA ESPERADA (oficial): 
+{pergunta.resposta_esperada}
+{aviso_duvidosa}
+{cabecalho}:
+{resposta_dada}
+
+CITAÇÕES (detectadas automaticamente; já definidas, NÃO reavalie): {citacoes}"""
+
+        if correcao is not None:
+            prompt += f"""
+CORREÇÃO (decidida pelo comparador numérico; já definida, NÃO reavalie): resposta_correta={str(correcao.correta).lower()} ({correcao.descrever()})
+Use exatamente esse resposta_correta e atribua as demais notas de forma coerente com ele."""
 
         return prompt
     
+    def _criar_prompt_lote(self, pergunta: Pergunta, respostas: List[Resposta]) -> str:
+        """Prompt com o contexto e a rubrica uma só vez e todas as respostas à pergunta"""
+        
+        blocos = "\n\n".join(
+            f"[resposta_id={resposta.id}]\n{resposta.resposta_dada}\n[fim da resposta_id={resposta.id}]\n"
+            f"Citações da resposta_id={resposta.id}: "
+            f"{detectar_citacoes(resposta.resposta_dada, pergunta.norma_tecnica, pergunta.item).descrever()}"
+            for resposta in respostas
+        )
+        prompt = self._criar_prompt_contextual(
+            pergunta,
+            blocos,
+            cabecalho=f"RESPOSTAS DE {len(respostas)} LLMs PARA AVALIAR (cada uma entre [resposta_id=...] e [fim da resposta_id=...])",
+            citacoes="indicadas abaixo de cada resposta"
+        )
+        
+        return prompt + f"""
+
+AVALIAÇÃO EM LOTE:
+- Avalie CADA resposta de forma independente, aplicando todos os critérios acima a cada uma
+- NÃO compare as respostas entre si: cada uma é julgada apenas contra a resposta esperada oficial
+- Devolva exatamente {len(respostas)} avaliações, uma por resposta, com o mesmo resposta_id ({", ".join(str(resposta.id) for resposta in respostas)})"""
+    
+    def limiter_modelo(self, modelo: str) -> RateLimiter:
+        """Cota RPM/TPM de `modelo` neste endpoint (opções do construtor, senão `cota_modelo`)"""
+        with self._limiters_lock:
+            if modelo not in self.limiters:
+                nome = f"{self.endpoint}/{modelo}"
+                if self.sem_limite:
+                    self.limiters[modelo] = RateLimiter(nome)
+                else:
+                    rpm, tpm = self._cotas.get(modelo, (None, None))
+                    rpm_padrao, tpm_padrao = cota_modelo(modelo)
+                    self.limiters[modelo] = get_rate_limiter(nome, rpm=rpm or rpm_padrao, tpm=tpm or tpm_padrao)
+            return self.limiters[modelo]
+    
+    def describe_cotas(self) -> str:
+        """Chamadas e espera na cota de cada modelo juiz usado"""
+        return "; ".join(limiter.describe() for limiter in self.limiters.values())
+    
+    def _mensagens(self, prompt: str, compacto: bool = False) -> List[Dict[str, str]]:
+        return [
+            {"role": "system", "content": self._criar_prompt_sistema(compacto)},
+            {"role": "user", "content": prompt}
+        ]
+    
+    @staticmethod
+    def _tokens_entrada(messages: List[Dict[str, str]], response_model) -> int:
+        """Estimativa dos tokens de entrada: mensagens e o schema, que o Instructor envia como ferramenta"""
+        caracteres = sum(len(mensagem["content"]) for mensagem in messages)
+        caracteres += len(json.dumps(response_model.model_json_schema(), ensure_ascii=False))
+        return caracteres // 4
+    
+    @staticmethod
+    def _max_tokens(modelo: str, tokens_entrada: int, respostas: int, compacto: bool) -> int:
+        """Limite de saída da chamada: o orçamento por resposta, sem passar da janela de contexto do modelo"""
+        pedido = (MAX_TOKENS_COMPACTO if compacto else MAX_TOKENS_JUIZ) * respostas
+        disponivel = CONTEXTO_MODELOS.get(modelo, CONTEXTO_PADRAO) - tokens_entrada - MARGEM_CONTEXTO
+        return max(1, min(pedido, disponivel))
+    
+    def _dividir_lote(self, pergunta: Pergunta, respostas: List[Resposta], modelo: str = MODELO_JUIZ) -> List[List[Resposta]]:
+        """Separa as respostas em lotes cujo prompt mais o orçamento de saída cabem no contexto do juiz.
+        
+        Sem isso, um lote de 5 pede 5 × MAX_TOKENS_JUIZ de saída, mais que a
+        janela de 8192 tokens do llama3-70b-8192, e a API recusa a chamada.
+        """
+        response_model = AvaliacaoLoteCompacta if self.compacto else AvaliacaoLote
+        limite = CONTEXTO_MODELOS.get(modelo, CONTEXTO_PADRAO) - MARGEM_CONTEXTO
+        por_resposta = MAX_TOKENS_COMPACTO if self.compacto else MAX_TOKENS_JUIZ
+        
+        lotes: List[List[Resposta]] = []
+        atual: List[Resposta] = []
+        for resposta in respostas:
+            candidato = atual + [resposta]
+            entrada = self._tokens_entrada(
+                self._mensagens(self._criar_prompt_lote(pergunta, candidato), self.compacto),
+                response_model
+            )
+            if atual and entrada + por_resposta * len(candidato) > limite:
+                lotes.append(atual)
+                candidato = [resposta]
+            atual = candidato
+        if atual:
+            lotes.append(atual)
+        return lotes
+    
+    def _chamar_juiz(
+        self,
+        prompt: str,
+        response_model,
+        respostas: int = 1,
+        modelo: str = MODELO_JUIZ,
+        compacto: bool = False
+    ):
+        """Chamada estruturada ao juiz, com cota, retentativas e cassete.
+        
+        A rubrica vai como mensagem de sistema fixa e `prompt` (os dados da
+        pergunta e da resposta) como mensagem do usuário, depois dela.
+        """
+        
+        model_name = modelo
+        
+        messages = self._mensagens(prompt, compacto)
+        chave = Cassette.make_key(JUDGE, model=model_name, messages=messages, schema=response_model.__name__)
+        
+        inicio = time.perf_counter()
+        # Espera pela cota, descontada da latência (com várias threads ela é fila, não chamada)
+        espera: List[float] = []
+        if self.reproduzindo:
+            resultado = response_model.model_validate(self.cassette.replay(JUDGE, chave))
+        else:
+            # Cada tentativa (retentativas incluídas) aguarda sua vez na cota RPM/TPM
+            saida_estimada = TOKENS_SAIDA_ESTIMADOS_COMPACTO if compacto else TOKENS_SAIDA_ESTIMADOS
+            tokens_entrada = self._tokens_entrada(messages, response_model)
+            estimativa = tokens_entrada + saida_estimada * respostas
+            max_tokens = self._max_tokens(model_name, tokens_entrada, respostas, compacto)
+            limiter = self.limiter_modelo(model_name)
+            
+            def chamada():
+                espera.append(limiter.acquire(estimativa))
+                # Fazer chamada estruturada usando Instructor
+                return self.client.chat.completions.create_with_completion(
+                    model=model_name,
+                    response_model=response_model,
+                    messages=messages,
+                    max_tokens=max_tokens,
+                    temperature=0.1
+                )
+            
+            resultado, completion = self.resilience.call_sync(
+                chamada,
+                on_retry=lambda error, attempt, wait: self._on_retry(error, attempt, wait, limiter)
+            )
+            uso = getattr(completion, "usage", None)
+            limiter.settle(estimativa, getattr(uso, "total_tokens", None))
+            self._registrar_uso(usage_values(uso), respostas)
+            if self.cassette:
+                self.cassette.record(
+                    JUDGE,
+                    chave,
+                    {"model": model_name, "messages": messages},
+                    resultado.model_dump(),
+                    time.perf_counter() - inicio - sum(espera)
+                )
+        tempo = time.perf_counter() - inicio - sum(espera)
+        self.tempos_chamada.append(tempo)
+        self.tempos_por_modelo[model_name].append(tempo)
+        
+        return resultado
+    
+    def _registrar_uso(self, uso: Dict[str, Optional[int]], respostas: int):
+        """Acumula tokens de saída e de entrada, inclusive os servidos do cache de prompt do provedor"""
+        if uso.get("output_tokens") is not None:
+            self.tokens_saida += uso["output_tokens"]
+            self.respostas_com_uso += respostas
+        if uso.get("input_tokens") is not None:
+            self.chamadas_com_uso += 1
+            self.tokens_entrada += uso["input_tokens"]
+            # Provedores sem cache de prompt não informam o campo: conta como zero
+            cache = uso.get("cached_tokens") or 0
+            self.tokens_cache += cache
+            self.chamadas_com_cache += cache > 0
+    
+    def describe_prefixo(self) -> str:
+        """Aproveitamento do cache de prompt do provedor (prefixo fixo de sistema e rubrica)"""
+        if not self.tokens_entrada:
+            return "sem uso de tokens informado pela API"
+        return (
+            f"{self.tokens_cache}/{self.tokens_entrada} tokens de entrada do cache do provedor "
+            f"({self.tokens_cache / self.tokens_entrada:.1%}), "
+            f"{self.chamadas_com_cache}/{self.chamadas_com_uso} chamadas com acerto; "
+            f"prefixo fixo ~{len(self._criar_prompt_sistema(self.compacto)) // 4} tokens"
+        )
+    
+    def _aplicar_citacoes(
+        self,
+        pergunta: Pergunta,
+        resposta: Resposta,
+        avaliacao: AvaliacaoContextual
+    ) -> AvaliacaoContextual:
+        """Substitui os campos de citação pelos do detector, que prevalece sobre o juiz"""
+        deteccao = detectar_citacoes(resposta.resposta_dada, pergunta.norma_tecnica, pergunta.item)
+        return avaliacao.model_copy(update={
+            "norma_mencionada": deteccao.norma_mencionada,
+            "item_mencionado": deteccao.item_mencionado,
+            "fonte_citada": deteccao.fonte_citada
+        })
+    
+    def _validar(self, pergunta: Pergunta, resposta: Resposta, avaliacao: AvaliacaoContextual) -> AvaliacaoContextual:
+        """Aplica as citações detectadas e valida consistência lógica (só registra:
+        a avaliação é mantida para análise)"""
+        avaliacao = self._aplicar_citacoes(pergunta, resposta, avaliacao)
+        try:
+            avaliacao.validar_consistencia_logica()
+            logger.info(f"Avaliação concluída para resposta {resposta.id}")
+        except ValueError as ve:
+            logger.warning(f"Inconsistência na avaliação {resposta.id}: {ve}")
+            logger.warning("Retornando avaliação mesmo com inconsistência para análise")
+        return avaliacao
+    
     def avaliar_resposta(
         self, 
         pergunta: Pergunta, 
-        resposta: Resposta
+        resposta: Resposta,
+        correcao: Optional[ResultadoComparacao] = None
+    ) -> Optional[AvaliacaoContextual]:
+        """Avalia uma resposta específica usando contexto completo.
+        
+        Com `correcao` (veredito decidido pela triagem numérica), o juiz recebe
+        a correção pronta e só atribui as notas; resposta_correta vem do veredito.
+        """
+        avaliacao = self._avaliar_resposta(pergunta, resposta, correcao)
+        if avaliacao is None or correcao is None:
+            return avaliacao
+        return self._aplicar_correcao(avaliacao, correcao)
+    
+    def _aplicar_correcao(self, avaliacao: AvaliacaoContextual, correcao: ResultadoComparacao) -> AvaliacaoContextual:
+        """Substitui resposta_correta pelo veredito da triagem, que prevalece sobre o juiz"""
+        return avaliacao.model_copy(update={
+            "resposta_correta": correcao.correta,
+            "fundamentacao_tecnica": fundamentacao_corrigida(avaliacao.fundamentacao_tecnica, correcao.correta)
+        })
+    
+    def _avaliar_resposta(
+        self,
+        pergunta: Pergunta,
+        resposta: Resposta,
+        correcao: Optional[ResultadoComparacao] = None
     ) -> Optional[AvaliacaoContextual]:
-        """Avalia uma resposta específica usando contexto completo"""
         
         if not resposta.resposta_dada:
             logger.warning(f"Resposta {resposta.id} não possui texto para avaliar")
             return None
         
-        # Rate limiting para Groq (20 RPM = 1 call per 3 seconds) - SEMPRE aplicado
-        time.sleep(3.0)
-        
         if self.dry_run:
-            # Simulação para testes (com delay real para timing correto)
-            return AvaliacaoContextual(
+            # Simulação para testes (sem chamada, sem limite de taxa); citações reais do detector
+            return self._aplicar_citacoes(pergunta, resposta, AvaliacaoContextual(
                 resposta_correta=True,
                 norma_mencionada=True,
                 item_mencionado=False,
@@ -161,75 +623,364 @@ INSTRUÇÕES GERAIS:
                 observacoes=f"[SIMULAÇÃO] Avaliação simulada para pergunta #{pergunta.numero} - {pergunta.norma_artigo}",
                 pontos_corretos=["Resposta tecnicamente correta", "Boa explicação"],
                 pontos_incorretos=["Não menciona item específico da norma"]
-            )
+            ))
         
+        em_cache = self._buscar_cache(pergunta, resposta, correcao)
+        if em_cache:
+            return em_cache
+        
+        return self._avaliar_individual(pergunta, resposta, correcao)
+    
+    def _avaliar_individual(
+        self,
+        pergunta: Pergunta,
+        resposta: Resposta,
+        correcao: Optional[ResultadoComparacao] = None
+    ) -> Optional[AvaliacaoContextual]:
+        """Uma resposta sem resultado no cache: pela cascata ou direto no juiz"""
+        if self.cascata:
+            return self._avaliar_cascata(pergunta, resposta, correcao)
+        return self._avaliar_juiz(pergunta, resposta, correcao)
+    
+    def _avaliar_juiz(
+        self,
+        pergunta: Pergunta,
+        resposta: Resposta,
+        correcao: Optional[ResultadoComparacao] = None
+    ) -> Optional[AvaliacaoContextual]:
+        """Uma chamada ao MODELO_JUIZ para uma resposta, guardando o resultado no cache"""
         try:
-            prompt = self._criar_prompt_contextual(pergunta, resposta.resposta_dada)
-            
-            # Usar modelo Groq llama3-70b-8192
-            model_name = "llama3-70b-8192"
-            
-            # Fazer chamada estruturada usando Instructor
-            avaliacao = self.client.chat.completions.create(
-                model=model_name,
-                response_model=AvaliacaoContextual,
-                messages=[{
-                    "role": "user", 
-                    "content": prompt
-                }],
-                max_tokens=2000,
-                temperature=0.1
-            )
-            
-            # Validar consistência lógica
-            try:
-                avaliacao.validar_consistencia_logica()
-                logger.info(f"Avaliação concluída para resposta {resposta.id}")
-                return avaliacao
-            except ValueError as ve:
-                logger.warning(f"Inconsistência na avaliação {resposta.id}: {ve}")
-                logger.warning("Retornando avaliação mesmo com inconsistência para análise")
-                return avaliacao
+            prompt = self._criar_prompt_contextual(pergunta, resposta.resposta_dada, correcao=correcao)
+            avaliacao = self._chamar_juiz(prompt, self._schema(), compacto=self.compacto).avaliacao()
+            self._guardar_cache(pergunta, resposta, avaliacao, correcao=correcao)
+            return self._validar(pergunta, resposta, avaliacao)
             
         except Exception as e:
             logger.error(f"Erro ao avaliar resposta {resposta.id}: {e}")
             return None
     
-    def avaliar_respostas_lote(
-        self, 
-        respostas: List[Resposta], 
-        db: Session
-    ) -> List[ResultadoAvaliacao]:
-        """Avalia múltiplas respostas em lote"""
+    def _avaliar_cascata(
+        self,
+        pergunta: Pergunta,
+        resposta: Resposta,
+        correcao: Optional[ResultadoComparacao] = None
+    ) -> Optional[AvaliacaoContextual]:
+        """Juiz rápido primeiro; o MODELO_JUIZ só entra quando ele não basta.
         
-        resultados = []
+        Perguntas com resposta duvidosa vão direto ao juiz grande. As demais
+        escalonam se o juiz rápido falhar, se a confiança dele ficar abaixo de
+        `limiar_cascata` ou se a avaliação for logicamente inconsistente.
+        """
+        estatisticas = self.estatisticas_cascata
+        estatisticas.iniciar()
+        
+        rapida: Optional[AvaliacaoContextual] = None
+        if pergunta.flag_resposta_duvidosa:
+            motivo = "duvidosa"
+        else:
+            try:
+                prompt = self._criar_prompt_contextual(pergunta, resposta.resposta_dada, correcao=correcao)
+                triagem = self._chamar_juiz(prompt, self._schema(triagem=True), modelo=self.modelo_rapido, compacto=self.compacto)
+            except Exception as e:
+                logger.warning(f"Juiz rápido falhou na resposta {resposta.id}: {e}")
+                motivo = "falha"
+            else:
+                rapida = self._aplicar_citacoes(pergunta, resposta, triagem.avaliacao())
+                motivo = self._motivo_escalonamento(rapida, triagem.confianca)
+                if motivo is None:
+                    estatisticas.aceitar()
+                    self._guardar_cache(pergunta, resposta, rapida, confianca=triagem.confianca, correcao=correcao)
+                    logger.info(f"Resposta {resposta.id} decidida por {self.modelo_rapido} (confiança {triagem.confianca:.2f})")
+                    if random.random() >= self.auditoria_cascata:
+                        return rapida
+                    # Auditoria: o juiz grande reavalia para medir a concordância das aceitas
+                    grande = self._avaliar_juiz(pergunta, resposta, correcao)
+                    if grande is None:
+                        return rapida
+                    estatisticas.comparar("auditadas", rapida, grande)
+                    return grande
         
+        estatisticas.escalonar(motivo)
+        logger.info(f"Resposta {resposta.id} escalonada para {MODELO_JUIZ}: {MOTIVOS_ESCALONAMENTO[motivo]}")
+        grande = self._avaliar_juiz(pergunta, resposta, correcao)
+        if rapida is not None and grande is not None:
+            estatisticas.comparar("escalonadas", rapida, grande)
+        return grande
+    
+    def _motivo_escalonamento(self, avaliacao: AvaliacaoContextual, confianca: float) -> Optional[str]:
+        """Por que a avaliação do juiz rápido não basta (None = aceita)"""
+        if confianca < self.limiar_cascata:
+            return "confianca"
+        try:
+            avaliacao.validar_consistencia_logica()
+        except ValueError as ve:
+            logger.info(f"Juiz rápido inconsistente: {ve}")
+            return "inconsistencia"
+        return None
+    
+    def describe_cascata(self) -> str:
+        """Resumo da cascata para os relatórios: escalonamento, concordância e latência por juiz"""
+        estatisticas = self.estatisticas_cascata
+        total = estatisticas.respostas
+        if not total:
+            return "nenhuma resposta passou pela cascata"
+        
+        motivos = ", ".join(
+            f"{descricao} {estatisticas.motivos[motivo]}"
+            for motivo, descricao in MOTIVOS_ESCALONAMENTO.items()
+            if estatisticas.motivos[motivo]
+        )
+        
+        def latencia(modelo: str) -> str:
+            tempos = self.tempos_por_modelo.get(modelo)
+            return f"{modelo} {sum(tempos) / len(tempos):.2f}s em {len(tempos)} chamadas" if tempos else f"{modelo} sem chamadas"
+        
+        return (
+            f"{estatisticas.aceitas}/{total} ({estatisticas.aceitas / total:.0%}) decididas por {self.modelo_rapido}, "
+            f"{estatisticas.escalonadas} ({estatisticas.escalonadas / total:.0%}) escalonadas"
+            f"{f' ({motivos})' if motivos else ''}; "
+            f"concordância {estatisticas.describe_concordancia('escalonadas')}; "
+            f"{estatisticas.describe_concordancia('auditadas')}; "
+            f"latência média {latencia(self.modelo_rapido)}, {latencia(MODELO_JUIZ)}"
+        )
+    
+    def _schema(self, triagem: bool = False):
+        """Schema pedido ao juiz para uma resposta: completo ou compacto, com confiança no juiz rápido"""
+        if self.compacto:
+            return AvaliacaoTriagemCompacta if triagem else AvaliacaoCompacta
+        return AvaliacaoTriagem if triagem else AvaliacaoContextual
+    
+    def justificar_avaliacao(self, pergunta: Pergunta, resposta: Resposta) -> JustificativaCompleta:
+        """Análise detalhada das notas já gravadas de uma resposta (ex.: avaliada no modo compacto).
+        
+        O juiz explica as notas sem alterá-las, no formato completo. Pensado para
+        ser pedido sob demanda, uma resposta por vez; erros da API são propagados.
+        """
+        if self.dry_run:
+            return JustificativaCompleta(
+                observacoes=f"[SIMULAÇÃO] Justificativa simulada para pergunta #{pergunta.numero} - {pergunta.norma_artigo}",
+                pontos_corretos=["Resposta tecnicamente correta"],
+                pontos_incorretos=[]
+            )
+        
+        notas = ", ".join(
+            f"{campo}={getattr(resposta, campo)}"
+            for campo in ("resposta_correta", "fonte_citada", "clareza", "fundamentacao_tecnica", "concisao")
+        )
+        prompt = self._criar_prompt_contextual(pergunta, resposta.resposta_dada) + f"""
+
+AVALIAÇÃO JÁ ATRIBUÍDA (NÃO altere as notas): {notas}
+
+Justifique essas notas em detalhe: compare a resposta com a resposta esperada oficial, a norma e o item,
+e liste os pontos corretos e os incorretos, ausentes ou imprecisos."""
+        return self._chamar_juiz(prompt, JustificativaCompleta)
+    
+    def describe_saida(self) -> str:
+        """Tokens de saída e tempo de chamada por resposta avaliada (compara os modos completo e compacto)"""
+        if not self.respostas_com_uso:
+            return "sem uso de tokens informado pela API"
+        return (
+            f"{self.tokens_saida / self.respostas_com_uso:.0f} tokens de saída e "
+            f"{sum(self.tempos_chamada) / self.respostas_com_uso:.2f}s de chamada por resposta "
+            f"({'compacto' if self.compacto else 'completo'}, {self.respostas_com_uso} respostas)"
+        )
+    
+    def _chave_cache(
+        self,
+        pergunta: Pergunta,
+        resposta: Resposta,
+        triagem: bool = False,
+        correcao: Optional[ResultadoComparacao] = None
+    ) -> str:
+        """Hash do contexto da pergunta e da resposta (pelo prompt completo), do modelo juiz e da rubrica.
+        
+        Mudar a resposta, a pergunta, o texto do prompt, o schema ou VERSAO_RUBRICA
+        gera outra chave, então o resultado antigo deixa de ser usado sozinho.
+        Com `triagem`, a chave é a do juiz rápido da cascata.
+        """
+        return ResponseCache.make_key(
+            kind="judge-result",
+            model=self.modelo_rapido if triagem else MODELO_JUIZ,
+            prompt=self._criar_prompt_sistema(self.compacto) + self._criar_prompt_contextual(
+                pergunta, resposta.resposta_dada, correcao=correcao
+            ),
+            schema=self._schema(triagem).model_json_schema(),
+            rubric_version=VERSAO_RUBRICA
+        )
+    
+    def _ler_cache(
+        self,
+        pergunta: Pergunta,
+        resposta: Resposta,
+        triagem: bool = False,
+        correcao: Optional[ResultadoComparacao] = None
+    ):
+        """(avaliação, confiança do juiz rápido) guardadas, ou (None, None)"""
+        entrada = self.cache.get(self._chave_cache(pergunta, resposta, triagem, correcao))
+        try:
+            if entrada:
+                return AvaliacaoContextual.model_validate(entrada["avaliacao"]), entrada.get("confianca")
+        except (KeyError, ValidationError) as e:
+            logger.warning(f"Entrada de cache inválida para resposta {resposta.id}: {e}")
+        return None, None
+    
+    def _buscar_cache(
+        self,
+        pergunta: Pergunta,
+        resposta: Resposta,
+        correcao: Optional[ResultadoComparacao] = None
+    ) -> Optional[AvaliacaoContextual]:
+        """Resultado do MODELO_JUIZ ou, na cascata, do juiz rápido com confiança acima do limiar atual"""
+        if not self.cache:
+            return None
+        avaliacao, _ = self._ler_cache(pergunta, resposta, correcao=correcao)
+        if avaliacao is None and self.cascata and not pergunta.flag_resposta_duvidosa:
+            rapida, confianca = self._ler_cache(pergunta, resposta, triagem=True, correcao=correcao)
+            if rapida is not None and (confianca or 0.0) >= self.limiar_cascata:
+                avaliacao = rapida
+        
+        if avaliacao is None:
+            self.cache.misses += 1
+            return None
+        self.cache.hits += 1
+        logger.info(f"Avaliação da resposta {resposta.id} reaproveitada do cache")
+        return self._aplicar_citacoes(pergunta, resposta, avaliacao)
+    
+    def _guardar_cache(
+        self,
+        pergunta: Pergunta,
+        resposta: Resposta,
+        avaliacao: AvaliacaoContextual,
+        confianca: Optional[float] = None,
+        correcao: Optional[ResultadoComparacao] = None
+    ):
+        """Com `confianca`, guarda a avaliação como decisão do juiz rápido da cascata"""
+        if not self.cache:
+            return
+        triagem = confianca is not None
+        entrada = {
+            "modelo": self.modelo_rapido if triagem else MODELO_JUIZ,
+            "versao_rubrica": VERSAO_RUBRICA,
+            "resposta_id": resposta.id,
+            "avaliado_em": datetime.now().isoformat(),
+            "avaliacao": avaliacao.model_dump()
+        }
+        if triagem:
+            entrada["confianca"] = confianca
+        self.cache.put(self._chave_cache(pergunta, resposta, triagem, correcao), entrada)
+    
+    def avaliar_pergunta_lote(
+        self,
+        pergunta: Pergunta,
+        respostas: List[Resposta]
+    ) -> Dict[int, Optional[AvaliacaoContextual]]:
+        """Avalia todas as respostas a uma pergunta em uma única chamada ao juiz.
+        
+        O contexto e a rubrica vão uma vez só, em vez de uma vez por resposta.
+        Respostas com resultado no cache ficam fora do lote, e as pendentes são
+        divididas em tantas chamadas quantas a janela de contexto do juiz
+        exigir (`_dividir_lote`); uma resposta que sobra sozinha é avaliada
+        individualmente. Respostas que o
+        juiz não devolveu (ou devolveu repetidas) e lotes que falharam por
+        completo são reavaliados uma a uma.
+        Devolve {resposta.id: avaliação ou None}.
+        """
+        
+        avaliacoes: Dict[int, Optional[AvaliacaoContextual]] = {resposta.id: None for resposta in respostas}
+        
+        # Respostas já avaliadas com a mesma rubrica não entram no lote
+        pendentes = []
         for resposta in respostas:
+            if resposta.resposta_dada:
+                avaliacoes[resposta.id] = self._buscar_cache(pergunta, resposta)
+                if avaliacoes[resposta.id] is None:
+                    pendentes.append(resposta)
+        
+        lotes = self._dividir_lote(pergunta, pendentes) if len(pendentes) > 1 and not self.dry_run else []
+        # Respostas de lotes enviados: as que voltarem sem avaliação contam como reavaliadas
+        em_lote = set()
+        for lote_respostas in lotes:
+            if len(lote_respostas) < 2:
+                continue
+            ids = [resposta.id for resposta in lote_respostas]
+            em_lote.update(ids)
             try:
-                avaliacao = self.avaliar_resposta(resposta.pergunta, resposta)
-                
-                if avaliacao:
-                    resultado = ResultadoAvaliacao(
-                        avaliacao=avaliacao,
-                        score_final=avaliacao.calcular_score_total(),
-                        pergunta_numero=resposta.pergunta.numero,
-                        modelo_nome=resposta.modelo.nome,
-                        configuracao=resposta.configuracao,
-                        timestamp=datetime.now().isoformat(),
-                        norma_tecnica=resposta.pergunta.norma_tecnica,
-                        item_norma=resposta.pergunta.item,
-                        flag_resposta_duvidosa=resposta.pergunta.flag_resposta_duvidosa
+                lote = self._chamar_juiz(
+                    self._criar_prompt_lote(pergunta, lote_respostas),
+                    AvaliacaoLoteCompacta if self.compacto else AvaliacaoLote,
+                    respostas=len(lote_respostas),
+                    compacto=self.compacto
+                )
+                recebidas = lote.por_resposta(ids)
+                self.chamadas_lote += 1
+                self.respostas_lote += len(recebidas)
+                for resposta in lote_respostas:
+                    if resposta.id in recebidas:
+                        self._guardar_cache(pergunta, resposta, recebidas[resposta.id])
+                        avaliacoes[resposta.id] = self._validar(pergunta, resposta, recebidas[resposta.id])
+                if len(recebidas) < len(ids):
+                    logger.warning(
+                        f"Lote da pergunta #{pergunta.numero}: {len(recebidas)}/{len(ids)} avaliações válidas, "
+                        "reavaliando as demais individualmente"
                     )
-                    
-                    resultados.append(resultado)
-                    
-                    # Atualizar campos da resposta no banco
-                    if not self.dry_run:
-                        self._atualizar_resposta_banco(resposta, avaliacao, db)
-                        
             except Exception as e:
-                logger.error(f"Erro ao processar resposta {resposta.id}: {e}")
-                continue
+                logger.warning(f"Lote da pergunta #{pergunta.numero} falhou ({e}), reavaliando individualmente")
+        
+        for resposta in respostas:
+            if avaliacoes[resposta.id] is None:
+                if not resposta.resposta_dada or self.dry_run:
+                    avaliacoes[resposta.id] = self.avaliar_resposta(pergunta, resposta)
+                    continue
+                if resposta.id in em_lote:
+                    self.respostas_fallback += 1
+                avaliacoes[resposta.id] = self._avaliar_individual(pergunta, resposta)
+        
+        return avaliacoes
+    
+    def describe_lote(self) -> str:
+        """Resumo do modo em lote para os relatórios"""
+        return (
+            f"{self.chamadas_lote} chamadas em lote com {self.respostas_lote} respostas, "
+            f"{self.respostas_fallback} reavaliadas individualmente"
+        )
+    
+    def _on_retry(self, error: BaseException, attempt: int, wait: float, limiter: Optional[RateLimiter] = None):
+        """Um 429 segura a cota do modelo em todas as threads, não só na que recebeu o erro."""
+        if status_code(error) == 429:
+            (limiter or self.limiter).hold(wait)
+    
+    def avaliar_respostas_lote(
+        self, 
+        respostas: List[Resposta], 
+        db: Session,
+        concorrencia: int = 1,
+        ao_concluir: Optional[AoConcluir] = None,
+        lote: int = 1,
+        triagem: bool = False
+    ) -> List[ResultadoAvaliacao]:
+        """Avalia múltiplas respostas em lote (em paralelo com concorrencia > 1,
+        até `lote` respostas à mesma pergunta por chamada; com `triagem`, as
+        decididas pelo comparador numérico vão ao juiz só para as notas)"""
+        
+        motor = MotorAvaliacao(self, db, concorrencia=concorrencia, lote=lote, triagem=triagem)
+        resultados = motor.executar(respostas, ao_concluir)
+        if triagem:
+            logger.info(f"Triagem numérica: correção de {motor.triadas} de {len(respostas)} respostas decidida sem o juiz")
+        
+        for stats in connection_stats(HTTP_PROVIDER_GROQ).values():
+            logger.info(f"Conexões HTTP (Groq): {stats.describe()}")
+        if not self.dry_run:
+            logger.info(f"Banco (avaliações): {motor.gravador.describe()}")
+            logger.info(f"Resiliência (Groq): {self.resilience.describe()}")
+            logger.info(f"Cota (Groq): {self.describe_cotas()}")
+            if lote > 1:
+                logger.info(f"Juiz em lote: {self.describe_lote()}")
+            if self.cascata:
+                logger.info(f"Cascata de juízes: {self.describe_cascata()}")
+            logger.info(f"Saída do juiz: {self.describe_saida()}")
+            logger.info(f"Cache de prompt (Groq): {self.describe_prefixo()}")
+        if self.cache:
+            logger.info(f"Cache do juiz: {self.cache.describe()}")
         
         return resultados
     
@@ -252,18 +1003,23 @@ INSTRUÇÕES GERAIS:
         # Atualizar campos da resposta
         resposta.resposta_correta = avaliacao.resposta_correta
         resposta.fonte_citada = avaliacao.fonte_citada
+        resposta.norma_mencionada = avaliacao.norma_mencionada
+        resposta.item_mencionado = avaliacao.item_mencionado
         resposta.clareza = avaliacao.clareza
         resposta.fundamentacao_tecnica = avaliacao.fundamentacao_tecnica
         resposta.concisao = avaliacao.concisao
         resposta.observacoes = avaliacao.observacoes
+        resposta.origem_avaliacao = ORIGEM_JUIZ
         
         # Recalcular somatório
         resposta.calcular_somatorio()
         
         # Forçar flush antes do commit para detectar erros
+        inicio = time.perf_counter()
         try:
             db.flush()
             db.commit()
+            self.tempo_banco += time.perf_counter() - inicio
             
             # Verificar se foi salvo corretamente
             db.refresh(resposta)
@@ -286,12 +1042,42 @@ INSTRUÇÕES GERAIS:
         norma_tecnica: Optional[str] = None,
         apenas_interessantes: bool = False,
         apenas_duvidosas: bool = False,
-        limit: Optional[int] = None
+        limit: Optional[int] = None,
+        concorrencia: int = 1,
+        ao_concluir: Optional[AoConcluir] = None,
+        lote: int = 1,
+        triagem: bool = False
     ) -> List[ResultadoAvaliacao]:
         """Avalia respostas baseado em filtros específicos"""
         
-        # Construir query com filtros
-        query = db.query(Resposta).join(Pergunta).join(ModeloLLM)
+        respostas = self.buscar_por_filtros(
+            db,
+            modelo_nome=modelo_nome,
+            configuracao=configuracao,
+            norma_tecnica=norma_tecnica,
+            apenas_interessantes=apenas_interessantes,
+            apenas_duvidosas=apenas_duvidosas,
+            limit=limit
+        )
+        return self.avaliar_respostas_lote(respostas, db, concorrencia=concorrencia, ao_concluir=ao_concluir, lote=lote, triagem=triagem)
+    
+    def buscar_por_filtros(
+        self,
+        db: Session,
+        modelo_nome: Optional[str] = None,
+        configuracao: Optional[str] = None,
+        norma_tecnica: Optional[str] = None,
+        apenas_interessantes: bool = False,
+        apenas_duvidosas: bool = False,
+        limit: Optional[int] = None
+    ) -> List[Resposta]:
+        """Respostas com texto que atendem aos filtros, com pergunta e modelo já carregados"""
+        
+        # Construir query com filtros (os joins também carregam pergunta e modelo)
+        query = db.query(Resposta).join(Pergunta).join(ModeloLLM).options(
+            contains_eager(Resposta.pergunta),
+            contains_eager(Resposta.modelo)
+        )
         
         if modelo_nome:
             query = query.filter(ModeloLLM.nome == modelo_nome)
@@ -319,7 +1105,7 @@ INSTRUÇÕES GERAIS:
         
         logger.info(f"Encontradas {len(respostas)} respostas para avaliar")
         
-        return self.avaliar_respostas_lote(respostas, db)
+        return respostas
     
     def get_responses_to_evaluate(
         self,
@@ -329,12 +1115,21 @@ INSTRUÇÕES GERAIS:
         max_responses: Optional[int] = None,
         norma_tecnica: Optional[str] = None,
         apenas_interessantes: bool = False,
-        apenas_duvidosas: bool = False
+        apenas_duvidosas: bool = False,
+        incluir_triadas: bool = False
     ) -> List[Resposta]:
-        """Obter lista de respostas para avaliar, evitando duplicatas (seguindo padrão do ExperimentRunner)"""
+        """Obter lista de respostas para avaliar, evitando duplicatas (seguindo padrão do ExperimentRunner)
+        
+        Respostas decididas pela triagem numérica (sem as notas do juiz) só
+        voltam com `incluir_triadas` ou `overwrite`.
+        """
         
         # Query base: respostas com modelo e configuração específicos
-        query = db.query(Resposta).join(Pergunta).join(ModeloLLM).filter(
+        # (pergunta e modelo carregados pelos próprios joins, para as threads do motor)
+        query = db.query(Resposta).join(Pergunta).join(ModeloLLM).options(
+            contains_eager(Resposta.pergunta),
+            contains_eager(Resposta.modelo)
+        ).filter(
             ModeloLLM.nome == modelo_nome,
             Resposta.configuracao == configuracao
         )
@@ -361,6 +1156,10 @@ INSTRUÇÕES GERAIS:
                 (Resposta.fundamentacao_tecnica.is_(None)) |
                 (Resposta.concisao.is_(None))
             )
+            if not incluir_triadas:
+                query = query.filter(
+                    Resposta.origem_avaliacao.is_(None) | (Resposta.origem_avaliacao != ORIGEM_TRIAGEM)
+                )
         
         # Ordenar por número da pergunta para consistência
         query = query.order_by(Pergunta.numero)
@@ -0,0 +1,305 @@
+"""Motor de avaliação concorrente com gravação em lote das avaliações"""
+
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from .citacoes import detectar_citacoes
+from .comparador import ResultadoComparacao, triar_resposta
+from .models import AvaliacaoContextual, ResultadoAvaliacao
+from ..models import ORIGEM_JUIZ, ORIGEM_TRIAGEM, Resposta
+
+if TYPE_CHECKING:
+    from .contextual_evaluator import ContextualEvaluator
+
+logger = logging.getLogger(__name__)
+
+# Chamado na thread principal a cada resposta concluída (resultado None = falha)
+AoConcluir = Callable[[Resposta, Optional[ResultadoAvaliacao]], None]
+
+# Chamado na thread principal para cada resposta cuja correção a triagem numérica decidiu
+AoTriar = Callable[[Resposta, ResultadoComparacao], None]
+
+
+def valores_avaliacao(resposta_id: int, avaliacao: AvaliacaoContextual) -> Dict[str, Any]:
+    """Colunas de `respostas` atualizadas por uma avaliação (mesmas de `_atualizar_resposta_banco`)."""
+    valores = {
+        "resposta_correta": avaliacao.resposta_correta,
+        "fonte_citada": avaliacao.fonte_citada,
+        "norma_mencionada": avaliacao.norma_mencionada,
+        "item_mencionado": avaliacao.item_mencionado,
+        "clareza": avaliacao.clareza,
+        "fundamentacao_tecnica": avaliacao.fundamentacao_tecnica,
+        "concisao": avaliacao.concisao,
+        "observacoes": avaliacao.observacoes,
+    }
+    # Mesma regra do modelo, sem carregar a linha
+    valores["somatorio"] = Resposta(**valores).calcular_somatorio()
+    return {"id": resposta_id, **valores, "origem_avaliacao": ORIGEM_JUIZ}
+
+
+def valores_triagem(resposta: Resposta, comparacao: ResultadoComparacao) -> Dict[str, Any]:
+    """Colunas gravadas quando a triagem numérica decide a resposta sem o juiz.
+
+    Só a correção e as citações são conhecidas: as notas do juiz e o
+    somatório ficam vazios (um somatório sem as notas não seria comparável)
+    e a origem `triagem` tira a resposta das pendentes.
+    """
+    pergunta = resposta.pergunta
+    deteccao = detectar_citacoes(resposta.resposta_dada, pergunta.norma_tecnica, pergunta.item)
+    return {
+        "id": resposta.id,
+        "resposta_correta": comparacao.correta,
+        "fonte_citada": deteccao.fonte_citada,
+        "norma_mencionada": deteccao.norma_mencionada,
+        "item_mencionado": deteccao.item_mencionado,
+        "clareza": None,
+        "fundamentacao_tecnica": None,
+        "concisao": None,
+        "somatorio": None,
+        "observacoes": f"Triagem numérica: {comparacao.descrever()}",
+        "origem_avaliacao": ORIGEM_TRIAGEM,
+    }
+
+
+class GravadorAvaliacoes:
+    """Acumula avaliações e grava cada lote com um único UPDATE em massa e um commit.
+
+    Usa uma sessão própria no mesmo banco: os commits não expiram os objetos
+    da sessão de consulta, que as threads do motor continuam lendo.
+    """
+
+    def __init__(self, db: Session, flush_size: int = 50, flush_interval: float = 2.0):
+        self.db = Session(bind=db.get_bind())
+        self.flush_size = max(1, flush_size)
+        self.flush_interval = flush_interval
+
+        self.gravadas = 0
+        self.lotes = 0
+        self.tempo_banco = 0.0
+
+        self._buffer: List[Dict[str, Any]] = []
+        self._ultimo_flush = time.monotonic()
+
+    def add(self, resposta_id: int, avaliacao: AvaliacaoContextual):
+        self.add_valores(valores_avaliacao(resposta_id, avaliacao))
+
+    def add_valores(self, valores: Dict[str, Any]):
+        """Linha já pronta ({"id", coluna: valor}), ex.: `valores_triagem`."""
+        self._buffer.append(valores)
+        if len(self._buffer) >= self.flush_size or time.monotonic() - self._ultimo_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        self._ultimo_flush = time.monotonic()
+        if not self._buffer:
+            return
+
+        linhas, self._buffer = self._buffer, []
+        inicio = time.perf_counter()
+        # Um UPDATE em massa (executemany) por conjunto de colunas: avaliações e triagens
+        por_colunas: Dict[tuple, List[Dict[str, Any]]] = {}
+        for linha in linhas:
+            por_colunas.setdefault(tuple(sorted(linha)), []).append(linha)
+        try:
+            for grupo in por_colunas.values():
+                self.db.execute(update(Resposta), grupo)
+            self.db.commit()
+        except Exception as e:
+            self.db.rollback()
+            logger.error(f"Erro ao gravar lote de {len(linhas)} avaliações: {e}")
+            raise
+        self.tempo_banco += time.perf_counter() - inicio
+
+        self.gravadas += len(linhas)
+        self.lotes += 1
+        logger.info(f"Gravadas {len(linhas)} avaliações em lote")
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            self.db.close()
+
+    def describe(self) -> str:
+        return f"{self.gravadas} avaliações gravadas em {self.lotes} lotes, {self.tempo_banco:.2f}s no banco"
+
+
+class MotorAvaliacao:
+    """Avalia respostas em paralelo com concorrência limitada.
+
+    `concorrencia` threads chamam `avaliar_resposta`; a cota RPM/TPM do
+    avaliador é compartilhada entre elas, então a vazão fica limitada só pela
+    cota do juiz. Os resultados voltam para a thread principal, que os grava
+    por um único `GravadorAvaliacoes`. As respostas devem vir com `pergunta`
+    e `modelo` já carregados (ver `get_responses_to_evaluate`): as threads só
+    leem atributos, nunca a sessão.
+
+    Com `lote > 1`, até `lote` respostas à mesma pergunta vão numa única
+    chamada (`avaliar_pergunta_lote`). Com `triagem`, respostas cuja correção
+    o comparador numérico decide com confiança não vão ao juiz: são gravadas
+    com origem `triagem` (`valores_triagem`), sem as notas. Com
+    `juiz_nas_triadas`, elas vão ao juiz uma a uma, com o veredito pronto no
+    prompt, só para as notas (clareza, fundamentação...). Com a cascata de
+    juízes do avaliador, cada resposta vai numa chamada própria (`lote` é
+    ignorado): o escalonamento é decidido resposta a resposta.
+    """
+
+    def __init__(
+        self,
+        evaluator: "ContextualEvaluator",
+        db: Session,
+        concorrencia: int = 4,
+        flush_size: int = 50,
+        flush_interval: float = 2.0,
+        lote: int = 1,
+        triagem: bool = False,
+        juiz_nas_triadas: bool = False
+    ):
+        self.evaluator = evaluator
+        self.db = db
+        self.concorrencia = max(1, concorrencia)
+        self.lote = max(1, lote)
+        if self.lote > 1 and evaluator.cascata:
+            logger.warning("Cascata de juízes ativa: avaliando uma resposta por chamada em vez de lotes")
+            self.lote = 1
+        self.triagem = triagem or juiz_nas_triadas
+        self.juiz_nas_triadas = juiz_nas_triadas
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+
+        self.sucessos = 0
+        self.falhas = 0
+        self.triadas = 0
+        # resposta.id -> veredito da triagem numérica, passado ao juiz (`juiz_nas_triadas`)
+        self._correcoes: Dict[int, ResultadoComparacao] = {}
+        self.tempo_total = 0.0
+        self.gravador: Optional[GravadorAvaliacoes] = None
+
+    def executar(
+        self,
+        respostas: List[Resposta],
+        ao_concluir: Optional[AoConcluir] = None,
+        ao_triar: Optional[AoTriar] = None
+    ) -> List[ResultadoAvaliacao]:
+        """Avalia `respostas` e devolve os resultados do juiz na ordem de entrada."""
+        if not self.evaluator.dry_run:
+            self.gravador = GravadorAvaliacoes(self.db, self.flush_size, self.flush_interval)
+
+        resultados: Dict[int, ResultadoAvaliacao] = {}
+        futuros = {}
+
+        def concluir(futuro):
+            grupo = futuros.pop(futuro)
+            try:
+                avaliacoes = futuro.result()
+            except Exception as e:
+                logger.error(f"Erro ao processar respostas {[respostas[indice].id for indice in grupo]}: {e}")
+                avaliacoes = [None] * len(grupo)
+            for indice, avaliacao in zip(grupo, avaliacoes):
+                resultado = self._concluir(respostas[indice], avaliacao)
+                if resultado:
+                    resultados[indice] = resultado
+                if ao_concluir:
+                    ao_concluir(respostas[indice], resultado)
+
+        inicio = time.monotonic()
+        pendentes = self._triar(respostas, ao_triar) if self.triagem else list(range(len(respostas)))
+        pool = ThreadPoolExecutor(max_workers=self.concorrencia, thread_name_prefix="avaliacao")
+        try:
+            for grupo in self._agrupar(respostas, pendentes):
+                futuros[pool.submit(self._avaliar_grupo, [respostas[indice] for indice in grupo])] = grupo
+            for futuro in as_completed(list(futuros)):
+                concluir(futuro)
+        finally:
+            # Ctrl-C: descarta as avaliações não iniciadas; as que estavam em andamento
+            # terminam e também são gravadas (a chamada já foi paga)
+            pool.shutdown(wait=True, cancel_futures=True)
+            for futuro in [futuro for futuro in futuros if futuro.done() and not futuro.cancelled()]:
+                concluir(futuro)
+            self.tempo_total = time.monotonic() - inicio
+            if self.gravador:
+                self.gravador.close()
+                self.evaluator.tempo_banco += self.gravador.tempo_banco
+
+        return [resultados[indice] for indice in sorted(resultados)]
+
+    def _triar(self, respostas: List[Resposta], ao_triar: Optional[AoTriar]) -> List[int]:
+        """Decide localmente o que der; devolve os índices que ainda precisam do juiz."""
+        pendentes = []
+        for indice, resposta in enumerate(respostas):
+            comparacao = triar_resposta(resposta)
+            if not comparacao.decidido:
+                pendentes.append(indice)
+                continue
+            self.triadas += 1
+            logger.info(f"Resposta {resposta.id} decidida pela triagem numérica: {comparacao.descrever()}")
+            if self.juiz_nas_triadas:
+                self._correcoes[resposta.id] = comparacao
+                pendentes.append(indice)
+            elif self.gravador:
+                self.gravador.add_valores(valores_triagem(resposta, comparacao))
+            if ao_triar:
+                ao_triar(resposta, comparacao)
+        return pendentes
+
+    def _agrupar(self, respostas: List[Resposta], pendentes: List[int]) -> List[List[int]]:
+        """Índices pendentes em grupos de até `lote` respostas à mesma pergunta.
+
+        Respostas com correção da triagem (`juiz_nas_triadas`) vão sozinhas: o
+        veredito entra no prompt.
+        """
+        if self.lote == 1:
+            return [[indice] for indice in pendentes]
+
+        grupos: List[List[int]] = []
+        por_pergunta: Dict[int, List[int]] = {}
+        for indice in pendentes:
+            if respostas[indice].id in self._correcoes:
+                grupos.append([indice])
+            else:
+                por_pergunta.setdefault(respostas[indice].pergunta_id, []).append(indice)
+        return grupos + [
+            indices[inicio:inicio + self.lote]
+            for indices in por_pergunta.values()
+            for inicio in range(0, len(indices), self.lote)
+        ]
+
+    def _avaliar_grupo(self, grupo: List[Resposta]) -> List[Optional[AvaliacaoContextual]]:
+        """Roda numa thread do pool: uma chamada por resposta ou uma por grupo."""
+        if len(grupo) == 1:
+            resposta = grupo[0]
+            return [self.evaluator.avaliar_resposta(resposta.pergunta, resposta, self._correcoes.get(resposta.id))]
+        avaliacoes = self.evaluator.avaliar_pergunta_lote(grupo[0].pergunta, grupo)
+        return [avaliacoes.get(resposta.id) for resposta in grupo]
+
+    def _concluir(self, resposta: Resposta, avaliacao: Optional[AvaliacaoContextual]) -> Optional[ResultadoAvaliacao]:
+        if not avaliacao:
+            self.falhas += 1
+            return None
+
+        self.sucessos += 1
+        if self.gravador:
+            self.gravador.add(resposta.id, avaliacao)
+
+        return ResultadoAvaliacao(
+            avaliacao=avaliacao,
+            score_final=avaliacao.calcular_score_total(),
+            pergunta_numero=resposta.pergunta.numero,
+            modelo_nome=resposta.modelo.nome,
+            configuracao=resposta.configuracao,
+            timestamp=datetime.now().isoformat(),
+            norma_tecnica=resposta.pergunta.norma_tecnica,
+            item_norma=resposta.pergunta.item,
+            flag_resposta_duvidosa=resposta.pergunta.flag_resposta_duvidosa
+        )
+
+    @property
+    def vazao(self) -> float:
+        """Avaliações concluídas por segundo."""
+        return self.sucessos / self.tempo_total if self.tempo_total else 0.0
@@ -1,7 +1,8 @@
 """Modelos Pydantic para avaliação estruturada de respostas"""
 
+from collections import Counter
 from pydantic import BaseModel, Field
-from typing import List
+from typing import Dict, List
 
 
 class AvaliacaoContextual(BaseModel):
@@ -13,20 +14,20 @@ class AvaliacaoContextual(BaseModel):
         description="A resposta está tecnicamente correta conforme a norma técnica citada?"
     )
     
-    # Avaliação de conformidade com norma
+    # Citações: preenchidas pelo detector determinístico (app.evaluation.citacoes), não pelo juiz
     norma_mencionada: bool = Field(
-        ..., 
-        description="A resposta menciona explicitamente a norma técnica correta (ex: NT-09)?"
+        False, 
+        description="Preenchido automaticamente (detector de citações): a resposta menciona a norma técnica correta?"
     )
     
     item_mencionado: bool = Field(
-        ..., 
-        description="A resposta menciona o item/artigo específico da norma (ex: 6.7.3)?"
+        False, 
+        description="Preenchido automaticamente (detector de citações): a resposta menciona o item/artigo da norma?"
     )
     
     fonte_citada: bool = Field(
-        ..., 
-        description="A resposta cita ESPECIFICAMENTE a norma técnica correta E o item/artigo correto (ex: cita NT-09 E 4.9)? Fontes incorretas ou genéricas = False"
+        False, 
+        description="Preenchido automaticamente (detector de citações): cita a norma correta E o item correto?"
     )
     
     # Métricas de qualidade (1-5)
@@ -92,6 +93,10 @@ class AvaliacaoContextual(BaseModel):
         if not self.norma_mencionada and self.conformidade_norma > 3:
             raise ValueError(f"Inconsistência: norma não mencionada mas conformidade_norma={self.conformidade_norma} > 3")
     
+    def avaliacao(self) -> "AvaliacaoContextual":
+        """Só os campos desta classe, sem os extras das subclasses (confianca, resposta_id)"""
+        return AvaliacaoContextual(**self.model_dump(include=set(AvaliacaoContextual.model_fields)))
+    
     # Métricas calculadas
     def calcular_score_total(self) -> float:
         """Calcula score total baseado nas métricas (0-10)"""
@@ -110,6 +115,130 @@ class AvaliacaoContextual(BaseModel):
         return min(10.0, max(0.0, score_final))
 
 
+class AvaliacaoTriagem(AvaliacaoContextual):
+    """Avaliação do juiz rápido da cascata, com a confiança que decide o escalonamento"""
+
+    confianca: float = Field(
+        ...,
+        ge=0.0,
+        le=1.0,
+        description="Confiança na avaliação (0=muito incerta, 1=certeza). Use valores baixos se a resposta for ambígua, parcialmente correta ou se a resposta esperada for duvidosa"
+    )
+
+
+class AvaliacaoCompacta(BaseModel):
+    """Só as notas e uma justificativa curta: poucos tokens de saída para avaliações em massa.
+    
+    As citações vêm do detector e a análise detalhada pode ser pedida depois
+    (`ContextualEvaluator.justificar_avaliacao`).
+    """
+    
+    resposta_correta: bool = Field(
+        ..., 
+        description="A resposta está tecnicamente correta conforme a norma técnica citada?"
+    )
+    
+    clareza: int = Field(..., ge=1, le=5, description="Clareza (1-5)")
+    
+    fundamentacao_tecnica: int = Field(..., ge=1, le=5, description="Fundamentação técnica (1-5; máximo 2 se resposta_correta=False)")
+    
+    concisao: int = Field(..., ge=1, le=5, description="Concisão (1-5)")
+    
+    conformidade_norma: int = Field(..., ge=1, le=5, description="Conformidade com a norma (1-5)")
+    
+    completude_tecnica: int = Field(..., ge=1, le=5, description="Completude técnica (1-5)")
+    
+    justificativa: str = Field(
+        ..., 
+        description="Uma única frase curta (até 25 palavras) com o motivo principal da avaliação"
+    )
+    
+    def avaliacao(self) -> AvaliacaoContextual:
+        """Avaliação completa com a justificativa em `observacoes` e sem listas de pontos"""
+        return AvaliacaoContextual(
+            **self.model_dump(include=set(AvaliacaoCompacta.model_fields) - {"justificativa"}),
+            observacoes=self.justificativa,
+            pontos_corretos=[],
+            pontos_incorretos=[]
+        )
+
+
+class AvaliacaoTriagemCompacta(AvaliacaoCompacta):
+    """Avaliação compacta do juiz rápido da cascata, com a confiança"""
+    
+    confianca: float = AvaliacaoTriagem.model_fields["confianca"]
+
+
+class JustificativaCompleta(BaseModel):
+    """Análise detalhada de uma avaliação já feita, pedida sob demanda"""
+    
+    observacoes: str = Field(
+        ..., 
+        description="Análise detalhada que justifica as notas atribuídas, considerando norma, item e resposta esperada oficial"
+    )
+    
+    pontos_corretos: List[str] = Field(
+        ..., 
+        description="Lista de aspectos específicos que estão corretos na resposta"
+    )
+    
+    pontos_incorretos: List[str] = Field(
+        default_factory=list,
+        description="Lista de aspectos incorretos, ausentes ou imprecisos na resposta"
+    )
+    
+    def formatar(self) -> str:
+        """Texto para a coluna `observacoes`"""
+        partes = [self.observacoes.strip()]
+        if self.pontos_corretos:
+            partes.append("Pontos corretos:\n" + "\n".join(f"- {ponto}" for ponto in self.pontos_corretos))
+        if self.pontos_incorretos:
+            partes.append("Pontos incorretos:\n" + "\n".join(f"- {ponto}" for ponto in self.pontos_incorretos))
+        return "\n\n".join(partes)
+
+
+class AvaliacaoItem(AvaliacaoContextual):
+    """Avaliação de uma das respostas de uma chamada em lote"""
+    
+    resposta_id: int = Field(
+        ..., 
+        description="Identificador da resposta avaliada, exatamente como aparece em [resposta_id=...]"
+    )
+
+
+class AvaliacaoItemCompacta(AvaliacaoCompacta):
+    """Avaliação compacta de uma das respostas de uma chamada em lote"""
+    
+    resposta_id: int = AvaliacaoItem.model_fields["resposta_id"]
+
+
+class AvaliacaoLote(BaseModel):
+    """Avaliações de várias respostas à mesma pergunta em uma única chamada"""
+    
+    avaliacoes: List[AvaliacaoItem] = Field(
+        ..., 
+        description="Uma avaliação independente para cada resposta apresentada, na mesma ordem"
+    )
+    
+    def por_resposta(self, ids: List[int]) -> Dict[int, AvaliacaoContextual]:
+        """Avaliações dos `ids` pedidos; ids desconhecidos ou repetidos são descartados"""
+        contagem = Counter(item.resposta_id for item in self.avaliacoes)
+        return {
+            item.resposta_id: item.avaliacao()
+            for item in self.avaliacoes
+            if item.resposta_id in ids and contagem[item.resposta_id] == 1
+        }
+
+
+class AvaliacaoLoteCompacta(AvaliacaoLote):
+    """Avaliações compactas de várias respostas à mesma pergunta em uma única chamada"""
+    
+    avaliacoes: List[AvaliacaoItemCompacta] = Field(
+        ..., 
+        description="Uma avaliação independente para cada resposta apresentada, na mesma ordem"
+    )
+
+
 class ResultadoAvaliacao(BaseModel):
     """Resultado completo da avaliação para persistir no banco"""
     
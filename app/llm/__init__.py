@@ -0,0 +1 @@
+"""Shared LLM client infrastructure (cache, transport, resilience)"""
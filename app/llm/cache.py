@@ -0,0 +1,132 @@
+"""Content-addressed on-disk cache for LLM responses"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = os.getenv("LLM_CACHE_DIR", ".llm_cache")
+
+
+class ResponseCache:
+    """JSON entries stored under `directory`, keyed by a SHA-256 of the request.
+
+    Entries are evicted least-recently-used first (by file mtime, refreshed on
+    every hit) once the directory grows past `max_bytes`. Identical requests
+    in flight at the same time are coalesced into a single call.
+    """
+
+    def __init__(self, directory: str = DEFAULT_CACHE_DIR, max_bytes: int = 512 * 1024 * 1024):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self._size = sum(path.stat().st_size for path in self.directory.glob("*/*.json"))
+
+    @staticmethod
+    def make_key(**request: Any) -> str:
+        """Stable hash of the request fields (order-independent)."""
+        payload = json.dumps(request, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached entry and mark it as recently used."""
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                value = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+        os.utime(path)
+        return value
+
+    def put(self, key: str, value: Dict[str, Any]):
+        """Write an entry atomically and evict old entries if over budget."""
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        previous_size = path.stat().st_size if path.exists() else 0
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(value, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+        self._size += path.stat().st_size - previous_size
+        if self._size > self.max_bytes:
+            self._evict()
+
+    def _evict(self):
+        """Delete least-recently-used entries until 90% of the budget."""
+        entries = sorted(
+            ((path.stat().st_mtime, path.stat().st_size, path) for path in self.directory.glob("*/*.json")),
+            key=lambda entry: entry[0]
+        )
+        self._size = sum(size for _, size, _ in entries)
+        target = self.max_bytes * 0.9
+
+        removed = 0
+        for _, size, path in entries:
+            if self._size <= target:
+                break
+            path.unlink(missing_ok=True)
+            self._size -= size
+            removed += 1
+
+        logger.info(f"LLM cache evicted {removed} entries ({self._size / 1024 / 1024:.1f} MB kept)")
+
+    async def get_or_call(
+        self,
+        key: str,
+        call: Callable[[], Awaitable[Dict[str, Any]]]
+    ) -> Tuple[Dict[str, Any], bool]:
+        """Return (value, from_cache), calling `call` at most once per key at a time."""
+        cached = self.get(key)
+        if cached is not None:
+            self.hits += 1
+            return cached, True
+
+        pending = self._in_flight.get(key)
+        if pending is not None:
+            self.coalesced += 1
+            return dict(await asyncio.shield(pending)), True
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            value = await call()
+            self.put(key, value)
+            future.set_result(value)
+            return value, False
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Waiters re-raise it; avoid "exception never retrieved" when there are none
+            future.exception()
+            raise
+        finally:
+            del self._in_flight[key]
+
+    def describe(self) -> str:
+        """Short hit/miss summary for run reports."""
+        return (
+            f"{self.hits} hits, {self.coalesced} coalescidas, {self.misses} misses "
+            f"({self._size / 1024 / 1024:.1f} MB)"
+        )
@@ -0,0 +1,150 @@
+"""Record/replay cassettes of LLM and judge traffic for offline, deterministic runs"""
+
+import asyncio
+import gzip
+import json
+import logging
+import threading
+import time
+import zlib
+from collections import defaultdict, deque
+from pathlib import Path
+from typing import Any, Deque, Dict, Tuple
+
+from .cache import ResponseCache
+
+logger = logging.getLogger(__name__)
+
+RECORD = "record"
+REPLAY = "replay"
+
+# Request kinds stored in a cassette
+EXPERIMENT = "experiment"
+JUDGE = "judge"
+
+
+class CassetteMiss(LookupError):
+    """Replay found no recorded response for a request."""
+
+
+class Cassette:
+    """Request/response pairs in a gzip-compressed JSONL file.
+
+    In record mode every successful call is appended as
+    `{"kind", "key", "request", "response", "elapsed"}`; each entry is
+    sync-flushed, so a crashed run keeps what it recorded. Recording into an
+    existing file appends to it.
+
+    In replay mode responses are served by request key, in recorded order
+    for repeated requests (the last one is reused once they run out). Each
+    replay waits `elapsed / speed`: `speed=1` keeps the original timing,
+    `speed=10` compresses it tenfold and `speed=0` answers immediately. The
+    recorded payload, including its measured times, is returned unchanged.
+    """
+
+    def __init__(self, path: str, mode: str = REPLAY, speed: float = 1.0):
+        if mode not in (RECORD, REPLAY):
+            raise ValueError(f"Unknown cassette mode '{mode}' (use '{RECORD}' or '{REPLAY}')")
+        self.path = Path(path)
+        self.mode = mode
+        self.speed = max(0.0, speed)
+
+        self.recorded = 0
+        self.replayed = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._entries: Dict[Tuple[str, str], Deque[Dict[str, Any]]] = defaultdict(deque)
+        self._file = None
+
+        if mode == REPLAY:
+            self._load()
+        else:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = gzip.open(self.path, "ab")
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == RECORD
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == REPLAY
+
+    @staticmethod
+    def make_key(kind: str, **request: Any) -> str:
+        return ResponseCache.make_key(kind=kind, **request)
+
+    def _load(self):
+        if not self.path.exists():
+            raise FileNotFoundError(f"Cassette not found: {self.path}")
+
+        count = 0
+        try:
+            with gzip.open(self.path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    entry = json.loads(line)
+                    self._entries[(entry["kind"], entry["key"])].append(entry)
+                    count += 1
+        except (EOFError, zlib.error, json.JSONDecodeError) as e:
+            # A run that crashed while recording leaves an unterminated stream
+            logger.warning(f"Cassette {self.path} is truncated after {count} entries: {e}")
+
+        logger.info(f"Loaded cassette {self.path}: {count} entries, {len(self._entries)} distinct requests")
+
+    def record(self, kind: str, key: str, request: Dict[str, Any], response: Dict[str, Any], elapsed: float):
+        """Append one successful call."""
+        if not self.recording:
+            return
+        line = json.dumps(
+            {"kind": kind, "key": key, "request": request, "response": response, "elapsed": round(elapsed, 4)},
+            ensure_ascii=False,
+            default=str
+        )
+        with self._lock:
+            self._file.write((line + "\n").encode("utf-8"))
+            self._file.flush(zlib.Z_SYNC_FLUSH)
+            self.recorded += 1
+
+    def _next(self, kind: str, key: str) -> Dict[str, Any]:
+        with self._lock:
+            entries = self._entries.get((kind, key))
+            if not entries:
+                self.misses += 1
+                raise CassetteMiss(f"No recorded {kind} response for request {key[:12]} in {self.path}")
+            entry = entries.popleft() if len(entries) > 1 else entries[0]
+            self.replayed += 1
+        return entry
+
+    def _delay(self, entry: Dict[str, Any]) -> float:
+        return entry.get("elapsed", 0.0) / self.speed if self.speed else 0.0
+
+    async def replay_async(self, kind: str, key: str) -> Dict[str, Any]:
+        """Recorded response for `key`, after the (scaled) original latency."""
+        entry = self._next(kind, key)
+        delay = self._delay(entry)
+        if delay:
+            await asyncio.sleep(delay)
+        return dict(entry["response"])
+
+    def replay(self, kind: str, key: str) -> Dict[str, Any]:
+        """Blocking `replay_async` for synchronous callers (the evaluator)."""
+        entry = self._next(kind, key)
+        delay = self._delay(entry)
+        if delay:
+            time.sleep(delay)
+        return dict(entry["response"])
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def describe(self) -> str:
+        """Short summary for run reports."""
+        if self.recording:
+            return f"{self.recorded} gravadas em {self.path}"
+        speed = "máxima" if not self.speed else f"{self.speed:g}x"
+        return f"{self.replayed} reproduzidas, {self.misses} ausentes ({self.path}, velocidade {speed})"
@@ -0,0 +1,421 @@
+"""OpenAI/Groq-compatible stub LLM server for zero-cost pipeline benchmarks"""
+
+import asyncio
+import json
+import logging
+import os
+import random
+import threading
+import time
+import uuid
+from collections import Counter
+from dataclasses import asdict, dataclass, fields
+from typing import Any, Dict, List, Optional
+
+from fastapi import FastAPI, File, Form, HTTPException, Request, UploadFile
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+
+logger = logging.getLogger(__name__)
+
+# Vocabulary for generated answers
+WORDS = (
+    "a distância mínima entre as saídas de emergência deve ser de 1,5 m conforme "
+    "NT-09 item 6.7.3 da norma técnica do CBMGO para edificações com carga de incêndio "
+    "até 300 MJ/m² e altura inferior a 12 m considerando o caminhamento máximo"
+).split()
+
+
+@dataclass
+class MockSettings:
+    """Latency, token-rate and fault-injection profile of the stub server.
+
+    Every field can be set with `MOCK_LLM_<FIELD>`, e.g. `MOCK_LLM_ERROR_RATE=0.05`.
+    """
+    ttft_ms: float = 400.0  # median time to first token
+    ttft_sigma: float = 0.5  # log-normal spread of the TTFT (0 = fixed)
+    tokens_per_second: float = 60.0
+    output_tokens: int = 200  # mean completion length (±25%)
+    error_rate: float = 0.0  # fraction answered with 500/503
+    rate_limit_rate: float = 0.0  # fraction answered with 429
+    max_concurrency: int = 0  # requests in flight beyond this get 429 (0 = unlimited)
+    retry_after: float = 1.0  # Retry-After of injected 429s (seconds)
+    context_window: int = 0  # prompt + max_tokens beyond this get 400, like Groq (0 = unlimited)
+    seed: Optional[int] = None
+
+    @classmethod
+    def from_env(cls) -> "MockSettings":
+        settings = cls()
+        for item in fields(cls):
+            raw = os.getenv(f"MOCK_LLM_{item.name.upper()}")
+            if raw is None:
+                continue
+            kind = float if item.type in (float, "float") else int
+            setattr(settings, item.name, kind(raw))
+        return settings
+
+
+def _fake_value(schema: Dict[str, Any], defs: Dict[str, Any], rng: random.Random) -> Any:
+    """A value satisfying a (pydantic-generated) JSON schema, for tool-call arguments."""
+    if "$ref" in schema:
+        return _fake_value(defs[schema["$ref"].split("/")[-1]], defs, rng)
+    for key in ("anyOf", "oneOf", "allOf"):
+        if key in schema:
+            options = [option for option in schema[key] if option.get("type") != "null"]
+            return _fake_value(options[0] if options else {}, defs, rng)
+    if "enum" in schema:
+        return rng.choice(schema["enum"])
+
+    kind = schema.get("type")
+    if kind == "object" or "properties" in schema:
+        return {
+            name: _fake_value(prop, defs, rng)
+            for name, prop in schema.get("properties", {}).items()
+        }
+    if kind == "array":
+        return [_fake_value(schema.get("items", {}), defs, rng) for _ in range(rng.randint(1, 3))]
+    if kind == "boolean":
+        return rng.random() < 0.5
+    if kind == "integer":
+        return rng.randint(int(schema.get("minimum", 1)), int(schema.get("maximum", 5)))
+    if kind == "number":
+        return round(rng.uniform(schema.get("minimum", 0.0), schema.get("maximum", 1.0)), 2)
+    return " ".join(rng.choice(WORDS) for _ in range(8))
+
+
+class MockLLM:
+    """Request handling and counters shared by the server routes."""
+
+    def __init__(self, settings: MockSettings):
+        self.settings = settings
+        self.rng = random.Random(settings.seed)
+        self.in_flight = 0
+        self.responses: Counter = Counter()
+        # Batch API state: uploaded/generated files and batches by id
+        self.files: Dict[str, Dict[str, Any]] = {}
+        self.batches: Dict[str, Dict[str, Any]] = {}
+
+    def _ttft(self) -> float:
+        median = self.settings.ttft_ms / 1000
+        if self.settings.ttft_sigma <= 0:
+            return median
+        return self.rng.lognormvariate(0, self.settings.ttft_sigma) * median
+
+    def _output_tokens(self, max_tokens: Optional[int]) -> int:
+        mean = self.settings.output_tokens
+        count = max(1, int(self.rng.uniform(0.75, 1.25) * mean))
+        return min(count, max_tokens) if max_tokens else count
+
+    def _fault(self) -> Optional[JSONResponse]:
+        """An injected error response, if this request draws one."""
+        settings = self.settings
+        throttled = settings.max_concurrency and self.in_flight > settings.max_concurrency
+        draw = self.rng.random()
+        if throttled or draw < settings.rate_limit_rate:
+            return JSONResponse(
+                {"error": {"message": "Rate limit reached (mock)", "type": "rate_limit_exceeded"}},
+                status_code=429,
+                headers={"retry-after": f"{settings.retry_after:g}"}
+            )
+        if draw < settings.rate_limit_rate + settings.error_rate:
+            return JSONResponse(
+                {"error": {"message": "Upstream overloaded (mock)", "type": "server_error"}},
+                status_code=self.rng.choice([500, 503])
+            )
+        return None
+
+    def _context_overflow(self, body: Dict[str, Any]) -> Optional[JSONResponse]:
+        """A 400 when the prompt (messages and tool schemas) plus max_tokens exceed the context window."""
+        window = self.settings.context_window
+        if not window:
+            return None
+        prompt_tokens = (
+            sum(len(str(message.get("content", ""))) for message in body.get("messages", []))
+            + len(json.dumps(body.get("tools", []), ensure_ascii=False))
+        ) // 4
+        requested = prompt_tokens + (body.get("max_tokens") or 0)
+        if requested <= window:
+            return None
+        return JSONResponse(
+            {"error": {
+                "message": f"Please reduce the length of the messages or completion: {requested} > {window} tokens (mock)",
+                "type": "invalid_request_error",
+                "code": "context_length_exceeded",
+            }},
+            status_code=400
+        )
+
+    async def chat_completions(self, request: Request):
+        body = await request.json()
+        self.in_flight += 1
+        try:
+            fault = self._fault()
+            if fault is not None:
+                self.responses[fault.status_code] += 1
+                return fault
+
+            overflow = self._context_overflow(body)
+            if overflow is not None:
+                self.responses[overflow.status_code] += 1
+                return overflow
+
+            self.responses[200] += 1
+            prompt_tokens = sum(len(str(message.get("content", ""))) for message in body.get("messages", [])) // 4
+            output_tokens = self._output_tokens(body.get("max_tokens"))
+            completion_id = f"chatcmpl-mock-{uuid.uuid4().hex[:12]}"
+
+            if body.get("tools"):
+                return await self._tool_call(body, completion_id, prompt_tokens, output_tokens)
+            if body.get("stream"):
+                # The stream outlives this handler; it leaves `in_flight` itself
+                self.in_flight += 1
+                return StreamingResponse(
+                    self._stream(body, completion_id, prompt_tokens, output_tokens),
+                    media_type="text/event-stream"
+                )
+
+            await asyncio.sleep(self._ttft() + output_tokens / self.settings.tokens_per_second)
+            return self._completion(body, completion_id, prompt_tokens, output_tokens)
+        finally:
+            self.in_flight -= 1
+
+    def _completion(self, body: Dict[str, Any], completion_id: str, prompt_tokens: int, output_tokens: int) -> Dict[str, Any]:
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": self._text(output_tokens)},
+                "finish_reason": self._finish_reason(body, output_tokens),
+            }],
+            "usage": self._usage(prompt_tokens, output_tokens),
+        }
+
+    def _add_file(self, content: bytes, filename: str, purpose: str) -> Dict[str, Any]:
+        file_id = f"file-mock-{uuid.uuid4().hex[:12]}"
+        self.files[file_id] = {
+            "id": file_id,
+            "object": "file",
+            "bytes": len(content),
+            "created_at": int(time.time()),
+            "filename": filename,
+            "purpose": purpose,
+            "status": "processed",
+            "content": content,
+        }
+        return {key: value for key, value in self.files[file_id].items() if key != "content"}
+
+    async def upload_file(self, file: UploadFile = File(...), purpose: str = Form(...)):
+        return self._add_file(await file.read(), file.filename or "upload.jsonl", purpose)
+
+    async def file_content(self, file_id: str):
+        if file_id not in self.files:
+            raise HTTPException(status_code=404, detail=f"No such file: {file_id}")
+        return PlainTextResponse(self.files[file_id]["content"].decode("utf-8"))
+
+    async def create_batch(self, request: Request):
+        """Accept a batch and complete it in the background, one generated completion per line."""
+        body = await request.json()
+        input_file = self.files.get(body.get("input_file_id"))
+        if input_file is None:
+            raise HTTPException(status_code=400, detail=f"No such file: {body.get('input_file_id')}")
+
+        requests = [json.loads(line) for line in input_file["content"].decode("utf-8").splitlines() if line.strip()]
+        batch_id = f"batch_mock_{uuid.uuid4().hex[:12]}"
+        self.batches[batch_id] = {
+            "id": batch_id,
+            "object": "batch",
+            "endpoint": body.get("endpoint", "/v1/chat/completions"),
+            "completion_window": body.get("completion_window", "24h"),
+            "input_file_id": input_file["id"],
+            "metadata": body.get("metadata"),
+            "created_at": int(time.time()),
+            "status": "in_progress",
+            "output_file_id": None,
+            "error_file_id": None,
+            "request_counts": {"total": len(requests), "completed": 0, "failed": 0},
+        }
+        asyncio.create_task(self._run_batch(batch_id, requests))
+        return self.batches[batch_id]
+
+    async def get_batch(self, batch_id: str):
+        if batch_id not in self.batches:
+            raise HTTPException(status_code=404, detail=f"No such batch: {batch_id}")
+        return self.batches[batch_id]
+
+    async def _run_batch(self, batch_id: str, requests: List[Dict[str, Any]]):
+        """Answer every request (with the configured fault injection), then publish the output file."""
+        batch = self.batches[batch_id]
+        lines = []
+        for item in requests:
+            body = item.get("body") or {}
+            fault = self._fault() or self._context_overflow(body)
+            if fault is not None:
+                self.responses[fault.status_code] += 1
+                status, response_body = fault.status_code, json.loads(fault.body)
+                batch["request_counts"]["failed"] += 1
+            else:
+                self.responses[200] += 1
+                prompt_tokens = sum(len(str(message.get("content", ""))) for message in body.get("messages", [])) // 4
+                status = 200
+                response_body = self._completion(
+                    body, f"chatcmpl-mock-{uuid.uuid4().hex[:12]}", prompt_tokens, self._output_tokens(body.get("max_tokens"))
+                )
+                batch["request_counts"]["completed"] += 1
+            lines.append({
+                "id": f"batch_req_{uuid.uuid4().hex[:12]}",
+                "custom_id": item.get("custom_id"),
+                "response": {"status_code": status, "request_id": uuid.uuid4().hex, "body": response_body},
+                "error": None,
+            })
+            # Yield so polls observe progress
+            await asyncio.sleep(0)
+
+        content = "".join(json.dumps(line, ensure_ascii=False) + "\n" for line in lines).encode("utf-8")
+        batch["output_file_id"] = self._add_file(content, f"{batch_id}_output.jsonl", "batch_output")["id"]
+        batch["status"] = "completed"
+        batch["completed_at"] = int(time.time())
+
+    async def _tool_call(self, body: Dict[str, Any], completion_id: str, prompt_tokens: int, output_tokens: int):
+        """Structured output (instructor TOOLS mode): arguments generated from the tool's schema."""
+        function = body["tools"][0]["function"]
+        parameters = function.get("parameters", {})
+        arguments = _fake_value(parameters, parameters.get("$defs", {}), self.rng)
+
+        await asyncio.sleep(self._ttft() + output_tokens / self.settings.tokens_per_second)
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model"),
+            "choices": [{
+                "index": 0,
+                "message": {
+                    "role": "assistant",
+                    "content": None,
+                    "tool_calls": [{
+                        "id": f"call_{uuid.uuid4().hex[:12]}",
+                        "type": "function",
+                        "function": {"name": function["name"], "arguments": json.dumps(arguments, ensure_ascii=False)},
+                    }],
+                },
+                "finish_reason": "tool_calls",
+            }],
+            "usage": self._usage(prompt_tokens, output_tokens),
+        }
+
+    async def _stream(self, body: Dict[str, Any], completion_id: str, prompt_tokens: int, output_tokens: int):
+        try:
+            created = int(time.time())
+
+            def chunk(choices: List[Dict[str, Any]], usage: Optional[Dict[str, int]] = None) -> str:
+                payload = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": created,
+                    "model": body.get("model"),
+                    "choices": choices,
+                }
+                if usage is not None:
+                    payload["usage"] = usage
+                return f"data: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+            await asyncio.sleep(self._ttft())
+
+            # Group tokens into chunks of >= 10 ms so high rates don't flood the loop
+            interval = max(1 / self.settings.tokens_per_second, 0.01)
+            per_chunk = max(1, round(self.settings.tokens_per_second * interval))
+            sent = 0
+            while sent < output_tokens:
+                count = min(per_chunk, output_tokens - sent)
+                yield chunk([{"index": 0, "delta": {"content": self._text(count) + " "}, "finish_reason": None}])
+                sent += count
+                if sent < output_tokens:
+                    await asyncio.sleep(interval)
+
+            yield chunk([{"index": 0, "delta": {}, "finish_reason": self._finish_reason(body, output_tokens)}])
+            if (body.get("stream_options") or {}).get("include_usage"):
+                yield chunk([], self._usage(prompt_tokens, output_tokens))
+            yield "data: [DONE]\n\n"
+        finally:
+            self.in_flight -= 1
+
+    def _text(self, tokens: int) -> str:
+        return " ".join(self.rng.choice(WORDS) for _ in range(tokens))
+
+    @staticmethod
+    def _finish_reason(body: Dict[str, Any], output_tokens: int) -> str:
+        return "length" if body.get("max_tokens") and output_tokens >= body["max_tokens"] else "stop"
+
+    @staticmethod
+    def _usage(prompt_tokens: int, output_tokens: int) -> Dict[str, int]:
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": output_tokens,
+            "total_tokens": prompt_tokens + output_tokens,
+        }
+
+
+def create_app(settings: Optional[MockSettings] = None) -> FastAPI:
+    """Stub server answering `/v1/chat/completions` (OpenAI) and `/openai/v1/...` (Groq).
+
+    Also a minimal Batch API (`/files`, `/batches`, `/files/{id}/content`)
+    that completes each batch right after it is created.
+    """
+    mock = MockLLM(settings or MockSettings.from_env())
+    app = FastAPI(title="Mock LLM")
+    app.state.mock = mock
+
+    for prefix in ("/v1", "/openai/v1"):
+        app.add_api_route(f"{prefix}/chat/completions", mock.chat_completions, methods=["POST"])
+        app.add_api_route(f"{prefix}/files", mock.upload_file, methods=["POST"])
+        app.add_api_route(f"{prefix}/files/{{file_id}}/content", mock.file_content, methods=["GET"])
+        app.add_api_route(f"{prefix}/batches", mock.create_batch, methods=["POST"])
+        app.add_api_route(f"{prefix}/batches/{{batch_id}}", mock.get_batch, methods=["GET"])
+
+    @app.get("/v1/models")
+    async def models():
+        return {"object": "list", "data": [{"id": "mock-llm", "object": "model", "owned_by": "mock"}]}
+
+    @app.get("/mock/stats")
+    async def stats():
+        return {
+            "settings": asdict(mock.settings),
+            "in_flight": mock.in_flight,
+            "responses": {str(status): count for status, count in sorted(mock.responses.items())},
+        }
+
+    return app
+
+
+class MockServerThread:
+    """Runs the stub server in a background thread (e.g. inside `benchmark`)."""
+
+    def __init__(self, settings: Optional[MockSettings] = None, host: str = "127.0.0.1", port: int = 0):
+        import uvicorn
+
+        self.app = create_app(settings)
+        self.server = uvicorn.Server(uvicorn.Config(self.app, host=host, port=port, log_level="warning"))
+        self.thread = threading.Thread(target=self.server.run, name="mock-llm", daemon=True)
+        self.host = host
+
+    @property
+    def mock(self) -> MockLLM:
+        return self.app.state.mock
+
+    def start(self, timeout: float = 10.0) -> str:
+        """Start serving and return the base URL (`http://host:port`)."""
+        self.thread.start()
+        deadline = time.monotonic() + timeout
+        while not self.server.started:
+            if time.monotonic() > deadline or not self.thread.is_alive():
+                raise RuntimeError("Mock LLM server failed to start")
+            time.sleep(0.05)
+        port = self.server.servers[0].sockets[0].getsockname()[1]
+        logger.info(f"Mock LLM server listening on {self.host}:{port}")
+        return f"http://{self.host}:{port}"
+
+    def stop(self):
+        self.server.should_exit = True
+        self.thread.join(timeout=10)
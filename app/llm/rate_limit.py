@@ -0,0 +1,132 @@
+"""Token-bucket RPM/TPM rate limiting shared by every caller of an endpoint"""
+
+import asyncio
+import logging
+import threading
+import time
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Refills at `per_minute / 60` units per second up to `capacity`.
+
+    Reservations may drive the level negative: later callers then wait until
+    the debt is repaid, so concurrent callers are spaced out in arrival order
+    instead of racing for the next unit. Not thread-safe on its own.
+    """
+
+    def __init__(self, per_minute: float, capacity: float):
+        self.rate = per_minute / 60
+        self.capacity = max(capacity, 1.0)
+        self.level = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, amount: float, now: float) -> float:
+        """Take `amount` units; returns the seconds to wait before using them.
+
+        A full bucket lets a reservation larger than its capacity through
+        at once; the callers after it repay the debt.
+        """
+        self._refill(now)
+        full = self.level >= self.capacity
+        self.level -= amount
+        return 0.0 if full else max(0.0, -self.level / self.rate)
+
+    def credit(self, amount: float, now: float):
+        """Give back (or, if negative, charge) units after the fact."""
+        self._refill(now)
+        self.level = min(self.capacity, self.level + amount)
+
+    def hold(self, seconds: float, now: float):
+        """Make the next unit available no sooner than `seconds` from now."""
+        self._refill(now)
+        self.level = min(self.level, -seconds * self.rate + 1)
+
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute quota of one endpoint.
+
+    `acquire` blocks (or `acquire_async` awaits) until a request with the
+    estimated token count fits both buckets. Time spent inside earlier calls
+    refills the buckets, so a slow call is not followed by a needless pause.
+    After the call, `settle` corrects the token bucket with the real usage.
+    `burst` is the number of requests that may go out back to back; the
+    default of 1 spaces calls evenly at exactly the quota. Thread-safe; one
+    instance is shared per endpoint (see `get_rate_limiter`).
+    """
+
+    def __init__(self, name: str, rpm: Optional[float] = None, tpm: Optional[float] = None, burst: int = 1):
+        self.name = name
+        self.rpm = rpm
+        self.tpm = tpm
+        self.requests = TokenBucket(rpm, burst) if rpm else None
+        # One burst worth of average-sized requests (a second of quota without an RPM)
+        self.tokens = TokenBucket(tpm, burst * tpm / rpm if rpm else tpm / 60) if tpm else None
+
+        self.calls = 0
+        self.waited = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens: int = 0) -> float:
+        """Book one request of `tokens` tokens; returns the wait before sending it."""
+        with self._lock:
+            now = time.monotonic()
+            wait = 0.0
+            if self.requests:
+                wait = self.requests.reserve(1, now)
+            if self.tokens and tokens:
+                wait = max(wait, self.tokens.reserve(tokens, now))
+            self.calls += 1
+            self.waited += wait
+        return wait
+
+    def acquire(self, tokens: int = 0) -> float:
+        wait = self.reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self, tokens: int = 0) -> float:
+        wait = self.reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def settle(self, estimated: int, actual: Optional[int]):
+        """Replace a request's estimated token count with the provider-reported one."""
+        if not self.tokens or actual is None:
+            return
+        with self._lock:
+            self.tokens.credit(estimated - actual, time.monotonic())
+
+    def hold(self, seconds: float):
+        """Pause every caller, e.g. for the `Retry-After` of a 429."""
+        with self._lock:
+            now = time.monotonic()
+            for bucket in (self.requests, self.tokens):
+                if bucket:
+                    bucket.hold(seconds, now)
+        logger.info(f"Rate limiter {self.name}: holding calls for {seconds:.1f}s")
+
+    def describe(self) -> str:
+        limits = [f"{self.rpm:g} RPM" if self.rpm else None, f"{self.tpm:g} TPM" if self.tpm else None]
+        limit = ", ".join(item for item in limits if item) or "sem limite"
+        return f"{self.name}: {self.calls} chamadas, {self.waited:.1f}s de espera ({limit})"
+
+
+_limiters: Dict[str, RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(name: str, **kwargs) -> RateLimiter:
+    """Process-wide limiter for an endpoint, so every thread and task shares its quota."""
+    with _limiters_lock:
+        if name not in _limiters:
+            _limiters[name] = RateLimiter(name, **kwargs)
+        return _limiters[name]
@@ -0,0 +1,199 @@
+"""Declarative provider/model registry for the experiment API clients"""
+
+import logging
+import os
+import tomllib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+from openai import AsyncOpenAI
+
+from .transport import get_async_http_client
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REGISTRY_PATH = os.getenv("LLM_REGISTRY", "llm_providers.toml")
+
+# Provider used for models missing from the registry: LLM_BASE_URL/LLM_API_KEY
+LEGACY_PROVIDER = "llm"
+
+# Internal model -> API model for the single-backend setup, by backend kind
+LEGACY_API_MODELS: Dict[str, Dict[str, str]] = {
+    "deepseek": {
+        "deepseek-r1": "deepseek-reasoner",
+        "deepseek-v3": "deepseek-chat",
+        "claude-opus-4": "deepseek-chat",  # Fallback para testes
+        "gemini-2.5-pro": "deepseek-chat",  # Fallback para testes
+        "gemini-2.5-flash": "deepseek-chat",  # Fallback para testes
+        "openai/gpt-4.0": "deepseek-chat",  # Fallback para testes
+        "openai/gpt-4.1": "deepseek-chat",  # Fallback para testes
+        "openai/o3": "deepseek-reasoner",  # Fallback para testes
+    },
+    "github": {
+        # GitHub Models mapping (publisher/model format)
+        "openai/gpt-4.0": "OpenAI/gpt-4o",
+        "openai/gpt-4.1": "OpenAI/gpt-4o",
+        "openai/o3": "OpenAI/o1-preview",
+        "gemini-2.5-pro": "OpenAI/gpt-4o",  # Fallback para testes
+        "gemini-2.5-flash": "OpenAI/gpt-4o-mini",  # Fallback para testes
+    },
+    "openai": {
+        "openai/gpt-4.0": "gpt-4o",
+        "openai/gpt-4.1": "gpt-4o",
+        "openai/o3": "o1-preview",
+        "gemini-2.5-pro": "gpt-4o",  # Fallback para testes
+        "gemini-2.5-flash": "gpt-4o-mini",  # Fallback para testes
+    },
+}
+
+
+@dataclass(frozen=True)
+class ProviderConfig:
+    """One OpenAI-compatible backend."""
+    name: str
+    base_url: Optional[str]
+    api_key_env: str
+    max_concurrency: Optional[int] = None
+
+    @property
+    def host(self) -> str:
+        return urlparse(self.base_url or "https://api.openai.com").netloc
+
+    @property
+    def api_key(self) -> Optional[str]:
+        if self.name == LEGACY_PROVIDER:
+            return os.getenv("LLM_API_KEY") or os.getenv("OPENAI_API_KEY")
+        return os.getenv(self.api_key_env)
+
+
+@dataclass(frozen=True)
+class ModelRoute:
+    """Where and how an internal model (`ModeloLLM.nome`) is called."""
+    nome: str
+    provider: ProviderConfig
+    api_model: str
+    max_concurrency: Optional[int] = None
+    # USD per million tokens; cached input defaults to the input price
+    input_price: Optional[float] = None
+    output_price: Optional[float] = None
+    cached_input_price: Optional[float] = None
+
+    def cost(self, input_tokens: int, output_tokens: int, cached_tokens: int = 0) -> Optional[float]:
+        """USD cost of the given token counts (None without pricing)."""
+        if self.input_price is None or self.output_price is None:
+            return None
+        cached_price = self.cached_input_price if self.cached_input_price is not None else self.input_price
+        return (
+            (input_tokens - cached_tokens) * self.input_price
+            + cached_tokens * cached_price
+            + output_tokens * self.output_price
+        ) / 1_000_000
+
+    @property
+    def key(self) -> str:
+        """Rate-limit domain: backend host plus API model."""
+        return f"{self.provider.host}/{self.api_model}"
+
+
+class ModelRegistry:
+    """Resolves internal model names to provider, endpoint and API model.
+
+    Read from a TOML file (`llm_providers.toml`, or `LLM_REGISTRY`):
+
+        [providers.deepseek]
+        base_url = "https://api.deepseek.com"
+        api_key_env = "DEEPSEEK_API_KEY"
+        max_concurrency = 8
+
+        [models."deepseek-v3"]
+        provider = "deepseek"
+        api_model = "deepseek-chat"
+        input_price = 0.27           # USD / 1M tokens (optional)
+        output_price = 1.10
+
+    Models not listed fall back to the single `LLM_BASE_URL` backend and its
+    built-in name mapping. One AsyncOpenAI client is built per provider, on
+    first use, over the pooled transport for that provider.
+    """
+
+    def __init__(
+        self,
+        providers: Optional[Dict[str, ProviderConfig]] = None,
+        routes: Optional[Dict[str, ModelRoute]] = None
+    ):
+        self.providers = dict(providers or {})
+        self.routes = dict(routes or {})
+        self._clients: Dict[str, AsyncOpenAI] = {}
+
+        base_url = os.getenv("LLM_BASE_URL") or None
+        self.legacy_provider = ProviderConfig(LEGACY_PROVIDER, base_url, "LLM_API_KEY")
+        if "deepseek" in (base_url or ""):
+            self._legacy_map = LEGACY_API_MODELS["deepseek"]
+        elif "github" in (base_url or ""):
+            self._legacy_map = LEGACY_API_MODELS["github"]
+        else:
+            self._legacy_map = LEGACY_API_MODELS["openai"]
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_REGISTRY_PATH) -> "ModelRegistry":
+        """Load the registry file; a missing file means legacy routing only."""
+        file = Path(path)
+        if not file.exists():
+            return cls()
+
+        with open(file, "rb") as f:
+            data = tomllib.load(f)
+
+        providers = {
+            name: ProviderConfig(
+                name=name,
+                base_url=item.get("base_url"),
+                api_key_env=item.get("api_key_env", f"{name.upper()}_API_KEY"),
+                max_concurrency=item.get("max_concurrency")
+            )
+            for name, item in data.get("providers", {}).items()
+        }
+
+        routes = {}
+        for nome, item in data.get("models", {}).items():
+            provider_name = item.get("provider")
+            if provider_name not in providers:
+                raise ValueError(f"{file}: model '{nome}' uses unknown provider '{provider_name}'")
+            provider = providers[provider_name]
+            routes[nome] = ModelRoute(
+                nome=nome,
+                provider=provider,
+                api_model=item.get("api_model", nome),
+                max_concurrency=item.get("max_concurrency", provider.max_concurrency),
+                input_price=item.get("input_price"),
+                output_price=item.get("output_price"),
+                cached_input_price=item.get("cached_input_price")
+            )
+
+        logger.info(f"Loaded model registry {file}: {len(providers)} providers, {len(routes)} models")
+        return cls(providers, routes)
+
+    def resolve(self, nome: str) -> ModelRoute:
+        """Route for an internal model name."""
+        route = self.routes.get(nome)
+        if route is not None:
+            return route
+        return ModelRoute(nome, self.legacy_provider, self._legacy_map.get(nome, nome))
+
+    def client(self, provider: ProviderConfig) -> AsyncOpenAI:
+        """The provider's AsyncOpenAI client, built once."""
+        if provider.name not in self._clients:
+            api_key = provider.api_key
+            if not api_key:
+                if provider.name == LEGACY_PROVIDER:
+                    raise ValueError("LLM_API_KEY or OPENAI_API_KEY environment variable not set")
+                raise ValueError(f"{provider.api_key_env} environment variable not set (provider {provider.name})")
+
+            # Retries are handled by app.llm.resilience, not the SDK
+            kwargs = {"api_key": api_key, "http_client": get_async_http_client(provider.name), "max_retries": 0}
+            if provider.base_url:
+                kwargs["base_url"] = provider.base_url
+            self._clients[provider.name] = AsyncOpenAI(**kwargs)
+        return self._clients[provider.name]
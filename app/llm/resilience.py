@@ -0,0 +1,303 @@
+"""Retry with backoff and per-endpoint circuit breaking for LLM API calls"""
+
+import asyncio
+import logging
+import random
+import threading
+import time
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Dict, Mapping, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Throttling, timeouts and server-side failures; other 4xx are caller bugs
+RETRYABLE_STATUS = {408, 409, 425, 429, 500, 502, 503, 504}
+
+
+def parse_retry_after(headers: Optional[Mapping[str, str]]) -> Optional[float]:
+    """Return the wait in seconds requested by `Retry-After`/`retry-after-ms`, if any."""
+    if not headers:
+        return None
+
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms:
+        try:
+            return max(0.0, float(retry_after_ms) / 1000)
+        except ValueError:
+            pass
+
+    retry_after = headers.get("retry-after")
+    if not retry_after:
+        return None
+
+    try:
+        return max(0.0, float(retry_after))
+    except ValueError:
+        pass
+
+    # HTTP-date format
+    try:
+        retry_at = parsedate_to_datetime(retry_after)
+        return max(0.0, retry_at.timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _api_error(exc: BaseException) -> BaseException:
+    """The underlying SDK/transport error (instructor wraps it as the cause)."""
+    seen = set()
+    while exc is not None and id(exc) not in seen:
+        seen.add(id(exc))
+        if getattr(exc, "status_code", None) is not None or isinstance(exc, (httpx.HTTPError, CircuitOpenError)):
+            return exc
+        if type(exc).__name__ in ("APIConnectionError", "APITimeoutError"):
+            return exc
+        exc = exc.__cause__
+    return exc
+
+
+def status_code(exc: BaseException) -> Optional[int]:
+    """HTTP status of an API error, if it carries one."""
+    return getattr(_api_error(exc), "status_code", None)
+
+
+def retry_after(exc: BaseException) -> Optional[float]:
+    """Server-requested wait attached to an API error, if any."""
+    error = _api_error(exc)
+    if isinstance(error, CircuitOpenError):
+        return error.retry_after
+    response = getattr(error, "response", None)
+    return parse_retry_after(getattr(response, "headers", None))
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """Whether repeating the same request may succeed."""
+    error = _api_error(exc)
+    if error is None:
+        return False
+    if isinstance(error, CircuitOpenError):
+        return True
+    status = getattr(error, "status_code", None)
+    if status is not None:
+        return status in RETRYABLE_STATUS or status >= 500
+    # SDK connection/timeout errors carry no status code
+    return (
+        isinstance(error, (httpx.TimeoutException, httpx.NetworkError, httpx.RemoteProtocolError))
+        or type(error).__name__ in ("APIConnectionError", "APITimeoutError")
+    )
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an endpoint whose breaker is open."""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"Circuit breaker for {name} is open (retry in {retry_after:.0f}s)")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Closed / open / half-open breaker for one provider endpoint.
+
+    After `failure_threshold` consecutive server or network failures the
+    breaker opens and calls fail fast with `CircuitOpenError`. Once
+    `reset_timeout` has passed a single probe is let through: success closes
+    the breaker, failure opens it again. Rate limits (429) do not count, the
+    concurrency controller handles those.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.times_opened = 0
+
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def before_call(self) -> bool:
+        """Raise `CircuitOpenError` unless the call may go through.
+
+        Returns True if the call is the half-open probe; its caller must end
+        it with `record_success`, `record_failure` or `release_probe`.
+        """
+        with self._lock:
+            if self.state == "closed":
+                return False
+
+            remaining = self._opened_at + self.reset_timeout - time.monotonic()
+            if self.state == "open" and remaining <= 0:
+                self.state = "half-open"
+                logger.info(f"Circuit breaker {self.name}: half-open, sending probe")
+
+            if self.state == "half-open" and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+
+            raise CircuitOpenError(self.name, max(remaining, 1.0))
+
+    def record_success(self):
+        with self._lock:
+            if self.state != "closed":
+                logger.info(f"Circuit breaker {self.name}: closed")
+            self.state = "closed"
+            self.consecutive_failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.consecutive_failures += 1
+            if self.state == "half-open" or (
+                self.state == "closed" and self.consecutive_failures >= self.failure_threshold
+            ):
+                self.state = "open"
+                self.times_opened += 1
+                self._opened_at = time.monotonic()
+                logger.warning(
+                    f"Circuit breaker {self.name}: open after {self.consecutive_failures} "
+                    f"consecutive failures (reset in {self.reset_timeout:.0f}s)"
+                )
+            self._probe_in_flight = False
+
+    def release_probe(self):
+        """Free the half-open probe slot after a result that proves nothing (e.g. 4xx)."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def describe(self) -> str:
+        labels = {"closed": "fechado", "open": "aberto", "half-open": "meio-aberto"}
+        return f"{self.name}: {labels[self.state]} (aberto {self.times_opened}x)"
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def get_circuit_breaker(name: str, **kwargs: Any) -> CircuitBreaker:
+    """Process-wide breaker for an endpoint, so every client of it shares state."""
+    if name not in _breakers:
+        _breakers[name] = CircuitBreaker(name, **kwargs)
+    return _breakers[name]
+
+
+@dataclass
+class RetryPolicy:
+    """Exponential backoff with full jitter, honouring `Retry-After`.
+
+    A server-requested wait longer than `max_retry_after` (e.g. a daily
+    quota) is not worth waiting for in-run, so the call gives up instead.
+    """
+    max_attempts: int = 4
+    base_delay: float = 1.0
+    max_delay: float = 30.0
+    max_retry_after: float = 300.0
+
+    def delay(self, attempt: int, requested: Optional[float] = None) -> Optional[float]:
+        """Wait before retry number `attempt` (1-based), or None to give up."""
+        if attempt >= self.max_attempts:
+            return None
+        if requested is not None:
+            return requested if requested <= self.max_retry_after else None
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+
+RetryCallback = Callable[[BaseException, int, float], None]
+
+
+class ResilientCaller:
+    """Runs API calls through a circuit breaker, retrying transient failures."""
+
+    def __init__(self, breaker: CircuitBreaker, policy: Optional[RetryPolicy] = None):
+        self.breaker = breaker
+        self.policy = policy or RetryPolicy()
+
+        self.calls = 0
+        self.retries = 0
+        self.gave_up = 0
+
+    def _on_failure(self, exc: BaseException, attempt: int) -> Optional[float]:
+        """Update the breaker and return the backoff, or None to re-raise."""
+        status = status_code(exc)
+        if isinstance(_api_error(exc), CircuitOpenError):
+            pass
+        elif is_retryable(exc) and status != 429:
+            self.breaker.record_failure()
+        else:
+            self.breaker.release_probe()
+
+        wait = self.policy.delay(attempt, retry_after(exc)) if is_retryable(exc) else None
+        if wait is None:
+            if is_retryable(exc):
+                self.gave_up += 1
+            return None
+
+        self.retries += 1
+        logger.warning(
+            f"Retrying {self.breaker.name} call in {wait:.1f}s "
+            f"(attempt {attempt + 1}/{self.policy.max_attempts}): {exc}"
+        )
+        return wait
+
+    async def call(self, fn: Callable[[], Awaitable[Any]], on_retry: Optional[RetryCallback] = None) -> Any:
+        self.calls += 1
+        attempt = 1
+        while True:
+            probe = False
+            try:
+                probe = self.breaker.before_call()
+                result = await fn()
+            except Exception as e:
+                wait = self._on_failure(e, attempt)
+                if wait is None:
+                    raise
+                if on_retry:
+                    on_retry(e, attempt, wait)
+                await asyncio.sleep(wait)
+                attempt += 1
+                continue
+            except BaseException:
+                # Cancelled or interrupted mid-call: don't leave the half-open probe claimed forever
+                if probe:
+                    self.breaker.release_probe()
+                raise
+
+            self.breaker.record_success()
+            return result
+
+    def call_sync(self, fn: Callable[[], Any], on_retry: Optional[RetryCallback] = None) -> Any:
+        self.calls += 1
+        attempt = 1
+        while True:
+            probe = False
+            try:
+                probe = self.breaker.before_call()
+                result = fn()
+            except Exception as e:
+                wait = self._on_failure(e, attempt)
+                if wait is None:
+                    raise
+                if on_retry:
+                    on_retry(e, attempt, wait)
+                time.sleep(wait)
+                attempt += 1
+                continue
+            except BaseException:
+                # Cancelled or interrupted mid-call: don't leave the half-open probe claimed forever
+                if probe:
+                    self.breaker.release_probe()
+                raise
+
+            self.breaker.record_success()
+            return result
+
+    def describe(self) -> str:
+        return (
+            f"{self.retries} retentativas em {self.calls} chamadas, "
+            f"{self.gave_up} desistências · circuito {self.breaker.describe()}"
+        )
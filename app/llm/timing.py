@@ -0,0 +1,196 @@
+"""Per-attempt phase timings of LLM API calls and their latency percentiles"""
+
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+
+from ..models import ModeloLLM, TempoExecucao
+from .resilience import status_code
+
+# Phases reported by the analysis views, in pipeline order
+PHASES = ["espera_ms", "conexao_ms", "primeiro_token_ms", "geracao_ms", "gravacao_banco_ms", "total_ms"]
+PERCENTILES = [50, 95, 99]
+
+
+@dataclass
+class AttemptTiming:
+    """Phase durations (milliseconds) of one API attempt."""
+    tentativa: int
+    espera_ms: float  # queue wait (first attempt) or retry backoff
+    started: float
+    conexao_ms: float = 0.0  # TCP connect + TLS, 0 on a reused connection
+    primeiro_token_ms: Optional[float] = None
+    geracao_ms: Optional[float] = None
+    total_ms: Optional[float] = None
+    sucesso: bool = False
+    status_http: Optional[int] = None
+    erro: Optional[str] = None
+
+    _connect_started: Optional[float] = field(default=None, repr=False)
+
+    def values(self) -> Dict[str, Any]:
+        """Column values for `tempos_execucao`."""
+        return {
+            "tentativa": self.tentativa,
+            "sucesso": self.sucesso,
+            "status_http": self.status_http,
+            "erro": self.erro[:200] if self.erro else None,
+            "espera_ms": round(self.espera_ms, 3),
+            "conexao_ms": round(self.conexao_ms, 3),
+            "primeiro_token_ms": round(self.primeiro_token_ms, 3) if self.primeiro_token_ms is not None else None,
+            "geracao_ms": round(self.geracao_ms, 3) if self.geracao_ms is not None else None,
+            "total_ms": round(self.total_ms, 3) if self.total_ms is not None else None,
+        }
+
+
+class CallTimings:
+    """Attempts of one logical call (one experiment cell), retries included.
+
+    `queued_at` is when the cell became ready to run, so the first attempt's
+    wait is the time spent behind the concurrency limiter; later attempts
+    wait for the retry backoff.
+    """
+
+    def __init__(self, queued_at: Optional[float] = None):
+        self.queued_at = queued_at if queued_at is not None else time.perf_counter()
+        self.attempts: List[AttemptTiming] = []
+        self._last_end = self.queued_at
+
+    def start_attempt(self) -> AttemptTiming:
+        now = time.perf_counter()
+        attempt = AttemptTiming(
+            tentativa=len(self.attempts) + 1,
+            espera_ms=(now - self._last_end) * 1000,
+            started=now
+        )
+        self.attempts.append(attempt)
+        return attempt
+
+    def finish_attempt(
+        self,
+        attempt: AttemptTiming,
+        result: Optional[Dict[str, Any]] = None,
+        error: Optional[BaseException] = None
+    ):
+        now = time.perf_counter()
+        self._last_end = now
+        attempt.total_ms = (now - attempt.started) * 1000
+        if error is not None:
+            attempt.status_http = status_code(error)
+            attempt.erro = f"{type(error).__name__}: {error}"
+            return
+
+        attempt.sucesso = True
+        first_response_time = (result or {}).get("first_response_time")
+        if first_response_time is not None:
+            attempt.primeiro_token_ms = first_response_time * 1000
+            attempt.geracao_ms = max(0.0, attempt.total_ms - attempt.primeiro_token_ms)
+
+    def rows(self) -> List[Dict[str, Any]]:
+        return [attempt.values() for attempt in self.attempts]
+
+
+# Set by the runner around each call/attempt; contextvars follow asyncio tasks
+current_call: ContextVar[Optional[CallTimings]] = ContextVar("current_call", default=None)
+current_attempt: ContextVar[Optional[AttemptTiming]] = ContextVar("current_attempt", default=None)
+
+
+def trace_connect(event_name: str):
+    """Feed httpcore trace events into the current attempt's connect time."""
+    attempt = current_attempt.get()
+    if attempt is None:
+        return
+    if event_name in ("connection.connect_tcp.started", "connection.start_tls.started"):
+        attempt._connect_started = time.perf_counter()
+    elif event_name in ("connection.connect_tcp.complete", "connection.start_tls.complete"):
+        if attempt._connect_started is not None:
+            attempt.conexao_ms += (time.perf_counter() - attempt._connect_started) * 1000
+            attempt._connect_started = None
+
+
+@dataclass
+class LatencyPercentiles:
+    """p50/p95/p99 of every phase for one model/config."""
+    modelo: str
+    configuracao: str
+    tentativas: int
+    falhas: int
+    percentis: Dict[str, Dict[int, Optional[float]]]  # phase -> pct -> ms
+
+
+def nearest_rank(values: Iterable[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile of `values` (None when empty)."""
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    rank = max(1, int(round(pct / 100 * len(ordered))))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def latency_percentiles(
+    db: Session,
+    model_filter: Optional[str] = None,
+    config_filter: Optional[str] = None
+) -> List[LatencyPercentiles]:
+    """Phase percentiles per model/config over every recorded attempt.
+
+    PostgreSQL computes them with `percentile_cont`; other databases (the
+    SQLite used in development) fall back to nearest-rank in Python.
+    """
+    group = [ModeloLLM.nome, TempoExecucao.configuracao]
+    counts = db.query(
+        *group,
+        func.count(TempoExecucao.id),
+        func.sum(case((TempoExecucao.sucesso.is_(False), 1), else_=0)),
+    ).join(ModeloLLM, ModeloLLM.id == TempoExecucao.modelo_id)
+    counts = _filtered(counts, model_filter, config_filter).group_by(*group)
+
+    results = {
+        (nome, config): LatencyPercentiles(nome, config, total, int(falhas or 0), {})
+        for nome, config, total, falhas in counts.all()
+    }
+    if not results:
+        return []
+
+    if db.bind.dialect.name == "postgresql":
+        columns = [
+            func.percentile_cont(pct / 100).within_group(getattr(TempoExecucao, phase)).label(f"{phase}_{pct}")
+            for phase in PHASES for pct in PERCENTILES
+        ]
+        query = db.query(*group, *columns).join(ModeloLLM, ModeloLLM.id == TempoExecucao.modelo_id)
+        for row in _filtered(query, model_filter, config_filter).group_by(*group).all():
+            item = results[(row[0], row[1])]
+            for phase in PHASES:
+                item.percentis[phase] = {
+                    pct: float(value) if (value := getattr(row, f"{phase}_{pct}")) is not None else None
+                    for pct in PERCENTILES
+                }
+    else:
+        query = db.query(*group, *[getattr(TempoExecucao, phase) for phase in PHASES]).join(
+            ModeloLLM, ModeloLLM.id == TempoExecucao.modelo_id
+        )
+        samples: Dict[tuple, Dict[str, List[float]]] = {}
+        for row in _filtered(query, model_filter, config_filter).all():
+            phases = samples.setdefault((row[0], row[1]), {phase: [] for phase in PHASES})
+            for phase, value in zip(PHASES, row[2:]):
+                if value is not None:
+                    phases[phase].append(float(value))
+        for key, phases in samples.items():
+            results[key].percentis = {
+                phase: {pct: nearest_rank(values, pct) for pct in PERCENTILES}
+                for phase, values in phases.items()
+            }
+
+    return sorted(results.values(), key=lambda item: (item.modelo, item.configuracao))
+
+
+def _filtered(query, model_filter: Optional[str], config_filter: Optional[str]):
+    if model_filter:
+        query = query.filter(ModeloLLM.nome == model_filter)
+    if config_filter:
+        query = query.filter(TempoExecucao.configuracao == config_filter)
+    return query
@@ -0,0 +1,168 @@
+"""Shared pooled HTTP transport for the LLM SDK clients"""
+
+import logging
+import os
+import threading
+from dataclasses import dataclass, fields
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
+
+from .timing import trace_connect
+
+logger = logging.getLogger(__name__)
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+@dataclass
+class TransportSettings:
+    """Pool, keep-alive and timeout settings for one provider.
+
+    Every field can be set with `HTTP_<FIELD>` for all providers and
+    overridden with `HTTP_<PROVIDER>_<FIELD>`, e.g. `HTTP_GROQ_READ_TIMEOUT=60`.
+    HTTP/2 is opt-in (`HTTP_HTTP2=true`) and needs `h2` (`httpx[http2]`),
+    which is not a project dependency.
+    """
+    max_connections: int = 32
+    max_keepalive_connections: int = 16
+    keepalive_expiry: float = 30.0
+    http2: bool = False
+    connect_timeout: float = 10.0
+    read_timeout: float = 180.0
+    write_timeout: float = 30.0
+    pool_timeout: float = 30.0
+
+    @classmethod
+    def from_env(cls, provider: str) -> "TransportSettings":
+        settings = cls()
+        for item in fields(cls):
+            name = item.name.upper()
+            raw = os.getenv(f"HTTP_{provider.upper()}_{name}") or os.getenv(f"HTTP_{name}")
+            if raw is None:
+                continue
+            if item.type in (bool, "bool"):
+                value: Any = raw.strip().lower() in ("1", "true", "yes", "on")
+            elif item.type in (int, "int"):
+                value = int(raw)
+            else:
+                value = float(raw)
+            setattr(settings, item.name, value)
+        return settings
+
+    @property
+    def timeout(self) -> httpx.Timeout:
+        return httpx.Timeout(
+            connect=self.connect_timeout,
+            read=self.read_timeout,
+            write=self.write_timeout,
+            pool=self.pool_timeout
+        )
+
+    @property
+    def limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry
+        )
+
+
+@dataclass
+class ConnectionStats:
+    """Requests sent vs. new TCP connections opened for one provider."""
+    requests: int = 0
+    connections: int = 0
+
+    @property
+    def reused(self) -> int:
+        return max(0, self.requests - self.connections)
+
+    def describe(self) -> str:
+        rate = self.reused / self.requests * 100 if self.requests else 0.0
+        return f"{self.requests} requisições, {self.connections} conexões novas ({rate:.0f}% reaproveitadas)"
+
+
+_clients: Dict[Tuple[str, str], httpx.Client | httpx.AsyncClient] = {}
+_stats: Dict[str, ConnectionStats] = {}
+# Guards the check-then-insert on _clients/_stats across worker threads
+_lock = threading.Lock()
+
+
+def _client_kwargs(provider: str) -> Dict[str, Any]:
+    settings = TransportSettings.from_env(provider)
+    http2 = settings.http2 and HTTP2_AVAILABLE
+    if settings.http2 and not HTTP2_AVAILABLE:
+        logger.warning(
+            f"HTTP/2 requested for {provider} but 'h2' is not installed "
+            "(pip install 'httpx[http2]'); using HTTP/1.1"
+        )
+
+    logger.info(
+        f"HTTP transport for {provider}: pool {settings.max_connections} "
+        f"(keep-alive {settings.max_keepalive_connections}, {settings.keepalive_expiry:.0f}s), "
+        f"{'HTTP/2' if http2 else 'HTTP/1.1'}, connect {settings.connect_timeout:.0f}s, "
+        f"read {settings.read_timeout:.0f}s"
+    )
+    return {
+        "http2": http2,
+        "limits": settings.limits,
+        "timeout": settings.timeout,
+        "follow_redirects": True,
+    }
+
+
+def get_async_http_client(provider: str) -> httpx.AsyncClient:
+    """Pooled async client shared by every SDK client of `provider`.
+
+    Connections are bound to the event loop that opened them, so use it
+    within a single `asyncio.run`.
+    """
+    key = (provider, "async")
+    with _lock:
+        if key not in _clients:
+            stats = _stats.setdefault(provider, ConnectionStats())
+
+            async def trace(event_name: str, info: Dict[str, Any]):
+                if event_name == "connection.connect_tcp.complete":
+                    stats.connections += 1
+                trace_connect(event_name)
+
+            async def on_request(request: httpx.Request):
+                stats.requests += 1
+                request.extensions["trace"] = trace
+
+            _clients[key] = httpx.AsyncClient(event_hooks={"request": [on_request]}, **_client_kwargs(provider))
+        return _clients[key]
+
+
+def get_http_client(provider: str) -> httpx.Client:
+    """Pooled sync client shared by every SDK client of `provider` (thread-safe)."""
+    key = (provider, "sync")
+    with _lock:
+        if key not in _clients:
+            stats = _stats.setdefault(provider, ConnectionStats())
+
+            def trace(event_name: str, info: Dict[str, Any]):
+                if event_name == "connection.connect_tcp.complete":
+                    stats.connections += 1
+                trace_connect(event_name)
+
+            def on_request(request: httpx.Request):
+                stats.requests += 1
+                request.extensions["trace"] = trace
+
+            _clients[key] = httpx.Client(event_hooks={"request": [on_request]}, **_client_kwargs(provider))
+        return _clients[key]
+
+
+def connection_stats(provider: Optional[str] = None) -> Dict[str, ConnectionStats]:
+    """Connection-reuse counters, for all providers or just one."""
+    if provider is not None:
+        return {provider: _stats[provider]} if provider in _stats else {}
+    return dict(_stats)
+
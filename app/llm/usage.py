@@ -0,0 +1,114 @@
+"""Token usage, throughput and cost aggregates per model"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import Integer, case, func
+from sqlalchemy.orm import Session
+
+from ..models import ModeloLLM, Resposta
+from .registry import ModelRegistry
+
+
+def usage_values(usage: Any) -> Dict[str, Optional[int]]:
+    """Token counts from an API `usage` object or dict (batch output).
+    
+    Reasoning tokens come from `completion_tokens_details`; cached prompt
+    tokens from `prompt_tokens_details` (OpenAI) or `prompt_cache_hit_tokens`
+    (DeepSeek).
+    """
+    if usage is None:
+        return {}
+    if hasattr(usage, "model_dump"):
+        usage = usage.model_dump()
+    
+    completion_details = usage.get("completion_tokens_details") or {}
+    prompt_details = usage.get("prompt_tokens_details") or {}
+    cached = prompt_details.get("cached_tokens")
+    if cached is None:
+        cached = usage.get("prompt_cache_hit_tokens")
+    
+    return {
+        'input_tokens': usage.get("prompt_tokens"),
+        'output_tokens': usage.get("completion_tokens"),
+        'reasoning_tokens': completion_details.get("reasoning_tokens"),
+        'cached_tokens': cached,
+    }
+
+
+@dataclass
+class ModelThroughput:
+    """Summed token usage of a model's responses and the rates derived from it."""
+    modelo: str
+    respostas: int
+    corretas: int
+    tokens_entrada: int
+    tokens_saida: int
+    tokens_raciocinio: int
+    tokens_cache: int
+    truncadas: int
+    tempo_api: float  # seconds of API time over responses with token counts
+    custo: Optional[float] = None  # USD, None without registry pricing
+
+    @property
+    def tokens_por_segundo(self) -> Optional[float]:
+        return self.tokens_saida / self.tempo_api if self.tempo_api > 0 else None
+
+    @property
+    def custo_por_hora(self) -> Optional[float]:
+        """USD per hour of API time (one request stream)."""
+        if self.custo is None or self.tempo_api <= 0:
+            return None
+        return self.custo / self.tempo_api * 3600
+
+    @property
+    def custo_por_correta(self) -> Optional[float]:
+        if self.custo is None or not self.corretas:
+            return None
+        return self.custo / self.corretas
+
+
+def throughput_by_model(
+    db: Session,
+    registry: Optional[ModelRegistry] = None,
+    model_filter: Optional[str] = None,
+    config_filter: Optional[str] = None
+) -> List[ModelThroughput]:
+    """Aggregate token usage per model in one grouped query; cost uses registry prices."""
+    registry = registry or ModelRegistry.load()
+    with_tokens = Resposta.tokens_saida.isnot(None)
+
+    query = db.query(
+        ModeloLLM.nome,
+        func.count(Resposta.id),
+        func.sum(func.cast(Resposta.resposta_correta, Integer)),
+        func.sum(Resposta.tokens_entrada),
+        func.sum(Resposta.tokens_saida),
+        func.sum(Resposta.tokens_raciocinio),
+        func.sum(Resposta.tokens_cache),
+        func.sum(case((Resposta.motivo_parada == "length", 1), else_=0)),
+        func.sum(case((with_tokens, Resposta.tempo_total), else_=None)),
+    ).join(Resposta).group_by(ModeloLLM.id, ModeloLLM.nome).order_by(ModeloLLM.nome)
+
+    if model_filter:
+        query = query.filter(ModeloLLM.nome == model_filter)
+    if config_filter:
+        query = query.filter(Resposta.configuracao == config_filter)
+
+    results = []
+    for nome, respostas, corretas, entrada, saida, raciocinio, cache, truncadas, tempo in query.all():
+        item = ModelThroughput(
+            modelo=nome,
+            respostas=respostas,
+            corretas=int(corretas or 0),
+            tokens_entrada=int(entrada or 0),
+            tokens_saida=int(saida or 0),
+            tokens_raciocinio=int(raciocinio or 0),
+            tokens_cache=int(cache or 0),
+            truncadas=int(truncadas or 0),
+            tempo_api=float(tempo or 0)
+        )
+        item.custo = registry.resolve(nome).cost(item.tokens_entrada, item.tokens_saida, item.tokens_cache)
+        results.append(item)
+
+    return results
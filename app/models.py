@@ -39,6 +39,11 @@ class ModeloLLM(Base):
     respostas = relationship("Resposta", back_populates="modelo")
 
 
+# Origem da avaliação de uma resposta (coluna `origem_avaliacao`)
+ORIGEM_JUIZ = "juiz"  # avaliação completa do juiz
+ORIGEM_TRIAGEM = "triagem"  # correção e citações decididas localmente; notas do juiz pendentes
+
+
 class Resposta(Base):
     """Tabela principal com resultados dos experimentos"""
     __tablename__ = "respostas"
@@ -54,8 +59,20 @@ class Resposta(Base):
     resposta_dada = Column(Text)  # Texto da resposta gerada pelo modelo
     
     # Métricas de tempo
-    tempo_primeira_resposta = Column(DECIMAL(5, 2))  # segundos
-    tempo_total = Column(DECIMAL(5, 2))  # segundos
+    tempo_primeira_resposta = Column(DECIMAL(8, 2))  # segundos
+    tempo_total = Column(DECIMAL(8, 2))  # segundos
+    
+    # Métricas de streaming (medidas token a token)
+    latencia_entre_tokens_media = Column(DECIMAL(10, 2))  # milissegundos
+    latencia_entre_tokens_p95 = Column(DECIMAL(10, 2))  # milissegundos
+    tokens_saida = Column(Integer)  # tokens gerados na resposta
+    tokens_por_segundo = Column(DECIMAL(10, 2))  # taxa de geração após o primeiro token
+    
+    # Uso de tokens reportado pela API
+    tokens_entrada = Column(Integer)  # tokens do prompt
+    tokens_raciocinio = Column(Integer)  # tokens de raciocínio (incluídos em tokens_saida)
+    tokens_cache = Column(Integer)  # tokens do prompt servidos do cache do provedor
+    motivo_parada = Column(String(30))  # finish_reason: "stop", "length", ...
     
     # Métricas de qualidade
     resposta_correta = Column(Boolean, nullable=False, default=False)
@@ -64,8 +81,15 @@ class Resposta(Base):
     concisao = Column(Integer)  # 1-5
     fonte_citada = Column(Boolean, nullable=False, default=False)
     
+    # Citações detectadas automaticamente (app.evaluation.citacoes); None = ainda não analisada
+    norma_mencionada = Column(Boolean)  # cita a norma técnica da pergunta
+    item_mencionado = Column(Boolean)  # cita o item (ou um subitem) da pergunta
+    
     # Somatório automático
-    somatorio = Column(Integer)  # Soma das métricas
+    somatorio = Column(Integer)  # Soma das métricas (None nas respostas só triadas: faltam as notas)
+    
+    # ORIGEM_JUIZ ou ORIGEM_TRIAGEM; None = não avaliada (ou avaliada antes desta coluna)
+    origem_avaliacao = Column(String(20))
     
     # Observações qualitativas
     observacoes = Column(Text)
@@ -101,4 +125,54 @@ class Resposta(Base):
         # Soma apenas métricas válidas (não None)
         soma_metricas = sum(m for m in metricas if m is not None)
         self.somatorio = soma_metricas + pontos_extras
-        return self.somatorio
\ No newline at end of file
+        return self.somatorio
+
+class TempoExecucao(Base):
+    """Duração de cada fase de uma tentativa de chamada à API (inclui retentativas)"""
+    __tablename__ = "tempos_execucao"
+
+    id = Column(Integer, primary_key=True, index=True)
+    pergunta_id = Column(Integer, ForeignKey("perguntas.id"), nullable=False)
+    modelo_id = Column(Integer, ForeignKey("modelos_llm.id"), nullable=False)
+    configuracao = Column(String(50), nullable=False, index=True)
+    tentativa = Column(Integer, nullable=False, default=1)  # 1 = primeira chamada, 2+ = retentativas
+    
+    # Resultado da tentativa
+    sucesso = Column(Boolean, nullable=False, default=False)
+    status_http = Column(Integer)  # status do erro, quando houver
+    erro = Column(String(200))
+    
+    # Fases em milissegundos
+    espera_ms = Column(DECIMAL(12, 3))  # fila do limitador (1ª tentativa) ou backoff
+    conexao_ms = Column(DECIMAL(12, 3))  # TCP + TLS; 0 quando a conexão é reaproveitada
+    primeiro_token_ms = Column(DECIMAL(12, 3))  # TTFT (apenas com streaming)
+    geracao_ms = Column(DECIMAL(12, 3))  # do primeiro token ao fim da resposta
+    total_ms = Column(DECIMAL(12, 3))  # duração total da tentativa
+    gravacao_banco_ms = Column(DECIMAL(12, 3))  # flush em que a resposta foi gravada
+    
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class TarefaExperimento(Base):
+    """Fila de células (pergunta, modelo, configuração) distribuídas entre workers"""
+    __tablename__ = "tarefas_experimento"
+
+    id = Column(Integer, primary_key=True, index=True)
+    pergunta_id = Column(Integer, ForeignKey("perguntas.id"), nullable=False)
+    modelo_id = Column(Integer, ForeignKey("modelos_llm.id"), nullable=False)
+    configuracao = Column(String(50), nullable=False)
+    
+    # "pendente", "em_execucao", "concluida" ou "falhou"
+    status = Column(String(20), nullable=False, default="pendente", index=True)
+    tentativas = Column(Integer, nullable=False, default=0)  # execuções que falharam
+    worker = Column(String(100))  # worker que detém (ou deteve) a tarefa
+    lease_ate = Column(DateTime(timezone=True))  # após este instante a tarefa pode ser retomada
+    erro = Column(Text)
+    
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    
+    # Cada célula entra na fila uma única vez
+    __table_args__ = (
+        UniqueConstraint('pergunta_id', 'modelo_id', 'configuracao', name='unique_tarefa_config'),
+    )
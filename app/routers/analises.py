@@ -12,6 +12,7 @@ from io import StringIO
 
 from ..database import get_db
 from ..models import Pergunta, ModeloLLM, Resposta
+from ..llm.timing import latency_percentiles, PHASES, PERCENTILES
 
 router = APIRouter()
 templates = Jinja2Templates(directory="templates")
@@ -43,6 +44,9 @@ async def analises_gerais(request: Request, db: Session = Depends(get_db)):
         func.avg(Resposta.somatorio).label('somatorio_medio')
     ).join(Resposta).group_by(Pergunta.norma_tecnica).all()
     
+    # Percentis de latência por fase (tabela tempos_execucao)
+    latencias = latency_percentiles(db)
+    
     # Processar dados para gráficos
     stats_data = []
     for stat in stats_query:
@@ -160,7 +164,10 @@ async def analises_gerais(request: Request, db: Session = Depends(get_db)):
         "grafico_acerto": grafico_acerto,
         "grafico_tempo": grafico_tempo,
         "grafico_radar": grafico_radar,
-        "grafico_norma": grafico_norma
+        "grafico_norma": grafico_norma,
+        "latencias": latencias,
+        "fases": PHASES,
+        "percentis": PERCENTILES
     })
 
 
@@ -6,6 +6,7 @@ from sqlalchemy import func, Integer
 
 from ..database import get_db
 from ..models import Pergunta, ModeloLLM, Resposta
+from ..llm.usage import throughput_by_model
 
 router = APIRouter()
 templates = Jinja2Templates(directory="templates")
@@ -45,6 +46,9 @@ async def dashboard(request: Request, db: Session = Depends(get_db)):
         func.avg(Resposta.somatorio).label('somatorio_medio')
     ).join(Resposta).group_by(ModeloLLM.id, ModeloLLM.nome).limit(5).all()
     
+    # Uso de tokens, vazão e custo por modelo
+    vazao_modelos = throughput_by_model(db)
+    
     context = {
         "request": request,
         "total_perguntas": total_perguntas,
@@ -56,7 +60,8 @@ async def dashboard(request: Request, db: Session = Depends(get_db)):
         "perguntas_teste": perguntas_teste,
         "perguntas_interessantes": perguntas_interessantes,
         "tempo_medio": round(float(tempo_medio), 2) if tempo_medio else 0,
-        "stats_modelos": stats_modelos
+        "stats_modelos": stats_modelos,
+        "vazao_modelos": vazao_modelos
     }
     
     return templates.TemplateResponse("dashboard.html", context)
\ No newline at end of file
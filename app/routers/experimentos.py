@@ -5,10 +5,15 @@ from sqlalchemy.orm import Session
 from sqlalchemy import or_, and_, cast, String
 from typing import Optional, List
 from decimal import Decimal
+import html
+import logging
 import math
 
 from ..database import get_db
 from ..models import Pergunta, ModeloLLM, Resposta
+from ..evaluation.contextual_evaluator import ContextualEvaluator
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 templates = Jinja2Templates(directory="templates")
@@ -295,6 +300,32 @@ async def visualizar_experimento(resposta_id: int, request: Request, db: Session
     })
 
 
+@router.post("/{resposta_id}/htmx-justificativa", response_class=HTMLResponse)
+def htmx_justificativa_completa(resposta_id: int, db: Session = Depends(get_db)):
+    """Justificativa completa do juiz sob demanda via HTMX - retorna fragmento HTML
+    
+    Síncrona (def) para a chamada ao juiz rodar no threadpool, sem travar o servidor.
+    """
+    resposta = db.query(Resposta).filter(Resposta.id == resposta_id).first()
+    if not resposta:
+        raise HTTPException(status_code=404, detail="Experimento não encontrado")
+    
+    if resposta.clareza is None:
+        return HTMLResponse('<p class="text-red-700">Resposta ainda não avaliada pelo juiz.</p>')
+    
+    try:
+        justificativa = ContextualEvaluator(use_cache=False).justificar_avaliacao(resposta.pergunta, resposta)
+    except Exception as e:
+        logger.error(f"Erro ao gerar justificativa da resposta {resposta_id}: {e}")
+        return HTMLResponse(f'<p class="text-red-700">Erro ao gerar justificativa: {html.escape(str(e))}</p>')
+    
+    resposta.observacoes = justificativa.formatar()
+    db.commit()
+    
+    texto = html.escape(resposta.observacoes).replace("\n", "<br>")
+    return HTMLResponse(f'<p class="text-orange-800 leading-relaxed">{texto}</p>')
+
+
 @router.get("/{resposta_id}/editar", response_class=HTMLResponse)
 async def editar_experimento_form(resposta_id: int, request: Request, db: Session = Depends(get_db)):
     """Formulário para editar experimento"""
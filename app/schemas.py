@@ -60,6 +60,8 @@ class RespostaCreate(RespostaBase):
 class Resposta(RespostaBase):
     id: int
     somatorio: Optional[int] = None
+    norma_mencionada: Optional[bool] = None
+    item_mencionado: Optional[bool] = None
     created_at: datetime
     updated_at: Optional[datetime] = None
     pergunta: Pergunta
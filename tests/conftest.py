@@ -0,0 +1,51 @@
+"""Fixtures compartilhadas: banco SQLite temporário por teste"""
+
+import os
+import tempfile
+
+# app.database cria o engine na importação
+os.environ.setdefault(
+    "DATABASE_URL",
+    f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='tcc-evals-'), 'import.db')}"
+)
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models import ModeloLLM, Pergunta
+
+
+@pytest.fixture
+def db(tmp_path):
+    """Sessão num banco SQLite novo com todas as tabelas"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+
+@pytest.fixture
+def celulas(db):
+    """Duas perguntas e um modelo; devolve as células (pergunta_id, modelo_id, configuracao)"""
+    modelo = ModeloLLM(nome="modelo-teste")
+    db.add(modelo)
+    perguntas = [
+        Pergunta(
+            numero=numero,
+            texto=f"Pergunta {numero}?",
+            resposta_esperada="12 m",
+            norma_tecnica="NT-09",
+            item="6.7.3",
+            norma_artigo="NT-09 - 6.7.3"
+        )
+        for numero in (1, 2)
+    ]
+    db.add_all(perguntas)
+    db.commit()
+    return [(pergunta.id, modelo.id, "no-rag") for pergunta in perguntas]
@@ -0,0 +1,57 @@
+"""Modo lote (Batch API) contra o servidor simulado"""
+
+import pytest
+from typer.testing import CliRunner
+
+from app.cli.batch import BatchSubmitter
+from app.cli.experiment_runner import ExperimentRunner
+from app.cli.main import app
+from app.llm.mock_server import MockServerThread, MockSettings
+from app.llm.registry import ModelRegistry, ModelRoute, ProviderConfig
+from app.models import Resposta
+
+
+@pytest.fixture
+def servidor():
+    servidor = MockServerThread(MockSettings(ttft_ms=0, ttft_sigma=0, output_tokens=20, seed=3))
+    url = servidor.start()
+    try:
+        yield servidor, url
+    finally:
+        servidor.stop()
+
+
+def test_lote_enviado_consultado_e_ingerido(db, celulas, servidor, tmp_path, monkeypatch):
+    _, url = servidor
+    monkeypatch.setenv("MOCK_LLM_API_KEY", "teste")
+    provedor = ProviderConfig("mock", f"{url}/v1", "MOCK_LLM_API_KEY")
+    runner = ExperimentRunner(
+        model_name="modelo-teste",
+        config="no-rag",
+        use_cache=False,
+        journal_path=str(tmp_path / "journal.jsonl"),
+        registry=ModelRegistry(
+            providers={"mock": provedor},
+            routes={"modelo-teste": ModelRoute("modelo-teste", provedor, "mock-llm")}
+        ),
+        db=db
+    )
+    pendentes = runner.get_questions_to_process()
+    assert len(pendentes) == 2
+
+    submitter = BatchSubmitter(runner, poll_interval=0.05, output_dir=str(tmp_path / "batches"))
+    salvas, falhas = submitter.run(pendentes)
+
+    assert (salvas, falhas) == (2, 0)
+    respostas = db.query(Resposta).order_by(Resposta.pergunta_id).all()
+    assert [resposta.pergunta_id for resposta in respostas] == [pergunta_id for pergunta_id, _, _ in celulas]
+    assert all(resposta.resposta_dada and resposta.tokens_saida for resposta in respostas)
+    assert runner.get_questions_to_process() == []
+
+
+def test_batch_com_replay_e_recusado():
+    resultado = CliRunner().invoke(app, [
+        "run-experiments", "--model", "modelo-teste", "--config", "no-rag", "--batch", "--replay", "nao-existe.jsonl.gz"
+    ])
+    assert resultado.exit_code == 1
+    assert "--replay" in resultado.output
@@ -0,0 +1,37 @@
+"""Benchmark ponta a ponta contra o servidor simulado"""
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.cli.benchmark import BENCHMARK_MODEL, PipelineBenchmark
+from app.llm.mock_server import MockSettings
+from app.models import ModeloLLM, Resposta
+
+
+def _benchmark(db_url):
+    settings = MockSettings(ttft_ms=1, ttft_sigma=0, tokens_per_second=1e6, seed=3)
+    return PipelineBenchmark(settings, db_url=db_url, questions=10, workers=4, flush_size=4, evaluate=3)
+
+
+def test_benchmark_e_repetivel(tmp_path):
+    db_url = f"sqlite:///{tmp_path / 'benchmark.db'}"
+
+    relatorios = [_benchmark(db_url).run() for _ in range(2)]
+
+    for relatorio in relatorios:
+        assert (relatorio.experiments.calls, relatorio.experiments.success) == (10, 10)
+        assert relatorio.evaluation.success == 3
+        assert relatorio.server_responses == {"200": 13}
+        assert relatorio.experiments.throughput > 0
+        assert relatorio.experiments.percentis[95] is not None
+
+    # A segunda execução recomeça do zero no mesmo banco
+    engine = create_engine(db_url)
+    db = sessionmaker(bind=engine)()
+    try:
+        respostas = db.query(Resposta).join(ModeloLLM).filter(ModeloLLM.nome == BENCHMARK_MODEL).all()
+        assert len(respostas) == 10
+        assert sum(resposta.clareza is not None for resposta in respostas) == 3
+    finally:
+        db.close()
+        engine.dispose()
@@ -0,0 +1,116 @@
+"""Cache em disco das respostas dos LLMs"""
+
+import asyncio
+import os
+
+import pytest
+
+from app.llm.cache import ResponseCache
+
+
+def test_chave_independe_da_ordem_dos_campos():
+    assert ResponseCache.make_key(model="m", prompt="p") == ResponseCache.make_key(prompt="p", model="m")
+    assert ResponseCache.make_key(model="m", prompt="p") != ResponseCache.make_key(model="m", prompt="q")
+
+
+def test_put_e_get(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    chave = ResponseCache.make_key(prompt="altura máxima?")
+    assert cache.get(chave) is None
+
+    cache.put(chave, {"response": "12 m"})
+    assert cache.get(chave) == {"response": "12 m"}
+    # Um novo processo encontra a entrada no disco
+    assert ResponseCache(str(tmp_path)).get(chave) == {"response": "12 m"}
+
+
+def test_despejo_remove_as_entradas_menos_usadas(tmp_path):
+    cache = ResponseCache(str(tmp_path), max_bytes=10_000)
+    chaves = [ResponseCache.make_key(indice=indice) for indice in range(3)]
+    for idade, chave in enumerate(chaves):
+        cache.put(chave, {"response": "x" * 3000})
+        os.utime(cache._path(chave), (idade, idade))
+    # Um acerto renova a entrada mais antiga
+    cache.get(chaves[0])
+
+    cache.put(ResponseCache.make_key(indice=3), {"response": "x" * 3000})
+
+    assert cache.get(chaves[1]) is None
+    assert cache.get(chaves[0]) is not None
+    assert cache._size <= 10_000
+
+
+def test_get_or_call_chama_uma_vez_e_depois_usa_o_cache(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    chamadas = []
+
+    async def chamar():
+        chamadas.append(1)
+        return {"response": "12 m"}
+
+    async def cenario():
+        primeira = await cache.get_or_call("chave", chamar)
+        segunda = await cache.get_or_call("chave", chamar)
+        return primeira, segunda
+
+    assert asyncio.run(cenario()) == (({"response": "12 m"}, False), ({"response": "12 m"}, True))
+    assert len(chamadas) == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_chamadas_simultaneas_iguais_sao_agrupadas(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    chamadas = []
+
+    async def chamar():
+        chamadas.append(1)
+        await asyncio.sleep(0.05)
+        return {"response": "12 m"}
+
+    async def cenario():
+        return await asyncio.gather(*(cache.get_or_call("chave", chamar) for _ in range(5)))
+
+    resultados = asyncio.run(cenario())
+
+    assert len(chamadas) == 1
+    assert [origem for _, origem in resultados].count(False) == 1
+    assert all(valor == {"response": "12 m"} for valor, _ in resultados)
+    assert cache.coalesced == 4
+
+
+def test_erro_chega_aos_agrupados_e_nao_e_guardado(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+
+    async def falhar():
+        await asyncio.sleep(0.05)
+        raise RuntimeError("erro da API")
+
+    async def cenario():
+        return await asyncio.gather(*(cache.get_or_call("chave", falhar) for _ in range(3)), return_exceptions=True)
+
+    resultados = asyncio.run(cenario())
+
+    assert all(isinstance(resultado, RuntimeError) for resultado in resultados)
+    assert cache.get("chave") is None
+    assert cache._in_flight == {}
+
+
+def test_cancelar_a_chamada_libera_a_chave(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+
+    async def lenta():
+        await asyncio.sleep(10)
+        return {"response": "nunca"}
+
+    async def rapida():
+        return {"response": "12 m"}
+
+    async def cenario():
+        tarefa = asyncio.create_task(cache.get_or_call("chave", lenta))
+        await asyncio.sleep(0.01)
+        tarefa.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await tarefa
+        return await cache.get_or_call("chave", rapida)
+
+    assert asyncio.run(cenario()) == ({"response": "12 m"}, False)
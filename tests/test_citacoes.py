@@ -0,0 +1,62 @@
+"""Detector determinístico de citações de norma e item"""
+
+import pytest
+
+from app.evaluation.citacoes import detectar_citacoes, numero_item, numero_norma, preencher_citacoes
+from app.models import Resposta
+
+
+@pytest.mark.parametrize("texto", [
+    "Conforme a NT-09, item 6.7.3, a altura máxima é 12 m",
+    "Segundo a Norma Técnica nº 09/2014, subitem 6.7.3.1",
+    "NT 09 - 6.7.3",
+    "NT–09 6.7.3",
+    "n.t. 9, §6.7.3",
+])
+def test_citacao_da_norma_e_do_item(texto):
+    deteccao = detectar_citacoes(texto, "NT-09", "6.7.3")
+    assert deteccao.norma_mencionada and deteccao.item_mencionado and deteccao.fonte_citada
+
+
+@pytest.mark.parametrize("texto, norma, item", [
+    ("A NT-19 item 6.7.3 trata disso", False, True),
+    ("12.5 m conforme NT-09", True, False),
+    ("NT-09 item 6.7", True, False),
+    ("Sem citar norma alguma", False, False),
+])
+def test_citacao_incompleta_nao_e_fonte(texto, norma, item):
+    deteccao = detectar_citacoes(texto, "NT-09", "6.7.3")
+    assert (deteccao.norma_mencionada, deteccao.item_mencionado) == (norma, item)
+    assert not deteccao.fonte_citada
+
+
+def test_item_sem_numero_usa_busca_textual():
+    assert detectar_citacoes("Ver o Anexo A da NT-09", "NT-09", "Anexo A").fonte_citada
+    assert not detectar_citacoes("Ver o Anexo B da NT-09", "NT-09", "Anexo A").item_mencionado
+
+
+def test_numeros_de_norma_e_item():
+    assert numero_norma("NT 09/2014") == 9
+    assert numero_norma("IT-01") is None
+    assert numero_item("6.7.3 c)") == "6.7.3"
+    assert numero_item("Anexo A") is None
+
+
+def test_preencher_citacoes_recalcula_o_somatorio(db, celulas):
+    pergunta_id, modelo_id, config = celulas[0]
+    resposta = Resposta(
+        pergunta_id=pergunta_id, modelo_id=modelo_id, configuracao=config,
+        resposta_dada="12 m, conforme NT-09 item 6.7.3",
+        resposta_correta=True, fonte_citada=False, clareza=5, fundamentacao_tecnica=5, concisao=5
+    )
+    resposta.somatorio = resposta.calcular_somatorio()
+    db.add(resposta)
+    db.commit()
+    somatorio_antes = resposta.somatorio
+
+    stats = preencher_citacoes(db)
+
+    db.refresh(resposta)
+    assert stats["respostas"] == 1 and stats["fonte_alterada"] == 1
+    assert resposta.norma_mencionada and resposta.item_mencionado and resposta.fonte_citada
+    assert resposta.somatorio > somatorio_antes
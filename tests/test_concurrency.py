@@ -0,0 +1,58 @@
+"""Controle adaptativo (AIMD) da concorrência"""
+
+import pytest
+
+from app.cli.concurrency import AdaptiveConcurrencyController
+
+
+def _controlador(**kwargs):
+    opcoes = dict(initial=8, minimum=1, maximum=32, latency_samples=5, cooldown=0.0)
+    opcoes.update(kwargs)
+    return AdaptiveConcurrencyController(**opcoes)
+
+
+def test_sucessos_aumentam_a_janela_aos_poucos():
+    controlador = _controlador(initial=2)
+    for _ in range(4):
+        controlador.on_success(1.0)
+    assert 2 < controlador.window < 4
+
+
+def test_429_corta_a_janela_pela_metade():
+    controlador = _controlador()
+    controlador.on_rate_limited()
+    assert controlador.limit == 4
+
+
+def test_subida_de_latencia_corta_uma_vez_e_reaprende():
+    controlador = _controlador()
+    for _ in range(5):
+        controlador.on_success(1.0)
+    janela = controlador.window
+
+    # Degrau de latência: um corte, depois a nova latência vira a referência
+    controlador.on_success(3.0)
+    assert controlador.window == pytest.approx(janela / 2)
+    for _ in range(50):
+        controlador.on_success(3.0)
+    assert controlador.window > janela / 2 + 1
+    assert controlador.last_reason == "sucesso"
+
+
+def test_referencia_baixa_antiga_nao_prende_a_janela_no_minimo():
+    # Como numa reexecução em que o p95 inicial veio de respostas quase instantâneas
+    controlador = _controlador()
+    for _ in range(5):
+        controlador.on_success(0.001)
+    for _ in range(200):
+        controlador.on_success(2.0)
+    assert controlador.limit > controlador.minimum
+
+
+def test_referencia_acompanha_latencia_mais_lenta_abaixo_do_limiar():
+    controlador = _controlador(latency_threshold=10.0)
+    for _ in range(5):
+        controlador.on_success(1.0)
+    for _ in range(100):
+        controlador.on_success(2.0)
+    assert controlador._baseline_p95 == pytest.approx(2.0, rel=0.05)
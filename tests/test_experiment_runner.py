@@ -0,0 +1,77 @@
+"""Motor assíncrono do run-experiments contra o servidor simulado"""
+
+import os
+
+import pytest
+
+from app.cli.experiment_runner import ExperimentRunner
+from app.llm.mock_server import MockServerThread, MockSettings
+from app.llm.registry import ModelRegistry, ModelRoute, ProviderConfig
+from app.models import Pergunta, Resposta
+
+
+@pytest.fixture
+def servidor():
+    servidor = MockServerThread(MockSettings(ttft_ms=50, ttft_sigma=0, tokens_per_second=1e6, seed=5))
+    url = servidor.start()
+    try:
+        yield url
+    finally:
+        servidor.stop()
+
+
+def _runner(db, url, tmp_path, concurrency):
+    os.environ.setdefault("MOCK_LLM_API_KEY", "mock")
+    provider = ProviderConfig("mock", f"{url}/v1", "MOCK_LLM_API_KEY")
+    registry = ModelRegistry(
+        providers={"mock": provider},
+        routes={"modelo-teste": ModelRoute("modelo-teste", provider, "mock-llm")}
+    )
+    return ExperimentRunner(
+        model_name="modelo-teste",
+        config="no-rag",
+        delay=0,
+        concurrency=concurrency,
+        use_cache=False,
+        journal_path=str(tmp_path / "journal.jsonl"),
+        registry=registry,
+        db=db
+    )
+
+
+def test_mantem_n_chamadas_em_voo_e_pula_as_respondidas(db, celulas, servidor, tmp_path):
+    # Mais perguntas além das duas da fixture
+    db.add_all([
+        Pergunta(numero=numero, texto=f"Pergunta {numero}?", resposta_esperada="12 m",
+                 norma_tecnica="NT-09", item="6.7.3", norma_artigo="NT-09 - 6.7.3")
+        for numero in range(3, 11)
+    ])
+    pergunta_id, modelo_id, config = celulas[0]
+    db.add(Resposta(pergunta_id=pergunta_id, modelo_id=modelo_id, configuracao=config,
+                    resposta_dada="já respondida", resposta_correta=False, fonte_citada=False))
+    db.commit()
+
+    runner = _runner(db, servidor, tmp_path, concurrency=4)
+    chamada_original = runner.call_openai_api
+    em_voo, pico = 0, 0
+
+    async def contar(*args, **kwargs):
+        nonlocal em_voo, pico
+        em_voo += 1
+        pico = max(pico, em_voo)
+        try:
+            return await chamada_original(*args, **kwargs)
+        finally:
+            em_voo -= 1
+
+    runner.call_openai_api = contar
+    assert len(runner.get_questions_to_process()) == 9
+
+    runner.run()
+
+    assert pico == 4
+    db.expire_all()
+    respostas = db.query(Resposta).filter(Resposta.modelo_id == modelo_id).all()
+    assert len(respostas) == 10
+    assert [r.resposta_dada for r in respostas if r.pergunta_id == pergunta_id] == ["já respondida"]
+    assert runner.get_questions_to_process() == []
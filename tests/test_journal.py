@@ -0,0 +1,81 @@
+"""Journal write-ahead dos resultados: pendências, compactação e resume"""
+
+import multiprocessing
+
+import pytest
+
+from app.cli import journal as journal_module
+from app.cli.journal import ResultJournal, replay_pending, result_key
+from app.models import Resposta
+
+
+def _resultado(texto="12 m conforme NT-09"):
+    return {"response": texto, "first_response_time": 0.5, "total_time": 1.5, "output_tokens": 10}
+
+
+def test_pendentes_sao_os_resultados_sem_commit(tmp_path):
+    journal = ResultJournal(str(tmp_path / "journal.jsonl"))
+    journal.record_result(1, 1, "no-rag", _resultado("primeira"))
+    journal.record_result(2, 1, "no-rag", _resultado())
+    journal.record_result(1, 1, "no-rag", _resultado("repetida"))
+    journal.record_committed([result_key(2, 1, "no-rag")])
+    # Linha truncada por uma queda no meio da escrita
+    with open(journal.path, "a", encoding="utf-8") as f:
+        f.write('{"type": "result", "key"')
+
+    [pendente] = journal.pending()
+    assert pendente["key"] == result_key(1, 1, "no-rag")
+    assert pendente["result"]["response"] == "repetida"
+
+
+def test_compactar_mantem_so_os_pendentes(tmp_path):
+    journal = ResultJournal(str(tmp_path / "journal.jsonl"))
+    for pergunta_id in range(1, 11):
+        journal.record_result(pergunta_id, 1, "no-rag", _resultado())
+    journal.record_committed([result_key(pergunta_id, 1, "no-rag") for pergunta_id in range(1, 10)])
+
+    journal.compact()
+
+    assert len(journal.path.read_text(encoding="utf-8").splitlines()) == 1
+    assert [entry["pergunta_id"] for entry in journal.pending()] == [10]
+
+
+def _gravar(path, inicio, total):
+    journal = ResultJournal(path)
+    for pergunta_id in range(inicio, inicio + total):
+        journal.record_result(pergunta_id, 1, "no-rag", _resultado())
+
+
+@pytest.mark.skipif(journal_module.fcntl is None, reason="sem flock nesta plataforma")
+def test_compactar_nao_perde_linhas_de_outro_processo(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    journal = ResultJournal(path)
+    journal.record_result(0, 1, "no-rag", _resultado())
+    journal.record_committed([result_key(0, 1, "no-rag")])
+
+    contexto = multiprocessing.get_context("fork")
+    processos = [contexto.Process(target=_gravar, args=(path, inicio, 100)) for inicio in (1, 101)]
+    for processo in processos:
+        processo.start()
+    while any(processo.is_alive() for processo in processos):
+        journal.compact()
+    for processo in processos:
+        processo.join()
+    journal.compact()
+
+    assert sorted(entry["pergunta_id"] for entry in journal.pending()) == list(range(1, 201))
+
+
+def test_resume_grava_pendentes_e_compacta(db, celulas, tmp_path):
+    journal = ResultJournal(str(tmp_path / "journal.jsonl"))
+    for pergunta_id, modelo_id, config in celulas:
+        journal.record_result(pergunta_id, modelo_id, config, _resultado())
+
+    assert replay_pending(db, journal) == (2, 0)
+    assert db.query(Resposta).count() == 2
+    assert journal.pending() == []
+    assert journal.path.read_text(encoding="utf-8") == ""
+
+    # Uma segunda execução não encontra nada a gravar
+    journal.record_result(*celulas[0], _resultado("de novo"))
+    assert replay_pending(db, journal) == (0, 1)
@@ -0,0 +1,99 @@
+"""Lotes do juiz dentro da janela de contexto do modelo"""
+
+import pytest
+
+from app.evaluation.contextual_evaluator import (
+    CONTEXTO_MODELOS, MARGEM_CONTEXTO, MAX_TOKENS_JUIZ, MODELO_JUIZ, ContextualEvaluator
+)
+from app.evaluation.models import AvaliacaoItemCompacta, AvaliacaoLote, AvaliacaoLoteCompacta
+from app.llm.mock_server import MockServerThread, MockSettings
+from app.models import Pergunta, Resposta
+
+# Tamanho típico de uma resposta de LLM no experimento
+TEXTO_RESPOSTA = (
+    "Conforme a NT-09, item 6.7.3, a distância máxima a percorrer até uma saída de emergência "
+    "em edificações com chuveiros automáticos é de 60 m, medida pelo caminhamento real. "
+) * 8
+
+
+def _pergunta():
+    return Pergunta(
+        id=1,
+        numero=1,
+        texto="Qual a distância máxima a percorrer até uma saída de emergência?",
+        resposta_esperada="60 m, conforme NT-09 item 6.7.3",
+        norma_tecnica="NT-09",
+        item="6.7.3",
+        norma_artigo="NT-09 - 6.7.3",
+        flag_resposta_duvidosa=False
+    )
+
+
+def _respostas(quantidade):
+    return [Resposta(id=10 + indice, resposta_dada=TEXTO_RESPOSTA) for indice in range(quantidade)]
+
+
+def test_lotes_cabem_na_janela_de_contexto():
+    avaliador = ContextualEvaluator(dry_run=True, use_cache=False)
+    pergunta = _pergunta()
+    lotes = avaliador._dividir_lote(pergunta, _respostas(5))
+
+    assert sum(len(lote) for lote in lotes) == 5
+    assert len(lotes) > 1
+    for lote in lotes:
+        mensagens = avaliador._mensagens(avaliador._criar_prompt_lote(pergunta, lote))
+        entrada = avaliador._tokens_entrada(mensagens, AvaliacaoLote)
+        assert entrada + MAX_TOKENS_JUIZ * len(lote) <= CONTEXTO_MODELOS[MODELO_JUIZ] - MARGEM_CONTEXTO
+
+
+def test_modo_compacto_mantem_cinco_respostas_em_um_lote():
+    avaliador = ContextualEvaluator(dry_run=True, use_cache=False, compacto=True)
+    assert [len(lote) for lote in avaliador._dividir_lote(_pergunta(), _respostas(5))] == [5]
+
+
+def test_max_tokens_limitado_pela_janela():
+    assert ContextualEvaluator._max_tokens(MODELO_JUIZ, 3000, 5, False) == 8192 - 3000 - MARGEM_CONTEXTO
+    assert ContextualEvaluator._max_tokens(MODELO_JUIZ, 3000, 1, False) == MAX_TOKENS_JUIZ
+
+
+def _item(resposta_id, correta=True):
+    return AvaliacaoItemCompacta(
+        resposta_id=resposta_id, resposta_correta=correta, clareza=4, fundamentacao_tecnica=4 if correta else 2,
+        concisao=4, conformidade_norma=4, completude_tecnica=4, justificativa="Cita a NT-09 item 6.7.3"
+    )
+
+
+def test_por_resposta_descarta_ids_desconhecidos_e_repetidos():
+    lote = AvaliacaoLoteCompacta(avaliacoes=[_item(10), _item(11), _item(11, correta=False), _item(99), _item(12, correta=False)])
+
+    avaliacoes = lote.por_resposta([10, 11, 12, 13])
+
+    # 11 veio duas vezes (ambígua), 99 não foi pedida e 13 faltou: voltam à avaliação individual
+    assert set(avaliacoes) == {10, 12}
+    assert avaliacoes[10].resposta_correta and not avaliacoes[12].resposta_correta
+    assert avaliacoes[10].observacoes == "Cita a NT-09 item 6.7.3"
+
+
+@pytest.fixture
+def servidor_8192():
+    servidor = MockServerThread(MockSettings(
+        ttft_ms=0, ttft_sigma=0, tokens_per_second=1e6, context_window=8192, seed=7
+    ))
+    url = servidor.start()
+    try:
+        yield servidor, url
+    finally:
+        servidor.stop()
+
+
+@pytest.mark.parametrize("compacto", [False, True])
+def test_lote_de_cinco_aceito_pelo_endpoint(servidor_8192, compacto):
+    servidor, url = servidor_8192
+    avaliador = ContextualEvaluator(api_key="teste", base_url=url, use_cache=False, rpm=1e6, compacto=compacto)
+
+    avaliacoes = avaliador.avaliar_pergunta_lote(_pergunta(), _respostas(5))
+
+    assert set(avaliacoes) == {10, 11, 12, 13, 14}
+    assert avaliador.chamadas_lote >= 1
+    # Nenhuma chamada recusada por exceder a janela (antes: 5 × 2000 tokens de saída → 400)
+    assert servidor.mock.responses[400] == 0
@@ -0,0 +1,114 @@
+"""Token bucket RPM/TPM do juiz e avaliação simulada sem espera"""
+
+import time
+
+import pytest
+
+from app.evaluation.contextual_evaluator import ContextualEvaluator
+from app.llm.rate_limit import RateLimiter, TokenBucket
+from app.models import Pergunta, Resposta
+
+
+def _bucket(per_minute, capacity):
+    """Bucket com o relógio em 0 (os instantes dos testes são relativos à criação)"""
+    bucket = TokenBucket(per_minute, capacity)
+    bucket._updated = 0.0
+    return bucket
+
+
+def test_bucket_cheio_libera_sem_espera_e_espaca_os_seguintes():
+    bucket = _bucket(per_minute=60, capacity=1)
+    assert bucket.reserve(1, now=0.0) == 0.0
+    assert bucket.reserve(1, now=0.0) == pytest.approx(1.0)
+    # A dívida acumula na ordem de chegada
+    assert bucket.reserve(1, now=0.0) == pytest.approx(2.0)
+
+
+def test_tempo_dentro_da_chamada_conta_para_a_cota():
+    bucket = _bucket(per_minute=20, capacity=1)
+    bucket.reserve(1, now=0.0)
+    # Uma chamada de 5 s já cobriu os 3 s da cota de 20 RPM
+    assert bucket.reserve(1, now=5.0) == 0.0
+
+
+def test_reserva_maior_que_a_capacidade_passa_com_bucket_cheio():
+    bucket = _bucket(per_minute=6000, capacity=100)
+    assert bucket.reserve(500, now=0.0) == 0.0
+    assert bucket.reserve(100, now=0.0) == pytest.approx(5.0)
+
+
+def test_credit_e_hold():
+    bucket = _bucket(per_minute=60, capacity=10)
+    bucket.reserve(10, now=0.0)
+    bucket.credit(4, now=0.0)
+    assert bucket.level == pytest.approx(4)
+    bucket.hold(3, now=0.0)
+    assert bucket.reserve(1, now=0.0) == pytest.approx(3.0)
+
+
+def test_limiter_sem_cota_nunca_espera():
+    limiter = RateLimiter("sem-cota")
+    assert all(limiter.reserve(10_000) == 0.0 for _ in range(100))
+    assert "sem limite" in limiter.describe()
+
+
+def test_settle_corrige_a_estimativa_de_tokens():
+    limiter = RateLimiter("tpm", rpm=6, tpm=6000)
+    limiter.reserve(600)
+    limiter.settle(600, 60)
+    # Capacidade de 1000 tokens: sobram 400 após a reserva e voltam 540 não usados
+    assert limiter.tokens.level == pytest.approx(940, abs=1)
+
+
+def test_sem_limite_nao_usa_a_cota_compartilhada():
+    avaliador = ContextualEvaluator(api_key="teste", base_url="http://127.0.0.1:9", use_cache=False, sem_limite=True)
+    assert avaliador.limiter.rpm is None and avaliador.limiter.tpm is None
+
+
+class _Erro429(Exception):
+    status_code = 429
+
+
+def test_cada_modelo_juiz_tem_a_sua_cota(monkeypatch):
+    monkeypatch.setenv("GROQ_RPM_LLAMA3_8B_8192", "30")
+    avaliador = ContextualEvaluator(
+        api_key="teste", base_url="http://127.0.0.1:9101", use_cache=False, rpm=10, modelo_rapido="llama3-8b-8192"
+    )
+    grande = avaliador.limiter_modelo("llama3-70b-8192")
+    rapido = avaliador.limiter_modelo("llama3-8b-8192")
+
+    assert grande is avaliador.limiter and rapido is not grande
+    assert (grande.name, grande.rpm) == ("127.0.0.1:9101/llama3-70b-8192", 10)
+    assert (rapido.name, rapido.rpm) == ("127.0.0.1:9101/llama3-8b-8192", 30)
+
+    # Um 429 do juiz rápido segura só a cota dele
+    avaliador._on_retry(_Erro429(), 1, 30.0, rapido)
+    assert rapido.reserve() > 25
+    assert grande.reserve() == 0.0
+
+
+def test_cota_do_juiz_rapido_pelas_opcoes():
+    avaliador = ContextualEvaluator(
+        api_key="teste", base_url="http://127.0.0.1:9102", use_cache=False,
+        rpm=10, rpm_rapido=60, tpm_rapido=30_000, modelo_rapido="llama3-8b-8192"
+    )
+    rapido = avaliador.limiter_modelo("llama3-8b-8192")
+    assert (rapido.rpm, rapido.tpm) == (60, 30_000)
+    assert avaliador.limiter.rpm == 10
+
+
+def test_dry_run_termina_em_milissegundos():
+    avaliador = ContextualEvaluator(dry_run=True, use_cache=False)
+    pergunta = Pergunta(
+        id=1, numero=1, texto="Altura máxima?", resposta_esperada="12 m",
+        norma_tecnica="NT-09", item="6.7.3", norma_artigo="NT-09 - 6.7.3", flag_resposta_duvidosa=False
+    )
+    respostas = [Resposta(id=indice, resposta_dada="12 m conforme NT-09 item 6.7.3") for indice in range(50)]
+
+    inicio = time.perf_counter()
+    avaliacoes = [avaliador.avaliar_resposta(pergunta, resposta) for resposta in respostas]
+    decorrido = time.perf_counter() - inicio
+
+    assert all(avaliacoes)
+    assert avaliador.limiter.calls == 0
+    assert decorrido < 0.5
@@ -0,0 +1,83 @@
+"""Circuit breaker e retentativas das chamadas às APIs"""
+
+import asyncio
+
+import pytest
+
+from app.llm.resilience import CircuitBreaker, CircuitOpenError, ResilientCaller, RetryPolicy
+
+
+class _Erro500(Exception):
+    status_code = 500
+
+
+def _falha():
+    raise _Erro500("erro do servidor")
+
+
+def _caller(reset_timeout=0.0):
+    breaker = CircuitBreaker("teste", failure_threshold=1, reset_timeout=reset_timeout)
+    return ResilientCaller(breaker, RetryPolicy(max_attempts=1))
+
+
+def test_circuito_abre_e_falha_rapido():
+    caller = _caller(reset_timeout=60.0)
+    with pytest.raises(_Erro500):
+        caller.call_sync(_falha)
+    assert caller.breaker.state == "open"
+
+    with pytest.raises(CircuitOpenError):
+        caller.call_sync(lambda: "ok")
+
+
+def test_sonda_bem_sucedida_fecha_o_circuito():
+    caller = _caller()
+    with pytest.raises(_Erro500):
+        caller.call_sync(_falha)
+
+    assert caller.call_sync(lambda: "ok") == "ok"
+    assert caller.breaker.state == "closed"
+
+
+def test_sonda_cancelada_libera_a_vaga():
+    caller = _caller()
+    with pytest.raises(_Erro500):
+        caller.call_sync(_falha)
+
+    async def cenario():
+        async def lenta():
+            await asyncio.sleep(10)
+
+        sonda = asyncio.create_task(caller.call(lenta))
+        await asyncio.sleep(0.01)
+        assert caller.breaker.state == "half-open"
+        # Enquanto a sonda está em voo, as demais chamadas falham rápido
+        with pytest.raises(CircuitOpenError):
+            await caller.call(lambda: asyncio.sleep(0))
+        sonda.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await sonda
+
+        async def rapida():
+            return "ok"
+
+        return await caller.call(rapida)
+
+    assert asyncio.run(cenario()) == "ok"
+    assert caller.breaker.state == "closed"
+
+
+def test_interrupcao_fora_da_sonda_nao_libera_a_sonda_alheia():
+    caller = _caller()
+    breaker = caller.breaker
+
+    def interrompida():
+        # Outra chamada assume a sonda depois que o circuito abriu
+        breaker.record_failure()
+        assert breaker.before_call() is True
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        caller.call_sync(interrompida)
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
@@ -0,0 +1,133 @@
+"""Triagem numérica: respostas decididas localmente não vão ao juiz (a não ser com juiz_nas_triadas)"""
+
+import pytest
+from sqlalchemy.orm import joinedload
+
+from app.evaluation.comparador import (
+    CONFERE, DIVERGE, INDETERMINADO, comparar_respostas, reavaliar_correcao, triar_resposta
+)
+from app.evaluation.contextual_evaluator import ContextualEvaluator
+from app.evaluation.engine import MotorAvaliacao
+from app.llm.mock_server import MockServerThread, MockSettings
+from app.models import ORIGEM_JUIZ, ORIGEM_TRIAGEM, ModeloLLM, Pergunta, Resposta
+
+
+def test_valor_com_unidade_convertida_confere():
+    resultado = comparar_respostas("A distância é de 1.500 cm, conforme o item 6.7.3", "15 metros")
+    assert resultado.veredito == CONFERE and resultado.decidido
+
+
+def test_valor_diferente_diverge():
+    resultado = comparar_respostas("Deve ser de 20 m.", "15 metros")
+    assert resultado.veredito == DIVERGE and resultado.correta is False
+
+
+def test_resposta_sem_valor_fica_para_o_juiz():
+    assert comparar_respostas("Depende da ocupação.", "15 metros").veredito == INDETERMINADO
+
+
+@pytest.fixture
+def respostas_triadas(db):
+    modelo = ModeloLLM(nome="modelo-teste")
+    pergunta = Pergunta(
+        numero=1, texto="Qual a distância máxima?", resposta_esperada="15 metros",
+        norma_tecnica="NT-11", item="5.5.2", norma_artigo="NT-11 - 5.5.2"
+    )
+    db.add_all([modelo, pergunta])
+    db.flush()
+    db.add_all([
+        Resposta(pergunta_id=pergunta.id, modelo_id=modelo.id, configuracao=config, resposta_dada=texto)
+        for config, texto in (
+            ("no-rag", "Deve ser de 20 m."), ("few-shot", "Depende da ocupação."), ("rag", "Depende do caso.")
+        )
+    ])
+    db.commit()
+    return db.query(Resposta).options(
+        joinedload(Resposta.pergunta), joinedload(Resposta.modelo)
+    ).order_by(Resposta.id).all()
+
+
+def test_veredito_vai_no_prompt_e_prevalece(respostas_triadas):
+    resposta = respostas_triadas[0]
+    correcao = triar_resposta(resposta)
+    avaliador = ContextualEvaluator(dry_run=True, use_cache=False)
+
+    prompt = avaliador._criar_prompt_contextual(resposta.pergunta, resposta.resposta_dada, correcao=correcao)
+    assert "resposta_correta=false" in prompt
+
+    avaliacao = avaliador.avaliar_resposta(resposta.pergunta, resposta, correcao)
+    # A simulação diz "correta"; o veredito local prevalece, com a fundamentação coerente
+    assert avaliacao.resposta_correta is False
+    assert avaliacao.fundamentacao_tecnica <= 2
+    assert avaliacao.clareza is not None
+
+
+@pytest.fixture
+def servidor():
+    servidor = MockServerThread(MockSettings(ttft_ms=0, ttft_sigma=0, tokens_per_second=1e6, seed=5))
+    url = servidor.start()
+    try:
+        yield servidor, url
+    finally:
+        servidor.stop()
+
+
+def test_respostas_triadas_nao_vao_ao_juiz(db, respostas_triadas, servidor):
+    servidor, url = servidor
+    avaliador = ContextualEvaluator(api_key="teste", base_url=url, use_cache=False, sem_limite=True)
+    motor = MotorAvaliacao(avaliador, db, concorrencia=2, lote=5, triagem=True)
+
+    resultados = motor.executar(respostas_triadas)
+
+    # As duas indeterminadas vão num lote (mais as reavaliadas individualmente); a triada não vai
+    assert motor.triadas == 1
+    assert len(resultados) == 2
+    assert avaliador.chamadas_lote == 1
+    assert servidor.mock.responses[200] == 1 + avaliador.respostas_fallback
+    db.expire_all()
+    triada, *julgadas = db.query(Resposta).order_by(Resposta.id).all()
+    assert (triada.resposta_correta, triada.origem_avaliacao) == (False, ORIGEM_TRIAGEM)
+    assert (triada.clareza, triada.fundamentacao_tecnica, triada.concisao, triada.somatorio) == (None,) * 4
+    for resposta in julgadas:
+        assert resposta.origem_avaliacao == ORIGEM_JUIZ
+        assert None not in (resposta.clareza, resposta.fundamentacao_tecnica, resposta.concisao)
+
+    # A triada sai das pendentes; volta só quando pedida
+    pendentes = avaliador.get_responses_to_evaluate(db, "modelo-teste", "no-rag")
+    assert pendentes == []
+    pendentes = avaliador.get_responses_to_evaluate(db, "modelo-teste", "no-rag", incluir_triadas=True)
+    assert [resposta.id for resposta in pendentes] == [triada.id]
+
+
+def test_juiz_nas_triadas_atribui_as_notas(db, respostas_triadas, servidor):
+    servidor, url = servidor
+    avaliador = ContextualEvaluator(api_key="teste", base_url=url, use_cache=False, sem_limite=True)
+    motor = MotorAvaliacao(avaliador, db, concorrencia=2, lote=5, juiz_nas_triadas=True)
+
+    resultados = motor.executar(respostas_triadas)
+
+    assert motor.triadas == 1
+    assert len(resultados) == 3
+    db.expire_all()
+    triada = db.query(Resposta).order_by(Resposta.id).first()
+    assert (triada.resposta_correta, triada.origem_avaliacao) == (False, ORIGEM_JUIZ)
+    assert None not in (triada.clareza, triada.fundamentacao_tecnica, triada.concisao)
+    assert triada.fundamentacao_tecnica <= 2
+
+
+def test_reavaliar_correcao_limita_a_fundamentacao(db, respostas_triadas):
+    triada = respostas_triadas[0]
+    triada.resposta_correta, triada.clareza, triada.fundamentacao_tecnica, triada.concisao = True, 4, 5, 4
+    triada.calcular_somatorio()
+    outra = respostas_triadas[1]
+    outra.resposta_correta, outra.fundamentacao_tecnica = True, 5
+    db.commit()
+
+    stats = reavaliar_correcao(db, tamanho_lote=1)
+
+    assert (stats["respostas"], stats[DIVERGE], stats[INDETERMINADO], stats["alteradas"]) == (3, 1, 2, 1)
+    db.expire_all()
+    assert (triada.resposta_correta, triada.fundamentacao_tecnica) == (False, 2)
+    assert triada.somatorio == 4 + 2 + 4
+    # Indeterminada: fica como estava
+    assert (outra.resposta_correta, outra.fundamentacao_tecnica) == (True, 5)
@@ -0,0 +1,138 @@
+"""Fila de células com lease (SQLite; PostgreSQL com TEST_POSTGRES_URL)"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.cli.result_writer import BufferedResultWriter
+from app.cli.work_queue import DONE, FAILED, PENDING, RUNNING, WorkQueue
+from app.database import Base
+from app.models import ModeloLLM, Pergunta, TarefaExperimento
+
+# Banco PostgreSQL descartável: as tabelas são recriadas e apagadas pelo teste
+TEST_POSTGRES_URL = os.getenv("TEST_POSTGRES_URL")
+
+
+def _status(db, job_id):
+    db.expire_all()
+    return db.get(TarefaExperimento, job_id).status
+
+
+def test_claim_e_exclusivo(db, celulas):
+    fila = WorkQueue(db, worker_id="a")
+    assert fila.enqueue(celulas) == 2
+    assert fila.enqueue(celulas) == 0
+
+    primeiro = fila.claim(1)
+    segundo = WorkQueue(db, worker_id="b").claim(5)
+    assert len(primeiro) == 1 and len(segundo) == 1
+    assert primeiro[0][0] != segundo[0][0]
+    assert WorkQueue(db, worker_id="c").claim(5) == []
+
+
+def test_lease_expirado_pode_ser_retomado(db, celulas):
+    WorkQueue(db, worker_id="a", lease_seconds=-60).enqueue(celulas[:1])
+    [(job_id, *_)] = WorkQueue(db, worker_id="a", lease_seconds=-60).claim(1)
+
+    retomada = WorkQueue(db, worker_id="b").claim(1)
+    assert [row[0] for row in retomada] == [job_id]
+
+
+def test_fail_exige_dono_do_lease(db, celulas):
+    dono = WorkQueue(db, worker_id="a", max_attempts=2, retry_delay=-60)
+    dono.enqueue(celulas[:1])
+    [(job_id, *_)] = dono.claim(1)
+
+    assert WorkQueue(db, worker_id="b").fail(job_id, "erro alheio") is None
+    assert _status(db, job_id) == RUNNING
+
+    assert dono.fail(job_id, "timeout") == PENDING
+    # Já devolvida: outra falha do mesmo worker não conta tentativa
+    assert dono.fail(job_id, "timeout") is None
+
+    assert [row[0] for row in dono.claim(1)] == [job_id]
+    assert dono.fail(job_id, "timeout") == FAILED
+
+
+def test_release_e_renew_exigem_dono(db, celulas):
+    dono = WorkQueue(db, worker_id="a")
+    dono.enqueue(celulas)
+    ids = [row[0] for row in dono.claim(2)]
+
+    outro = WorkQueue(db, worker_id="b")
+    assert outro.renew(ids) == 0
+    assert outro.release(ids) == 0
+    assert dono.renew(ids) == 2
+    assert dono.release(ids) == 2
+    assert {_status(db, job_id) for job_id in ids} == {PENDING}
+
+
+def test_writer_conclui_tarefas_e_avisa_apos_commit(db, celulas):
+    fila = WorkQueue(db, worker_id="a")
+    fila.enqueue(celulas)
+    claimed = fila.claim(2)
+
+    writer = BufferedResultWriter(db, flush_size=10, flush_interval=3600)
+    confirmadas = []
+    writer.on_jobs_committed = confirmadas.extend
+
+    for job_id, pergunta_id, modelo_id, config in claimed:
+        writer.add(
+            {"pergunta_id": pergunta_id, "modelo_id": modelo_id, "configuracao": config,
+             "resposta_dada": "12 m", "resposta_correta": False, "fonte_citada": False},
+            job_id=job_id
+        )
+    # Ainda no buffer: as tarefas seguem com o worker (e o lease continua sendo renovado)
+    assert confirmadas == []
+    assert {_status(db, row[0]) for row in claimed} == {RUNNING}
+
+    assert writer.flush() == 2
+    assert sorted(confirmadas) == [row[0] for row in claimed]
+    assert {_status(db, row[0]) for row in claimed} == {DONE}
+
+
+@pytest.fixture
+def postgres():
+    engine = create_engine(TEST_POSTGRES_URL, pool_size=8)
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    try:
+        yield sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    finally:
+        Base.metadata.drop_all(engine)
+        engine.dispose()
+
+
+@pytest.mark.skipif(not TEST_POSTGRES_URL, reason="defina TEST_POSTGRES_URL com um banco PostgreSQL descartável")
+def test_workers_concorrentes_no_postgres_reservam_cada_celula_uma_vez(postgres):
+    with postgres() as db:
+        modelo = ModeloLLM(nome="modelo-teste")
+        perguntas = [
+            Pergunta(numero=numero, texto=f"Pergunta {numero}?", resposta_esperada="12 m",
+                     norma_tecnica="NT-09", item="6.7.3", norma_artigo="NT-09 - 6.7.3")
+            for numero in range(1, 61)
+        ]
+        db.add(modelo)
+        db.add_all(perguntas)
+        db.commit()
+        celulas = [(pergunta.id, modelo.id, config) for pergunta in perguntas for config in ("no-rag", "rag")]
+        assert WorkQueue(db, worker_id="enqueue").enqueue(celulas) == 120
+
+    def trabalhar(worker_id):
+        reservadas = []
+        with postgres() as db:
+            fila = WorkQueue(db, worker_id=worker_id)
+            while lote := fila.claim(3):
+                reservadas.extend(row[0] for row in lote)
+        return reservadas
+
+    with ThreadPoolExecutor(max_workers=6) as executor:
+        por_worker = list(executor.map(trabalhar, [f"w{indice}" for indice in range(6)]))
+
+    reservadas = [job_id for ids in por_worker for job_id in ids]
+    assert len(reservadas) == len(set(reservadas)) == 120
+    # SKIP LOCKED deixa os workers avançarem em paralelo em vez de um só levar tudo
+    assert sum(bool(ids) for ids in por_worker) > 1